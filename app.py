@@ -3,11 +3,23 @@ import sys
 from PyQt5.QtWidgets import (
     QMainWindow, QApplication, QWidget, QSplitter, QListWidget,
     QPlainTextEdit, QHBoxLayout, QVBoxLayout, QAction, QFileDialog,
-    QMessageBox, QPushButton, QDialog, QLineEdit, QLabel
+    QMessageBox, QPushButton, QDialog, QLineEdit, QLabel, QTableView, QActionGroup,
+    QTreeWidget, QTreeWidgetItem, QInputDialog
 )
-from PyQt5.QtCore import Qt
-from db_manager import DBManager
-from table_editor import TableEditorWindow
+from PyQt5.QtCore import Qt, QTimer
+from typing import Any, Dict, List, Optional
+from blob_io import describe_value
+from change_tracker import ChangeTracker
+from db_manager import DBManager, PROFILES, split_statements
+from profiling import format_size
+from settings import get_setting, set_setting
+from sql_editor import SqlEditor
+from table_model import ResultTableModel
+from workers import QueryWorker, PoolTask, WriteWorker
+# Диалоги (dialogs, table_editor) импортируются при первом открытии, чтобы не замедлять запуск
+
+STATS_DELAY_MS = 200       # задержка подсчёта статистики после выбора таблицы
+STATS_VALUE_CHARS = 40     # сколько символов min/max показывать в панели статистики
 
 class MainWindow(QMainWindow):
     """
@@ -18,6 +30,18 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("SQLite DB Manager")
         self.resize(1000, 600)
         self.db_manager = DBManager()
+        self.query_worker: Optional[QueryWorker] = None
+        self.result_sql: Optional[str] = None
+        self.stats_task: Optional[PoolTask] = None
+        self.copy_workers: List[WriteWorker] = []
+        # Таблица панели статистики, изменения которой отслеживаются
+        self.stats_table: Optional[str] = None
+        # Уведомления об изменениях: список таблиц и статистика обновляются только по ним
+        self.change_tracker = ChangeTracker(self.db_manager, parent=self)
+        self.change_tracker.schema_changed.connect(self.refresh_table_list)
+        self.change_tracker.schema_changed.connect(lambda: self.sql_editor.refresh_schema())
+        self.change_tracker.rows_changed.connect(lambda table_name, changes: self.on_table_changed(table_name))
+        self.change_tracker.table_changed.connect(self.on_table_changed)
         self.init_ui()
         self.apply_dark_theme()
 
@@ -42,24 +66,54 @@ class MainWindow(QMainWindow):
         left_layout.addWidget(btn_add_table)
         left_layout.addWidget(btn_view_edit)
         left_layout.addWidget(btn_delete_table)
+        # Статистика выбранной таблицы считается в фоновом пуле, после паузы в выборе
+        self.stats_tree = QTreeWidget()
+        self.stats_tree.setHeaderLabels(["Параметр", "Значение"])
+        left_layout.addWidget(self.stats_tree)
+        self.btn_stats_cancel = QPushButton("Отменить подсчёт")
+        self.btn_stats_cancel.setEnabled(False)
+        self.btn_stats_cancel.clicked.connect(self.cancel_stats)
+        left_layout.addWidget(self.btn_stats_cancel)
         left_panel.setLayout(left_layout)
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setSingleShot(True)
+        self.stats_timer.setInterval(STATS_DELAY_MS)
+        self.stats_timer.timeout.connect(self.update_stats)
+        self.table_list.currentItemChanged.connect(lambda current, previous: self.stats_timer.start())
 
         # Правая панель: SQL редактор и область вывода
         right_panel = QWidget()
         right_layout = QVBoxLayout()
-        self.sql_editor = QPlainTextEdit()
+        self.sql_editor = SqlEditor(self.db_manager)
         self.sql_editor.setPlaceholderText("Введите SQL запросы здесь...")
         right_layout.addWidget(self.sql_editor)
-        btn_sql_run = QPushButton("Выполнить SQL")
-        btn_sql_run.clicked.connect(self.run_sql)
+        self.btn_sql_run = QPushButton("Выполнить SQL")
+        self.btn_sql_run.clicked.connect(self.run_sql)
+        btn_sql_explain = QPushButton("План запроса")
+        btn_sql_explain.clicked.connect(self.explain_sql)
+        self.btn_sql_cancel = QPushButton("Отмена")
+        self.btn_sql_cancel.setEnabled(False)
+        self.btn_sql_cancel.clicked.connect(self.cancel_sql)
         btn_sql_clear = QPushButton("Очистить SQL")
         btn_sql_clear.clicked.connect(self.clear_sql)
         btn_layout = QHBoxLayout()
-        btn_layout.addWidget(btn_sql_run)
+        btn_layout.addWidget(self.btn_sql_run)
+        btn_layout.addWidget(btn_sql_explain)
+        btn_layout.addWidget(self.btn_sql_cancel)
         btn_layout.addWidget(btn_sql_clear)
+        self.btn_export_result = QPushButton("Экспорт результата")
+        self.btn_export_result.setEnabled(False)
+        self.btn_export_result.clicked.connect(self.export_result)
+        btn_layout.addWidget(self.btn_export_result)
         right_layout.addLayout(btn_layout)
+        # Сетка результата последнего запроса; строки сверх бюджета памяти лежат во временном файле
+        self.result_model = ResultTableModel(self)
+        self.result_view = QTableView()
+        self.result_view.setModel(self.result_model)
+        right_layout.addWidget(self.result_view)
         self.output_editor = QPlainTextEdit()
         self.output_editor.setReadOnly(True)
+        self.output_editor.setMaximumHeight(120)
         right_layout.addWidget(self.output_editor)
         right_panel.setLayout(right_layout)
 
@@ -71,8 +125,11 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(splitter)
         central_widget.setLayout(main_layout)
 
+        self.profile_label = QLabel()
+        self.statusBar().addPermanentWidget(self.profile_label)
         self.create_menu()
         self.refresh_table_list()
+        self.update_profile_state()
 
     def create_menu(self) -> None:
         menubar = self.menuBar()
@@ -83,11 +140,49 @@ class MainWindow(QMainWindow):
         open_db_action.triggered.connect(self.open_database)
         export_sql_action = QAction("Экспорт SQL", self)
         export_sql_action.triggered.connect(self.export_sql)
+        import_data_action = QAction("Импорт данных...", self)
+        import_data_action.triggered.connect(self.import_data)
+        run_file_action = QAction("Выполнить SQL-файл...", self)
+        run_file_action.triggered.connect(self.run_sql_file)
         exit_action = QAction("Выход", self)
         exit_action.triggered.connect(self.close)
         file_menu.addAction(new_db_action)
         file_menu.addAction(open_db_action)
         file_menu.addAction(export_sql_action)
+        file_menu.addAction(import_data_action)
+        file_menu.addAction(run_file_action)
+        file_menu.addSeparator()
+        # Рабочее пространство: подключённые базы видны в списке как схема.таблица
+        attach_action = QAction("Подключить базу...", self)
+        attach_action.triggered.connect(self.attach_database)
+        detach_action = QAction("Отключить базу...", self)
+        detach_action.triggered.connect(self.detach_database)
+        copy_table_action = QAction("Копировать таблицу в базу...", self)
+        copy_table_action.triggered.connect(self.copy_table)
+        file_menu.addAction(attach_action)
+        file_menu.addAction(detach_action)
+        file_menu.addAction(copy_table_action)
+        maintenance_menu = file_menu.addMenu("Обслуживание")
+        for title, operation in (
+            ("Резервная копия...", "backup"),
+            ("VACUUM INTO...", "vacuum_into"),
+            ("Incremental vacuum", "incremental_vacuum"),
+            ("PRAGMA optimize", "optimize"),
+        ):
+            action = QAction(title, self)
+            action.triggered.connect(lambda checked, op=operation: self.maintenance(op))
+            maintenance_menu.addAction(action)
+        file_menu.addSeparator()
+        # Профили подключения: переключатель, отмечен профиль текущей базы
+        profile_menu = file_menu.addMenu("Профиль подключения")
+        self.profile_group = QActionGroup(self)
+        self.profile_actions = {}
+        for name in PROFILES:
+            action = QAction(name, self, checkable=True)
+            action.triggered.connect(lambda checked, profile=name: self.set_profile(profile))
+            self.profile_group.addAction(action)
+            profile_menu.addAction(action)
+            self.profile_actions[name] = action
         file_menu.addSeparator()
         file_menu.addAction(exit_action)
 
@@ -95,6 +190,20 @@ class MainWindow(QMainWindow):
         run_sql_action = QAction("Выполнить SQL", self)
         run_sql_action.triggered.connect(self.run_sql)
         sql_menu.addAction(run_sql_action)
+        self.stop_on_error_action = QAction("Останавливать скрипт при ошибке", self, checkable=True)
+        self.stop_on_error_action.setChecked(bool(get_setting("script_stop_on_error", True)))
+        self.stop_on_error_action.toggled.connect(lambda checked: set_setting("script_stop_on_error", checked))
+        sql_menu.addAction(self.stop_on_error_action)
+        result_cache_action = QAction("Кэшировать результаты запросов", self, checkable=True)
+        result_cache_action.setChecked(bool(get_setting("result_cache", False)))
+        result_cache_action.toggled.connect(self.db_manager.set_result_cache)
+        sql_menu.addAction(result_cache_action)
+        explain_action = QAction("План запроса", self)
+        explain_action.triggered.connect(self.explain_sql)
+        sql_menu.addAction(explain_action)
+        query_log_action = QAction("Журнал запросов...", self)
+        query_log_action.triggered.connect(self.show_query_log)
+        sql_menu.addAction(query_log_action)
 
     def apply_dark_theme(self) -> None:
         # Простейший dark stylesheet
@@ -116,8 +225,12 @@ class MainWindow(QMainWindow):
         if filename:
             try:
                 self.db_manager.new_database(filename)
+                self.stats_table = None
+                self.change_tracker.reset()
                 QMessageBox.information(self, "База данных", f"Создана новая база: {filename}")
                 self.refresh_table_list()
+                self.sql_editor.refresh_schema()
+                self.update_profile_state()
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", str(e))
 
@@ -128,62 +241,339 @@ class MainWindow(QMainWindow):
         if filename:
             try:
                 self.db_manager.open_database(filename)
+                self.stats_table = None
+                self.change_tracker.reset()
                 QMessageBox.information(self, "База данных", f"Открыта база: {filename}")
                 self.refresh_table_list()
+                self.sql_editor.refresh_schema()
+                self.update_profile_state()
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", str(e))
 
-    def export_sql(self) -> None:
+    def attach_database(self) -> None:
+        if not self.db_manager.conn:
+            QMessageBox.warning(self, "Внимание", "База не открыта!")
+            return
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Подключить базу данных", "", "SQLite Database (*.db);;Все файлы (*)"
+        )
+        if not filename:
+            return
+        alias, ok = QInputDialog.getText(self, "Подключить базу", "Псевдоним (схема):")
+        if not ok:
+            return
         try:
-            sql_dump = self.db_manager.export_sql()
-            dlg = QDialog(self)
-            dlg.setWindowTitle("SQL дамп")
-            layout = QVBoxLayout()
-            text_edit = QPlainTextEdit()
-            text_edit.setPlainText(sql_dump)
-            layout.addWidget(text_edit)
-            btn_save = QPushButton("Сохранить в файл")
-            btn_save.clicked.connect(lambda: self.save_dump(sql_dump))
-            layout.addWidget(btn_save)
-            dlg.setLayout(layout)
-            dlg.resize(600, 400)
-            dlg.exec_()
+            self.db_manager.attach_database(filename, alias.strip() or None)
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", str(e))
+        self.refresh_table_list()
+        self.sql_editor.refresh_schema()
 
-    def save_dump(self, sql_dump: str) -> None:
-        filename, _ = QFileDialog.getSaveFileName(
-            self, "Сохранить SQL дамп", "", "SQL File (*.sql);;Все файлы (*)"
+    def detach_database(self) -> None:
+        if not self.db_manager.attached:
+            QMessageBox.warning(self, "Внимание", "Нет подключённых баз!")
+            return
+        alias, ok = QInputDialog.getItem(
+            self, "Отключить базу", "База:", list(self.db_manager.attached), 0, False
         )
-        if filename:
-            try:
-                with open(filename, "w", encoding="utf-8") as f:
-                    f.write(sql_dump)
-                QMessageBox.information(self, "Успех", f"Дамп сохранён в {filename}")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", str(e))
+        if not ok:
+            return
+        self.cancel_stats()
+        self.track_stats_table(None)
+        try:
+            self.db_manager.detach_database(alias)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+        self.refresh_table_list()
+        self.sql_editor.refresh_schema()
 
-    def run_sql(self) -> None:
-        sql = self.sql_editor.toPlainText().strip()
-        if not sql:
+    def copy_table(self) -> None:
+        table_name = self.current_table()
+        if table_name is None:
+            QMessageBox.warning(self, "Внимание", "Не выбрана таблица!")
+            return
+        schemas = ["main", *self.db_manager.attached]
+        if len(schemas) < 2:
+            QMessageBox.warning(self, "Внимание", "Нет подключённых баз!")
+            return
+        target, ok = QInputDialog.getItem(self, "Копировать таблицу", "В базу:", schemas, 0, False)
+        if not ok:
             return
+        db_manager = self.db_manager
+        # INSERT ... SELECT выполняется в SQLite на отдельном подключении, не блокируя окно
+        worker = WriteWorker(
+            db_manager, lambda conn, *args: db_manager.copy_table(*args, conn=conn), table_name, target, parent=self
+        )
+        worker.succeeded.connect(lambda rows: self.on_table_copied(table_name, target, rows))
+        worker.failed.connect(lambda message: QMessageBox.critical(self, "Ошибка", message))
+        worker.finished.connect(worker.deleteLater)
+        self.copy_workers.append(worker)
+        worker.finished.connect(lambda: self.copy_workers.remove(worker))
+        self.statusBar().showMessage(f"Копирование {table_name} в {target}...")
+        worker.start()
+
+    def on_table_copied(self, table_name: str, target: str, rows: int) -> None:
+        self.statusBar().showMessage(f"Таблица {table_name}: скопировано строк в {target}: {rows}", 5000)
+        self.refresh_table_list()
+
+    def set_profile(self, profile: str) -> None:
         try:
-            self.db_manager.execute_script(sql)
-            self.refresh_table_list()
-            self.output_editor.setPlainText("SQL выполнен успешно.")
+            self.db_manager.set_profile(profile)
         except Exception as e:
-            QMessageBox.critical(self, "SQL ошибка", str(e))
+            QMessageBox.critical(self, "Ошибка", str(e))
+        self.update_profile_state()
+
+    def update_profile_state(self) -> None:
+        has_db = self.db_manager.conn is not None
+        for name, action in self.profile_actions.items():
+            action.setEnabled(has_db)
+            action.setChecked(has_db and name == self.db_manager.profile)
+        if has_db:
+            pragmas = self.db_manager.get_pragmas()
+            self.profile_label.setText(
+                f"Профиль: {self.db_manager.profile} (journal_mode={pragmas['journal_mode']})"
+            )
+        else:
+            self.profile_label.setText("")
+
+    def export_sql(self) -> None:
+        if not self.db_manager.conn:
+            QMessageBox.warning(self, "Внимание", "База не открыта!")
+            return
+        from dialogs import ExportDumpDialog
+        dialog = ExportDumpDialog(self, self.db_manager)
+        dialog.exec_()
+
+    def maintenance(self, operation: str) -> None:
+        if not self.db_manager.conn:
+            QMessageBox.warning(self, "Внимание", "База не открыта!")
+            return
+        from dialogs import MaintenanceDialog
+        dialog = MaintenanceDialog(self, self.db_manager, operation)
+        dialog.exec_()
+
+    def import_data(self) -> None:
+        if not self.db_manager.conn:
+            QMessageBox.warning(self, "Внимание", "База не открыта!")
+            return
+        from dialogs import ImportDialog
+        dialog = ImportDialog(self, self.db_manager, self.current_table())
+        dialog.exec_()
+
+    def run_sql_file(self) -> None:
+        if not self.db_manager.conn:
+            QMessageBox.warning(self, "Внимание", "База не открыта!")
+            return
+        from dialogs import RunSqlFileDialog
+        dialog = RunSqlFileDialog(self, self.db_manager)
+        dialog.exec_()
+
+    def run_sql(self) -> None:
+        sql = self.sql_editor.toPlainText().strip()
+        if not sql or self.query_worker is not None:
+            return
+        if not self.db_manager.db_file:
+            QMessageBox.warning(self, "Внимание", "База не открыта!")
+            return
+        self.output_editor.clear()
+        self.result_model.clear()
+        worker = QueryWorker(self.db_manager, sql, self.stop_on_error_action.isChecked(), self)
+        worker.result_ready.connect(self.result_model.set_store)
+        worker.rows_ready.connect(self.result_model.rows_added)
+        worker.message.connect(self.output_editor.appendPlainText)
+        worker.failed.connect(lambda error: QMessageBox.critical(self, "SQL ошибка", error))
+        worker.progress.connect(
+            lambda steps: self.statusBar().showMessage(f"Выполняется... шагов VM: {steps}")
+        )
+        worker.finished.connect(self.on_sql_finished)
+        self.query_worker = worker
+        self.change_tracker.set_script_busy(True)
+        self.btn_sql_run.setEnabled(False)
+        self.btn_sql_cancel.setEnabled(True)
+        self.statusBar().showMessage("Выполняется...")
+        worker.start()
+
+    def explain_sql(self) -> None:
+        # Анализируется выделенный фрагмент или первая команда редактора
+        text = self.sql_editor.textCursor().selectedText().replace("\u2029", "\n").strip()
+        if not text:
+            text = self.sql_editor.toPlainText().strip()
+        statements = split_statements(text)
+        if not statements:
+            return
+        if not self.db_manager.conn:
+            QMessageBox.warning(self, "Внимание", "База не открыта!")
+            return
+        from dialogs import QueryPlanDialog
+        dialog = QueryPlanDialog(self, self.db_manager, statements[0].rstrip(";"))
+        dialog.exec_()
+
+    def show_query_log(self) -> None:
+        from dialogs import QueryLogDialog
+        dialog = QueryLogDialog(self, self.db_manager)
+        dialog.exec_()
+
+    def cancel_sql(self) -> None:
+        if self.query_worker is not None:
+            self.query_worker.cancel()
+
+    def on_sql_finished(self) -> None:
+        if self.query_worker is not None:
+            self.result_sql = self.query_worker.result_sql
+            self.btn_export_result.setEnabled(self.result_sql is not None)
+            self.query_worker.deleteLater()
+        self.query_worker = None
+        self.btn_sql_run.setEnabled(True)
+        self.btn_sql_cancel.setEnabled(False)
+        self.statusBar().clearMessage()
+        # Список таблиц и статистика обновятся по сигналам, только если скрипт что-то изменил
+        self.change_tracker.set_script_busy(False)
+
+    def export_result(self) -> None:
+        # Запрос выполняется заново и выгружается потоково, а не из сетки
+        if not self.result_sql:
+            return
+        from dialogs import ExportDataDialog
+        dialog = ExportDataDialog(self, self.db_manager, self.result_sql, "результат запроса")
+        dialog.exec_()
+
+    def closeEvent(self, event) -> None:
+        # Не оставляем фоновый запрос работать после закрытия окна
+        if self.query_worker is not None:
+            self.query_worker.cancel()
+            self.query_worker.wait()
+        self.result_model.clear()
+        self.cancel_stats()
+        self.change_tracker.stop()
+        for worker in list(self.copy_workers):
+            worker.cancel()
+            worker.wait()
+        self.db_manager.close()
+        super().closeEvent(event)
 
     def clear_sql(self) -> None:
         self.sql_editor.clear()
 
     def refresh_table_list(self) -> None:
-        self.table_list.clear()
+        # Список обновляется точечно: удаляются исчезнувшие и вставляются новые таблицы,
+        # остальные элементы (и выделение) остаются на месте
         try:
-            tables = self.db_manager.get_tables()
-            self.table_list.addItems(tables)
+            tables = self.db_manager.get_workspace_tables()
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", str(e))
+            return
+        current = [self.table_list.item(i).text() for i in range(self.table_list.count())]
+        if current == tables:
+            return
+        self.table_list.setUpdatesEnabled(False)
+        names = set(tables)
+        for i in reversed(range(len(current))):
+            if current[i] not in names:
+                self.table_list.takeItem(i)
+        for i, name in enumerate(tables):
+            item = self.table_list.item(i)
+            if item is None or item.text() != name:
+                self.table_list.insertItem(i, name)
+        while self.table_list.count() > len(tables):
+            self.table_list.takeItem(self.table_list.count() - 1)
+        self.table_list.setUpdatesEnabled(True)
+
+    def current_table(self) -> Optional[str]:
+        """Выбранная таблица: имя основной базы или TableName подключённой."""
+        current_item = self.table_list.currentItem()
+        if current_item is None or not self.db_manager.conn:
+            return None
+        return self.db_manager.table_ref(current_item.text())
+
+    def update_stats(self) -> None:
+        self.cancel_stats()
+        self.stats_tree.clear()
+        table_name = self.current_table()
+        self.track_stats_table(table_name)
+        if table_name is None:
+            return
+        try:
+            stats = self.db_manager.cached_table_stats(table_name)
+        except Exception as e:
+            self.show_stats_message(str(e))
+            return
+        if stats is not None:
+            self.show_stats(stats)
+            return
+        self.show_stats_message("Подсчёт...")
+        db_manager = self.db_manager
+        task = PoolTask(db_manager, lambda conn, name: db_manager.get_table_stats(name, conn), table_name, parent=self)
+        task.succeeded.connect(self.show_stats)
+        task.failed.connect(self.show_stats_message)
+        task.succeeded.connect(self.on_stats_finished)
+        task.failed.connect(self.on_stats_finished)
+        self.stats_task = task
+        self.btn_stats_cancel.setEnabled(True)
+        task.start()
+
+    def track_stats_table(self, table_name: Optional[str]) -> None:
+        if table_name == self.stats_table:
+            return
+        if self.stats_table is not None:
+            self.change_tracker.unwatch(self.stats_table)
+        self.stats_table = table_name
+        if table_name is not None:
+            self.change_tracker.watch(table_name)
+
+    def on_table_changed(self, table_name: str) -> None:
+        # Статистика пересчитывается, только если изменилась показанная таблица
+        if table_name == self.stats_table:
+            self.stats_timer.start()
+
+    def cancel_stats(self) -> None:
+        self.stats_timer.stop()
+        if self.stats_task is not None:
+            self.stats_task.cancel()
+            self.stats_task.deleteLater()
+            self.stats_task = None
+            self.show_stats_message("Подсчёт отменён")
+        self.btn_stats_cancel.setEnabled(False)
+
+    def on_stats_finished(self) -> None:
+        if self.stats_task is not None:
+            self.stats_task.deleteLater()
+        self.stats_task = None
+        self.btn_stats_cancel.setEnabled(False)
+
+    def show_stats_message(self, message: str) -> None:
+        self.stats_tree.clear()
+        QTreeWidgetItem(self.stats_tree, [message])
+
+    def show_stats(self, stats: Dict[str, Any]) -> None:
+        current_item = self.table_list.currentItem()
+        if current_item is None or current_item.text() != stats["table"]:
+            return
+        tree = self.stats_tree
+        tree.clear()
+        QTreeWidgetItem(tree, ["Строк", str(stats["rows"])])
+        pages = "—" if stats["pages"] is None else str(stats["pages"])
+        QTreeWidgetItem(tree, ["Страниц", pages])
+        QTreeWidgetItem(tree, ["Размер", format_size(stats["size"])])
+        indexes = QTreeWidgetItem(tree, ["Индексы", str(len(stats["indexes"]))])
+        for index in stats["indexes"]:
+            columns = ", ".join(index["columns"])
+            flags = " UNIQUE" if index["unique"] else ""
+            QTreeWidgetItem(indexes, [index["name"], f"({columns}){flags}, {format_size(index['size'])}"])
+        title = "Столбцы" if stats["sample"] is None else f"Столбцы (выборка {stats['sample']} строк)"
+        columns_item = QTreeWidgetItem(tree, [title, str(len(stats["columns"]))])
+        for col in stats["columns"]:
+            item = QTreeWidgetItem(columns_item, [col["name"], col["type"]])
+            for label, key in (("NULL", "nulls"), ("Различных", "distinct"), ("Мин.", "min"), ("Макс.", "max")):
+                QTreeWidgetItem(item, [label, self._stats_value(col[key])])
+        tree.expandItem(columns_item)
+        tree.resizeColumnToContents(0)
+
+    @staticmethod
+    def _stats_value(value: Any) -> str:
+        if value is None:
+            return "NULL"
+        text = str(describe_value(value))
+        return text if len(text) <= STATS_VALUE_CHARS else text[:STATS_VALUE_CHARS - 1] + "…"
 
     def add_table(self) -> None:
         if not self.db_manager.conn:
@@ -193,20 +583,19 @@ class MainWindow(QMainWindow):
         dialog.exec_()
 
     def view_edit_table(self) -> None:
-        current_item = self.table_list.currentItem()
-        if not current_item:
+        table_name = self.current_table()
+        if table_name is None:
             QMessageBox.warning(self, "Внимание", "Не выбрана таблица!")
             return
-        table_name = current_item.text()
-        editor = TableEditorWindow(self, self.db_manager, table_name)
+        from table_editor import TableEditorWindow
+        editor = TableEditorWindow(self, self.db_manager, table_name, self.change_tracker)
         editor.exec_()
 
     def delete_table(self) -> None:
-        current_item = self.table_list.currentItem()
-        if not current_item:
+        table_name = self.current_table()
+        if table_name is None:
             QMessageBox.warning(self, "Внимание", "Не выбрана таблица!")
             return
-        table_name = current_item.text()
         reply = QMessageBox.question(
             self, "Подтверждение", f"Удалить таблицу {table_name}? Все данные будут потеряны.",
             QMessageBox.Yes | QMessageBox.No
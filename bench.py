@@ -0,0 +1,400 @@
+# bench.py
+"""
+Замеры производительности DBManager и окна таблицы на синтетических базах.
+
+    python -m bench --rows 100000 --columns int,text,real,blob? --output result.json
+    python -m bench --rows 1000000 --baseline baseline.json --tolerance 0.2
+    python -m bench --rows 10000 --qt            # плюс TableEditorWindow без экрана
+
+База генерируется целиком в SQLite детерминированными выражениями от номера
+строки (одинаковые --rows/--columns/--seed дают одинаковые данные) и
+сохраняется в --workdir, чтобы повторные запуски не создавали её заново.
+Операции записи выполняются на отдельной временной базе.
+Результат – JSON: параметры, окружение и для каждой операции время каждого
+прогона, min и median. С --baseline медианы сравниваются с сохранённым
+результатом; при замедлении больше допуска код возврата – 1.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import List, Any, Dict, Optional, Callable
+from db_manager import DBManager, quote_identifier
+
+TABLE = "bench"
+COLUMN_TYPES = {"int": "INTEGER", "real": "REAL", "text": "TEXT", "blob": "BLOB"}
+DEFAULT_COLUMNS = "int,text,real,text?"
+TEXT_LENGTH = 32           # символов в сгенерированном тексте
+BLOB_LENGTH = 256          # байт в сгенерированном BLOB
+NULL_EVERY = 10            # у столбцов с '?' каждое такое значение – NULL
+PAGE_SIZE = 500            # строк в странице, как в окне таблицы
+FULL_READ_LIMIT = 1000000  # get_table_rows и export_sql собирают всё в памяти – не больше стольких строк
+WAIT_TIMEOUT = 120.0       # сколько ждать загрузки в окне Qt, с
+_MULTIPLIERS = (2654435761, 40503, 69069, 1103515245, 134775813, 22695477, 1664525, 214013)
+_FILLER = "abcdefghijklmnopqrstuvwxyz" * 8
+
+
+def parse_columns(spec: str) -> List[str]:
+    """Список типов столбцов из строки вида "int,text,real,blob?"."""
+    columns = [part.strip().lower() for part in spec.split(",") if part.strip()]
+    for col in columns:
+        if col.rstrip("?") not in COLUMN_TYPES:
+            raise Exception(f"Неизвестный тип столбца: {col} (допустимы {', '.join(COLUMN_TYPES)}, '?' – с NULL)")
+    if not columns:
+        raise Exception("Не заданы столбцы.")
+    return columns
+
+
+def _value_sql(kind: str, i: int, seed: int) -> str:
+    # Псевдослучайное, но воспроизводимое значение от номера строки x
+    number = f"((x * {_MULTIPLIERS[i % len(_MULTIPLIERS)]} + {seed + i}) % 1000003)"
+    base = kind.rstrip("?")
+    if base == "int":
+        sql = number
+    elif base == "real":
+        sql = f"({number} / 100.0)"
+    elif base == "text":
+        sql = f"substr({number} || '{_FILLER}', 1, {TEXT_LENGTH})"
+    else:
+        sql = f"CAST(printf('%0{BLOB_LENGTH}d', {number}) AS BLOB)"
+    if kind.endswith("?"):
+        sql = f"CASE WHEN {number} % {NULL_EVERY} = 0 THEN NULL ELSE {sql} END"
+    return sql
+
+
+def generate_database(filename: str, rows: int, columns: List[str], seed: int = 0, index: bool = False) -> None:
+    """Создаёт базу с таблицей TABLE из rows строк; заполнение идёт внутри SQLite."""
+    if os.path.exists(filename):
+        os.remove(filename)
+    conn = sqlite3.connect(filename, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        definitions = ", ".join(f"c{i + 1} {COLUMN_TYPES[kind.rstrip('?')]}" for i, kind in enumerate(columns))
+        conn.execute(f"CREATE TABLE {TABLE} (id INTEGER PRIMARY KEY, {definitions})")
+        values = ", ".join(_value_sql(kind, i, seed) for i, kind in enumerate(columns))
+        conn.execute("BEGIN")
+        conn.execute(
+            f"WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < ?) "
+            f"INSERT INTO {TABLE} SELECT x, {values} FROM n", (rows,)
+        )
+        if index:
+            conn.execute(f"CREATE INDEX {TABLE}_c1 ON {TABLE}(c1)")
+        conn.execute("COMMIT")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    except BaseException:
+        conn.close()
+        os.remove(filename)
+        raise
+    conn.close()
+
+
+def database_path(workdir: str, rows: int, columns: List[str], seed: int, index: bool) -> str:
+    name = "_".join(col.replace("?", "n") for col in columns)
+    return os.path.join(workdir, f"bench_{rows}_{name}_s{seed}{'_idx' if index else ''}.db")
+
+
+def _open(filename: str) -> DBManager:
+    db_manager = DBManager()
+    db_manager.open_database(filename)
+    db_manager.query_log.slow_ms = -1  # замеры не должны попадать в журнал медленных запросов
+    return db_manager
+
+
+class Bench:
+    """Выполняет операции и собирает время прогонов."""
+    def __init__(self, db_file: str, rows: int, repeat: int, scratch_dir: str) -> None:
+        self.db_file = db_file
+        self.rows = rows
+        self.repeat = repeat
+        self.scratch_dir = scratch_dir
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def measure(
+        self,
+        name: str,
+        fn: Callable[[], int],
+        setup: Optional[Callable[[], None]] = None
+    ) -> None:
+        """fn выполняется repeat раз и возвращает число обработанных строк; setup – до каждого прогона вне замера."""
+        runs = []
+        count = 0
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            count = fn()
+            runs.append(time.perf_counter() - started)
+        self.results[name] = {
+            "runs": runs,
+            "min": min(runs),
+            "median": statistics.median(runs),
+            "rows": count,
+        }
+        print(f"{name:16} {self.results[name]['median'] * 1000:10.1f} мс  строк: {count}", file=sys.stderr)
+
+    def skip(self, name: str, reason: str) -> None:
+        self.results[name] = {"skipped": reason}
+        print(f"{name:16} пропущено: {reason}", file=sys.stderr)
+
+    def run_core(self, pages: int, insert_rows: int, bulk_rows: int) -> None:
+        db_manager = _open(self.db_file)
+        try:
+            self._run_core(db_manager, pages, insert_rows, bulk_rows)
+        finally:
+            db_manager.close()
+
+    def _run_core(self, db_manager: DBManager, pages: int, insert_rows: int, bulk_rows: int) -> None:
+        def open_database() -> int:
+            other = _open(self.db_file)
+            try:
+                other.get_tables()
+                return len(other.get_table_info(TABLE))
+            finally:
+                other.close()
+        self.measure("open", open_database)
+
+        self.measure("browse", lambda: len(db_manager.get_rows_page(TABLE, None, PAGE_SIZE)))
+
+        def page(order_by: Optional[str]) -> int:
+            after = None
+            total = 0
+            for _ in range(pages):
+                rows = db_manager.get_rows_page(TABLE, after, PAGE_SIZE, order_by=order_by)
+                total += len(rows)
+                if len(rows) < PAGE_SIZE:
+                    break
+                after = (rows[-1][0],) if order_by is None else (rows[-1][2], rows[-1][0])
+            return total
+        self.measure("page", lambda: page(None))
+        self.measure("page_sorted", lambda: page("c1"))
+
+        if self.rows <= FULL_READ_LIMIT:
+            self.measure("get_table_rows", lambda: len(db_manager.get_table_rows(TABLE)))
+            self.measure("export_sql", lambda: db_manager.export_sql().count("\n") + 1)
+        else:
+            self.skip("get_table_rows", f"больше {FULL_READ_LIMIT} строк")
+            self.skip("export_sql", f"больше {FULL_READ_LIMIT} строк")
+
+        from exporter import export_table
+        export_file = os.path.join(self.scratch_dir, "export.csv")
+        self.measure("export", lambda: export_table(db_manager, TABLE, export_file, "csv"))
+        dump_file = os.path.join(self.scratch_dir, "dump.sql")
+        self.measure("dump", lambda: db_manager.dump_to_file(dump_file, [TABLE]))
+
+        # Запись – в отдельную базу с той же схемой, чтобы сгенерированная осталась неизменной
+        schema = db_manager.conn.execute(  # type: ignore[union-attr]
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (TABLE,)
+        ).fetchone()[0]
+        columns = [col[1] for col in db_manager.get_table_info(TABLE)][1:]
+        source = db_manager.conn.execute(  # type: ignore[union-attr]
+            f"SELECT {', '.join(map(quote_identifier, columns))} FROM {TABLE} LIMIT ?", (max(insert_rows, bulk_rows),)
+        ).fetchall()
+        scratch_file = os.path.join(self.scratch_dir, "scratch.db")
+        scratch: List[DBManager] = []
+
+        def new_scratch() -> None:
+            if scratch:
+                scratch.pop().close()
+            if os.path.exists(scratch_file):
+                os.remove(scratch_file)
+            scratch_manager = _open(scratch_file)
+            scratch_manager.conn.execute(schema)  # type: ignore[union-attr]
+            scratch.append(scratch_manager)
+
+        def insert_row() -> int:
+            for row in source[:insert_rows]:
+                scratch[0].insert_row(TABLE, columns, list(row))
+            return min(insert_rows, len(source))
+
+        try:
+            self.measure("insert_row", insert_row, new_scratch)
+            self.measure(
+                "bulk_insert", lambda: scratch[0].bulk_load(TABLE, columns, iter(source[:bulk_rows])), new_scratch
+            )
+        finally:
+            if scratch:
+                scratch.pop().close()
+
+    def run_qt(self, pages: int) -> None:
+        """Окно таблицы без экрана: открытие, прокрутка, сортировка, refresh_table."""
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication(sys.argv[:1])
+        from table_editor import TableEditorWindow
+
+        def wait(done: Callable[[], bool]) -> None:
+            deadline = time.perf_counter() + WAIT_TIMEOUT
+            while not done():
+                if time.perf_counter() > deadline:
+                    raise Exception("Окно таблицы не загрузило данные вовремя.")
+                app.processEvents()
+                time.sleep(0.001)
+
+        db_manager = _open(self.db_file)
+        editors: List[Any] = []
+        try:
+            def first_page_loaded() -> bool:
+                model = editors[-1].model
+                return model.rowCount() > 0 and not model.is_loading()
+
+            def open_editor() -> int:
+                editor = TableEditorWindow(None, db_manager, TABLE)
+                editors.append(editor)
+                editor.show()
+                wait(first_page_loaded)
+                return editor.model.rowCount()
+
+            def close_editors() -> None:
+                while editors:
+                    editor = editors.pop()
+                    editor.close()
+                    editor.deleteLater()
+                app.processEvents()
+            self.measure("qt_open", open_editor, close_editors)
+
+            def scroll() -> int:
+                editor = editors[-1]
+                target = pages * PAGE_SIZE
+                while editor.model.rowCount() < target and editor.model.canFetchMore():
+                    editor.table_view.scrollToBottom()
+                    wait(lambda: not editor.model.is_loading())
+                return editor.model.rowCount()
+
+            def fresh_editor() -> None:
+                close_editors()
+                open_editor()
+            self.measure("qt_scroll", scroll, fresh_editor)
+
+            def sort() -> int:
+                editor = editors[-1]
+                editor.table_view.sortByColumn(2, 0)  # c1, по возрастанию
+                wait(first_page_loaded)
+                return editor.model.rowCount()
+            self.measure("qt_sort", sort, fresh_editor)
+
+            def refresh() -> int:
+                editors[-1].refresh_table()
+                wait(first_page_loaded)
+                return editors[-1].model.rowCount()
+            self.measure("qt_refresh_table", refresh, fresh_editor)
+            close_editors()
+        finally:
+            db_manager.close()
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Сравнивает медианы с базовым результатом; печатает таблицу в stderr
+    и возвращает имена операций, замедлившихся больше чем на tolerance.
+    """
+    for key in ("rows", "columns"):
+        if baseline.get("params", {}).get(key) != results["params"].get(key):
+            print(f"Внимание: параметр {key} отличается от базового результата.", file=sys.stderr)
+    regressions = []
+    print(f"\n{'операция':16} {'база, мс':>10} {'сейчас, мс':>11} {'изменение':>10}", file=sys.stderr)
+    for name, current in results["operations"].items():
+        base = baseline.get("operations", {}).get(name)
+        if not base or "median" not in base or "median" not in current:
+            continue
+        ratio = current["median"] / base["median"] if base["median"] else 1.0
+        mark = ""
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            mark = "  замедление"
+        print(
+            f"{name:16} {base['median'] * 1000:10.1f} {current['median'] * 1000:11.1f} "
+            f"{(ratio - 1) * 100:+9.1f}%{mark}",
+            file=sys.stderr
+        )
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Замеры производительности на синтетической базе.")
+    parser.add_argument("--rows", type=int, default=100000, help="строк в таблице (10K–10M)")
+    parser.add_argument("--columns", default=DEFAULT_COLUMNS, help="типы столбцов: int, real, text, blob; '?' – с NULL")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--index", action="store_true", help="индекс по первому столбцу")
+    parser.add_argument("--repeat", type=int, default=3, help="прогонов каждой операции")
+    parser.add_argument("--pages", type=int, default=100, help="страниц для page, page_sorted и qt_scroll")
+    parser.add_argument("--insert-rows", type=int, default=1000, help="строк для insert_row (по одной)")
+    parser.add_argument("--bulk-rows", type=int, default=100000, help="строк для bulk_insert")
+    parser.add_argument("--qt", action="store_true", help="замерить и окно таблицы (QT_QPA_PLATFORM=offscreen)")
+    parser.add_argument(
+        "--workdir", default=os.path.join(tempfile.gettempdir(), "sql_editor_bench"),
+        help="каталог сгенерированных баз"
+    )
+    parser.add_argument("--regenerate", action="store_true", help="создать базу заново")
+    parser.add_argument("--output", help="файл для JSON с результатом (по умолчанию stdout)")
+    parser.add_argument("--baseline", help="JSON предыдущего запуска для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое замедление медианы (0.2 – 20%%)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        if args.repeat < 1 or args.rows < 1:
+            raise Exception("--rows и --repeat должны быть не меньше 1.")
+        columns = parse_columns(args.columns)
+        os.makedirs(args.workdir, exist_ok=True)
+        db_file = database_path(args.workdir, args.rows, columns, args.seed, args.index)
+        if args.regenerate or not os.path.exists(db_file):
+            started = time.perf_counter()
+            generate_database(db_file, args.rows, columns, args.seed, args.index)
+            print(f"База {db_file} создана за {time.perf_counter() - started:.1f} с", file=sys.stderr)
+
+        scratch_dir = tempfile.mkdtemp(prefix="sql_editor_bench_")
+        bench = Bench(db_file, args.rows, args.repeat, scratch_dir)
+        try:
+            bench.run_core(args.pages, args.insert_rows, args.bulk_rows)
+            if args.qt:
+                bench.run_qt(args.pages)
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+        results = {
+            "params": {
+                "rows": args.rows, "columns": columns, "seed": args.seed, "index": args.index,
+                "repeat": args.repeat, "pages": args.pages,
+                "insert_rows": args.insert_rows, "bulk_rows": args.bulk_rows,
+            },
+            "environment": {
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+            },
+            "operations": bench.results,
+        }
+        text = json.dumps(results, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+
+        if args.baseline:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+            regressions = compare(results, baseline, args.tolerance)
+            if regressions:
+                print(f"Замедление: {', '.join(regressions)}", file=sys.stderr)
+                return 1
+        return 0
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# blob_io.py
+import os
+from typing import Any, BinaryIO, Callable, Optional
+from profiling import format_size
+
+PREVIEW_BYTES = 16           # начальных байт BLOB для определения типа содержимого
+INLINE_PREVIEW_LIMIT = 4096  # BLOB не больше этого читаются в запросе целиком (substr); больше – через blobopen
+BLOB_CHUNK = 1024 * 1024     # байт за одно чтение или запись при потоковом копировании
+
+# Сигнатуры начала файлов распространённых форматов
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+    (b"%PDF", "PDF"),
+    (b"PK\x03\x04", "ZIP"),
+    (b"\x1f\x8b", "GZIP"),
+    (b"BM", "BMP"),
+    (b"SQLite format 3\x00", "SQLite"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "OLE"),
+    (b"II*\x00", "TIFF"),
+    (b"MM\x00*", "TIFF"),
+)
+
+
+def blob_kind(head: Optional[bytes]) -> str:
+    """Тип содержимого по первым байтам (PNG, JPEG, PDF, ...) или "BLOB"."""
+    if head:
+        for signature, kind in _SIGNATURES:
+            if head.startswith(signature):
+                return kind
+        if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+            return "WEBP"
+    return "BLOB"
+
+
+class BlobValue:
+    """
+    Значение BLOB, прочитанное без содержимого: размер и первые байты.
+    Содержимое читается по требованию (DBManager.read_blob, read_blob_to_file).
+    При записи строки столбец с неизменённым BlobValue не перезаписывается.
+    """
+    __slots__ = ("size", "head")
+
+    def __init__(self, size: int, head: Optional[bytes] = None) -> None:
+        self.size = size
+        self.head = head
+
+    @property
+    def kind(self) -> str:
+        return blob_kind(self.head)
+
+    def __str__(self) -> str:
+        return f"<{self.kind}, {format_size(self.size)}>"
+
+    __repr__ = __str__
+
+
+class BlobFile:
+    """Новое значение BLOB – содержимое файла; записывается в ячейку потоково при сохранении."""
+    __slots__ = ("path", "size")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.size = os.path.getsize(path)
+
+    def __str__(self) -> str:
+        return f"<файл {os.path.basename(self.path)}, {format_size(self.size)}>"
+
+    __repr__ = __str__
+
+
+def describe_value(value: Any) -> Any:
+    """Значение для показа в таблице: bytes – размер и тип, а не repr содержимого."""
+    if isinstance(value, (bytes, memoryview)):
+        return BlobValue(len(value), bytes(value[:PREVIEW_BYTES]))
+    return value
+
+
+def copy_file_to_blob(
+    f: BinaryIO, blob: Any, progress_callback: Optional[Callable[[int], None]] = None
+) -> int:
+    """Копирует файл в открытый sqlite3.Blob кусками BLOB_CHUNK. Возвращает число байт."""
+    total = 0
+    while True:
+        chunk = f.read(BLOB_CHUNK)
+        if not chunk:
+            break
+        blob.write(chunk)
+        total += len(chunk)
+        if progress_callback:
+            progress_callback(total)
+    return total
+
+
+def copy_blob_to_file(
+    blob: Any, f: BinaryIO, progress_callback: Optional[Callable[[int], None]] = None
+) -> int:
+    """Копирует открытый sqlite3.Blob в файл кусками BLOB_CHUNK. Возвращает число байт."""
+    total = 0
+    while True:
+        chunk = blob.read(BLOB_CHUNK)
+        if not chunk:
+            break
+        f.write(chunk)
+        total += len(chunk)
+        if progress_callback:
+            progress_callback(total)
+    return total
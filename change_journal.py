@@ -0,0 +1,90 @@
+# change_journal.py
+from collections import OrderedDict
+from typing import List, Any, Dict, Set, Tuple, Optional
+
+# Операция журнала: (вид, rowid, старые значения, новые значения)
+# вид – "insert", "update" или "delete"; у вставленных, но не сохранённых
+# строк временный отрицательный rowid
+Change = Tuple[str, int, Optional[List[Any]], Optional[List[Any]]]
+
+
+class ChangeJournal:
+    """
+    Журнал несохранённых правок таблицы с отменой и повтором.
+    Правки хранятся как последовательность операций; итоговое состояние
+    (state) – результат их применения по порядку, поэтому отмена любой
+    операции корректна и для строк, изменённых несколько раз.
+    """
+    def __init__(self) -> None:
+        self._done: List[Change] = []
+        self._undone: List[Change] = []
+        self._next_temp_id = -1
+
+    def insert(self, values: List[Any]) -> int:
+        """Добавляет новую строку и возвращает её временный rowid."""
+        temp_id = self._next_temp_id
+        self._next_temp_id -= 1
+        self._push(("insert", temp_id, None, list(values)))
+        return temp_id
+
+    def update(self, rowid: int, old_values: List[Any], new_values: List[Any]) -> None:
+        self._push(("update", rowid, list(old_values), list(new_values)))
+
+    def delete(self, rowid: int, old_values: List[Any]) -> None:
+        self._push(("delete", rowid, list(old_values), None))
+
+    def _push(self, change: Change) -> None:
+        self._done.append(change)
+        self._undone.clear()
+
+    def can_undo(self) -> bool:
+        return bool(self._done)
+
+    def can_redo(self) -> bool:
+        return bool(self._undone)
+
+    def undo(self) -> Optional[Change]:
+        if not self._done:
+            return None
+        change = self._done.pop()
+        self._undone.append(change)
+        return change
+
+    def redo(self) -> Optional[Change]:
+        if not self._undone:
+            return None
+        change = self._undone.pop()
+        self._done.append(change)
+        return change
+
+    def clear(self) -> None:
+        self._done.clear()
+        self._undone.clear()
+
+    def state(self) -> Tuple["OrderedDict[int, List[Any]]", Dict[int, List[Any]], Set[int]]:
+        """
+        Итог правок: (новые строки по временному rowid в порядке добавления,
+        новые значения существующих строк, удалённые существующие rowid).
+        Новые строки, удалённые до сохранения, в итог не попадают.
+        """
+        inserts: "OrderedDict[int, List[Any]]" = OrderedDict()
+        updates: Dict[int, List[Any]] = {}
+        deletes: Set[int] = set()
+        for kind, rowid, _, new_values in self._done:
+            if kind == "insert":
+                inserts[rowid] = new_values  # type: ignore[assignment]
+            elif kind == "update":
+                if rowid in inserts:
+                    inserts[rowid] = new_values  # type: ignore[assignment]
+                else:
+                    updates[rowid] = new_values  # type: ignore[assignment]
+            elif rowid in inserts:
+                del inserts[rowid]
+            else:
+                updates.pop(rowid, None)
+                deletes.add(rowid)
+        return inserts, updates, deletes
+
+    def pending_count(self) -> int:
+        inserts, updates, deletes = self.state()
+        return len(inserts) + len(updates) + len(deletes)
@@ -0,0 +1,88 @@
+# change_tracker.py
+from typing import Optional, Tuple
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from db_manager import DBManager
+
+POLL_INTERVAL_MS = 1000   # как часто проверять PRAGMA data_version на записи других процессов
+
+
+class ChangeTracker(QObject):
+    """
+    Уведомления об изменениях базы для открытых окон.
+    Изменения, сделанные самим приложением в отслеживаемых таблицах (watch),
+    приходят с rowid строк (DBManager.take_changes) сигналом rows_changed.
+    Записи других процессов и фоновых подключений обнаруживаются опросом
+    data_version по таймеру: для отслеживаемых таблиц приходит table_changed –
+    какие строки изменились, неизвестно. Изменение схемы – schema_changed.
+    Если за один опрос писали и приложение, и другой процесс, запись другого
+    процесса будет замечена только при следующем её изменении.
+    """
+    rows_changed = pyqtSignal(object, object)   # таблица, {"inserted", "updated", "deleted"}
+    table_changed = pyqtSignal(object)          # таблица, изменённые строки неизвестны
+    schema_changed = pyqtSignal()
+
+    def __init__(self, db_manager: DBManager, interval: int = POLL_INTERVAL_MS, parent=None) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.script_busy = False
+        self._version: Optional[Tuple[int, ...]] = None
+        self._local = 0
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.check)
+        self.timer.start()
+
+    def reset(self) -> None:
+        """Запоминает текущее состояние без уведомлений (после открытия другой базы)."""
+        self._version = None
+        self.check()
+
+    def watch(self, table_name: str) -> None:
+        try:
+            self.db_manager.track_table(table_name)
+        except Exception:
+            pass  # без отслеживания строк изменения придут как table_changed
+
+    def unwatch(self, table_name: str) -> None:
+        try:
+            self.db_manager.untrack_table(table_name)
+        except Exception:
+            pass
+
+    def set_script_busy(self, busy: bool) -> None:
+        """Подключение скриптов занято в другом потоке – его журнал изменений пока не читается."""
+        self.script_busy = busy
+        if not busy:
+            self.check()
+
+    def check(self) -> None:
+        if not self.db_manager.conn:
+            self._version = None
+            return
+        try:
+            version = self.db_manager.data_version()
+            changes = self.db_manager.take_changes(include_script=not self.script_busy)
+            local = self.db_manager.local_changes()
+        except Exception:
+            return  # база занята или закрывается – проверим в следующий раз
+        previous, self._version = self._version, version
+        previous_local, self._local = self._local, local
+        if previous is None:
+            return
+        for table_name, rows in changes.items():
+            if rows is None:
+                self.table_changed.emit(table_name)
+            else:
+                self.rows_changed.emit(table_name, rows)
+        if version == previous:
+            return
+        if version[1::2] != previous[1::2]:
+            self.schema_changed.emit()
+        if local == previous_local:
+            # Записал кто-то, кроме подключений приложения: строки неизвестны
+            for table_name in self.db_manager.tracked_tables():
+                if table_name not in changes:
+                    self.table_changed.emit(table_name)
+
+    def stop(self) -> None:
+        self.timer.stop()
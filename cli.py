@@ -0,0 +1,237 @@
+# cli.py
+"""
+Командная строка для пакетных заданий (cron, CI) без графического интерфейса.
+Использует тот же DBManager, что и приложение, и не импортирует Qt.
+
+    python -m cli run база.db скрипт.sql
+    python -m cli run база.db -c "SELECT count(*) FROM t"
+    python -m cli import база.db данные.csv.gz таблица --fast
+    python -m cli export база.db выгрузка.jsonl --table таблица
+    python -m cli dump база.db дамп.sql.gz
+    python -m cli time база.db "SELECT ..." --repeat 5
+"""
+import argparse
+import csv
+import sys
+import time
+from typing import List, Any, Dict, Optional
+from db_manager import DBManager, PROFILES, iter_statements, open_text
+from profiling import format_stat, short_sql
+from script_runner import ScriptRunner
+
+
+def _open(args: argparse.Namespace) -> DBManager:
+    db_manager = DBManager()
+    db_manager.open_database(args.database)
+    if args.profile:
+        db_manager.set_profile(args.profile)
+    for spec in args.attach or []:
+        alias, sep, filename = spec.partition("=")
+        if not sep:
+            raise Exception(f"Ожидается --attach псевдоним=файл: {spec}")
+        db_manager.attach_database(filename, alias, remember=False)
+    return db_manager
+
+
+def _read_chunks(filename: str):
+    # Скрипт читается блоками, а не целиком: подходит для больших файлов
+    f = sys.stdin if filename == "-" else open_text(filename)
+    try:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    """Выполняет команды по одной; результаты SELECT выводятся в stdout как TSV."""
+    db_manager = _open(args)
+    chunks = [args.command] if args.command is not None else _read_chunks(args.script)
+    writer = csv.writer(sys.stdout, delimiter="\t", lineterminator="\n")
+
+    def on_result(result: Dict[str, Any]) -> None:
+        if result["error"] is not None:
+            print(f"Команда {result['index']} ({short_sql(result['sql'])}): {result['error']}", file=sys.stderr)
+        elif args.timing:
+            print(f"-- {short_sql(result['sql'])}: {format_stat(result)}, строк: {result['rows']}", file=sys.stderr)
+
+    try:
+        runner = ScriptRunner(
+            db_manager.script_connection(), db_manager.query_log, "cli", not args.continue_on_error
+        )
+        results = runner.run(iter_statements(chunks), writer.writerow, writer.writerows, on_result)
+    finally:
+        db_manager.close()
+    return 1 if any(result["error"] is not None for result in results) else 0
+
+
+def cmd_import(args: argparse.Namespace) -> int:
+    from importer import import_file
+    db_manager = _open(args)
+    started = time.perf_counter()
+    try:
+        rows = import_file(
+            db_manager, args.file, args.table, args.format, not args.no_header,
+            fast=args.fast, defer_indexes=args.defer_indexes
+        )
+    finally:
+        db_manager.close()
+    print(f"Импортировано строк: {rows} за {time.perf_counter() - started:.2f} с", file=sys.stderr)
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    from exporter import export_query, export_table
+    db_manager = _open(args)
+    started = time.perf_counter()
+    try:
+        if args.table:
+            rows = export_table(db_manager, args.table, args.output, args.format)
+        else:
+            rows = export_query(db_manager, args.sql, args.output, fmt=args.format)
+    finally:
+        db_manager.close()
+    print(f"Выгружено строк: {rows} за {time.perf_counter() - started:.2f} с", file=sys.stderr)
+    return 0
+
+
+def cmd_dump(args: argparse.Namespace) -> int:
+    db_manager = _open(args)
+    started = time.perf_counter()
+    try:
+        statements = db_manager.dump_to_file(args.output, args.tables or None)
+    finally:
+        db_manager.close()
+    print(f"Записано команд: {statements} за {time.perf_counter() - started:.2f} с", file=sys.stderr)
+    return 0
+
+
+def cmd_restore(args: argparse.Namespace) -> int:
+    """Выполняет SQL-файл транзакциями по --batch команд; прерванное выполнение продолжается."""
+    from sql_file import run_sql_file
+    db_manager = _open(args)
+    last = [time.perf_counter(), 0, 0]
+
+    def on_progress(position: int, size: int, statements: int) -> None:
+        now = time.perf_counter()
+        if now - last[0] >= 1.0:
+            elapsed = now - last[0]
+            print(
+                f"{position * 100 // max(size, 1)}%: команд {statements} "
+                f"({(statements - last[2]) / elapsed:.0f} команд/с, "
+                f"{(position - last[1]) / elapsed / (1024 * 1024):.1f} МБ/с)",
+                file=sys.stderr
+            )
+            last[:] = [now, position, statements]
+
+    try:
+        result = run_sql_file(db_manager, args.file, args.batch, not args.no_resume, on_progress)
+    finally:
+        db_manager.close()
+    if result["resumed_from"]:
+        print(f"Продолжено с байта {result['resumed_from']}", file=sys.stderr)
+    print(
+        f"Выполнено команд: {result['statements']} за {result['seconds']:.2f} с "
+        f"({result['bytes'] / max(result['seconds'], 1e-6) / (1024 * 1024):.1f} МБ/с)",
+        file=sys.stderr
+    )
+    return 0
+
+
+def cmd_time(args: argparse.Namespace) -> int:
+    """Замеряет запрос repeat раз на подключении только для чтения."""
+    from query_plan import time_query
+    if args.repeat < 1:
+        raise Exception("--repeat должен быть не меньше 1.")
+    db_manager = _open(args)
+    try:
+        with db_manager.read_connection() as conn:
+            timings = []
+            for _ in range(args.repeat):
+                seconds, rows = time_query(conn, args.sql)
+                timings.append(seconds)
+                db_manager.query_log.record("cli", args.sql, seconds, rows)
+    finally:
+        db_manager.close()
+    timings.sort()
+    print(
+        f"строк: {rows}, мин: {timings[0] * 1000:.1f} мс, "
+        f"медиана: {timings[len(timings) // 2] * 1000:.1f} мс, макс: {timings[-1] * 1000:.1f} мс"
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Пакетная работа с базой SQLite.")
+    parser.add_argument("--profile", choices=list(PROFILES), help="профиль подключения (запоминается для файла)")
+    parser.add_argument(
+        "--attach", action="append", metavar="ALIAS=FILE",
+        help="подключить ещё одну базу (ATTACH) как схему ALIAS; можно повторять"
+    )
+    sub = parser.add_subparsers(dest="command_name", required=True)
+
+    run = sub.add_parser("run", help="выполнить SQL-скрипт")
+    run.add_argument("database")
+    run.add_argument("script", nargs="?", default="-", help="файл скрипта (*.gz допускается), '-' – stdin")
+    run.add_argument("-c", "--command", help="текст SQL вместо файла")
+    run.add_argument("-t", "--timing", action="store_true", help="выводить время каждой команды в stderr")
+    run.add_argument("-k", "--continue-on-error", action="store_true", help="не останавливаться на ошибках")
+    run.set_defaults(handler=cmd_run)
+
+    imp = sub.add_parser("import", help="импорт CSV/TSV/JSONL в таблицу")
+    imp.add_argument("database")
+    imp.add_argument("file")
+    imp.add_argument("table")
+    imp.add_argument("--format", choices=("csv", "tsv", "jsonl"))
+    imp.add_argument("--no-header", action="store_true")
+    imp.add_argument("--fast", action="store_true", help="synchronous=OFF на время загрузки")
+    imp.add_argument("--defer-indexes", action="store_true", help="пересоздать индексы после загрузки")
+    imp.set_defaults(handler=cmd_import)
+
+    exp = sub.add_parser("export", help="выгрузка таблицы или запроса в CSV/TSV/JSONL")
+    exp.add_argument("database")
+    exp.add_argument("output")
+    source = exp.add_mutually_exclusive_group(required=True)
+    source.add_argument("--table")
+    source.add_argument("--sql")
+    exp.add_argument("--format", choices=("csv", "tsv", "jsonl"))
+    exp.set_defaults(handler=cmd_export)
+
+    dump = sub.add_parser("dump", help="SQL-дамп базы (*.gz – со сжатием)")
+    dump.add_argument("database")
+    dump.add_argument("output")
+    dump.add_argument("--tables", nargs="*", help="только указанные таблицы")
+    dump.set_defaults(handler=cmd_dump)
+
+    restore = sub.add_parser("restore", help="выполнить SQL-файл или дамп (*.gz допускается) с продолжением")
+    restore.add_argument("database")
+    restore.add_argument("file")
+    restore.add_argument("--batch", type=int, default=1000, help="команд в одной транзакции")
+    restore.add_argument("--no-resume", action="store_true", help="начать сначала, не продолжая прерванное")
+    restore.set_defaults(handler=cmd_restore)
+
+    timing = sub.add_parser("time", help="замерить время запроса")
+    timing.add_argument("database")
+    timing.add_argument("sql")
+    timing.add_argument("--repeat", type=int, default=3)
+    timing.set_defaults(handler=cmd_time)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
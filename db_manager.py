@@ -1,6 +1,302 @@
 # db_manager.py
+import gzip
+import os
+import re
 import sqlite3
-from typing import List, Any
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import (
+    List, Any, Iterable, Iterator, Sequence, Tuple, Optional, Callable, TextIO, Dict, Set, TYPE_CHECKING
+)
+from blob_io import (
+    BlobValue, BlobFile, PREVIEW_BYTES, INLINE_PREVIEW_LIMIT, copy_blob_to_file, copy_file_to_blob
+)
+from pool import ReadPool, POOL_SIZE, read_only_uri
+from profiling import QueryLog
+from result_cache import ResultCache
+from script_runner import ScriptRunner, STATEMENT_CACHE_SIZE
+from settings import get_db_setting, set_db_setting, get_setting, set_setting
+
+if TYPE_CHECKING:
+    # concurrent.futures импортируется при первом submit(): пакетным заданиям
+    # (cli.py) он не нужен, а заметно замедляет запуск
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+DUMP_PROGRESS_EVERY = 5000   # команд дампа между вызовами обратного вызова прогресса
+LOAD_BATCH_SIZE = 10000      # строк в одном вызове executemany при массовой загрузке
+ROWID_CHUNK = 500            # rowid в одном запросе WHERE rowid IN (...)
+BACKUP_PAGES = 4096          # страниц за один шаг резервного копирования
+TRACK_ROWS_LIMIT = 10000     # изменённых строк таблицы, больше которых они не перечисляются поимённо
+CHANGES_TABLE = "_editor_changes"  # временная таблица журнала изменений отслеживаемых таблиц
+CHECKPOINT_TABLE = "_sql_file_checkpoint"  # позиция прерванного выполнения SQL-файла (sql_file)
+
+# Профили настройки подключения. journal_mode хранится в файле базы и меняется
+# только основным подключением; остальные параметры действуют на каждое подключение.
+# None – параметр не трогается.
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "safe": {
+        "journal_mode": None,
+        "synchronous": "FULL",
+        "cache_size": -2000,          # 2 МБ (значение SQLite по умолчанию)
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    "fast-read": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,         # 64 МБ
+        "mmap_size": 268435456,       # 256 МБ
+        "temp_store": "MEMORY",
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -262144,        # 256 МБ
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+}
+DEFAULT_PROFILE = "safe"
+CONNECTION_PRAGMAS = ("synchronous", "cache_size", "mmap_size", "temp_store")
+
+
+class OperationCancelled(Exception):
+    """Длительная операция прервана пользователем."""
+
+
+class TableName(str):
+    """
+    Имя таблицы подключённой (ATTACH) базы. Как строка – "схема.таблица" для показа
+    в списках; quote_identifier подставляет его в SQL как "схема"."таблица".
+    Таблицы основной базы передаются обычными строками.
+    """
+    schema: str
+    name: str
+
+    def __new__(cls, schema: str, name: str) -> "TableName":
+        obj = super().__new__(cls, f"{schema}.{name}")
+        obj.schema = schema
+        obj.name = name
+        return obj
+
+
+def quote_identifier(name: str) -> str:
+    """Экранирует имя таблицы или столбца для подстановки в SQL."""
+    if isinstance(name, TableName):
+        return quote_identifier(name.schema) + "." + quote_identifier(name.name)
+    return '"' + name.replace('"', '""') + '"'
+
+
+def split_table_name(table_name: str) -> Tuple[str, str]:
+    """(схема, имя таблицы): "main" для таблиц основной базы."""
+    if isinstance(table_name, TableName):
+        return table_name.schema, table_name.name
+    return "main", table_name
+
+
+def table_pragma(pragma: str, table_name: str) -> str:
+    """PRAGMA для таблицы или индекса с учётом схемы: PRAGMA "схема".pragma("имя")."""
+    schema, name = split_table_name(table_name)
+    prefix = "" if schema == "main" else quote_identifier(schema) + "."
+    return f"PRAGMA {prefix}{pragma}({quote_identifier(name)})"
+
+
+def internal_tables(conn: sqlite3.Connection) -> Set[str]:
+    """
+    Служебные таблицы основной базы: sqlite_*, теневые таблицы виртуальных
+    таблиц (FTS5 и т. п.) и CHECKPOINT_TABLE. Первые нельзя создавать командой
+    CREATE TABLE, последняя относится только к этой базе, поэтому в дамп они
+    отдельными таблицами не попадают.
+    """
+    names = {
+        name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND (name LIKE 'sqlite\\_%' ESCAPE '\\' OR name = ?)",
+            (CHECKPOINT_TABLE,)
+        )
+    }
+    try:
+        names.update(
+            name for _, name, kind, *_ in conn.execute("PRAGMA main.table_list") if kind == "shadow"
+        )
+    except sqlite3.OperationalError:
+        # SQLite до 3.37 без table_list: теневые таблицы – по префиксу имени виртуальной таблицы
+        virtual = [
+            name for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND sql LIKE 'CREATE VIRTUAL TABLE%'"
+            )
+        ]
+        for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'"):
+            if any(name.startswith(f"{table}_") for table in virtual):
+                names.add(name)
+    return names
+
+
+def iter_statements(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Разбивает поток текста SQL на отдельные завершённые команды.
+    Граница команды – ';', после которой sqlite3.complete_statement() подтверждает,
+    что точка с запятой не находится внутри строки, комментария или триггера.
+    """
+    buffer = ""
+    for chunk in chunks:
+        parts = chunk.split(";")
+        for i, part in enumerate(parts):
+            buffer += part
+            if i == len(parts) - 1:
+                break
+            buffer += ";"
+            if sqlite3.complete_statement(buffer):
+                statement = buffer.strip()
+                buffer = ""
+                if statement != ";":
+                    yield statement
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def coerce_value(text: str, col_type: str) -> Any:
+    """
+    Преобразует введённый текст к типу столбца: INTEGER -> int, REAL -> float,
+    остальное остаётся строкой; пустая строка – NULL.
+    При неверном формате числа бросает ValueError.
+    """
+    if text == "":
+        return None
+    col_type = (col_type or "TEXT").upper()
+    if col_type == "INTEGER":
+        return int(text)
+    if col_type == "REAL":
+        return float(text)
+    return text
+
+
+_FILTER_OPERATORS = (">=", "<=", "!=", "<>", "=", ">", "<")
+# Имя объекта в начале CREATE TABLE/INDEX – заменяется, когда объект создаётся в другой базе
+_CREATE_NAME_RE = re.compile(
+    r'^(\s*CREATE\s+(?:UNIQUE\s+)?(?:TABLE|INDEX)\s+(?:IF\s+NOT\s+EXISTS\s+)?)'
+    r'(?:"(?:[^"]|"")*"|\[[^\]]*\]|`[^`]*`|[^\s(]+)\s*',
+    re.IGNORECASE
+)
+
+
+def build_filter(column: str, col_type: str, text: str) -> Tuple[str, List[Any]]:
+    """
+    Превращает текст фильтра столбца в параметризованное условие WHERE.
+    ">10", "<=2.5", "=abc", "!=x" – сравнение (значение приводится к типу столбца,
+    чтобы SQLite мог использовать индекс); "NULL" / "!NULL" – IS [NOT] NULL;
+    остальное – поиск подстроки через LIKE.
+    """
+    col = quote_identifier(column)
+    text = text.strip()
+    if text.upper() == "NULL":
+        return f"{col} IS NULL", []
+    if text.upper() == "!NULL":
+        return f"{col} IS NOT NULL", []
+    for op in _FILTER_OPERATORS:
+        if text.startswith(op):
+            raw = text[len(op):].strip()
+            try:
+                value = coerce_value(raw, col_type)
+            except ValueError:
+                value = raw
+            return f"{col} {op} ?", [value]
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{col} LIKE ? ESCAPE '\\'", [f"%{escaped}%"]
+
+
+def _rename_created(create_sql: str, name: str) -> str:
+    """CREATE TABLE/INDEX с другим (например, схемно-квалифицированным) именем объекта."""
+    return _CREATE_NAME_RE.sub(lambda m: m.group(1) + quote_identifier(name) + " ", create_sql, count=1)
+
+
+def fts_table_name(table_name: str) -> str:
+    """Имя FTS5-таблицы полнотекстового индекса для таблицы."""
+    return f"{table_name}_fts"
+
+
+def open_text(filename: str, mode: str = "r", compress: Optional[bool] = None) -> TextIO:
+    """
+    Открывает текстовый файл в UTF-8; файлы *.gz (или при compress=True)
+    читаются и пишутся через gzip.
+    """
+    if compress is None:
+        compress = filename.endswith(".gz")
+    if compress:
+        return gzip.open(filename, mode + "t", encoding="utf-8")  # type: ignore[return-value]
+    return open(filename, mode, encoding="utf-8", newline="\n")
+
+
+def split_statements(script: str) -> List[str]:
+    """Возвращает список команд SQL-скрипта."""
+    return list(iter_statements([script]))
+
+
+# Тексты команд для пакетных операций кэшируются: одинаковый текст позволяет
+# sqlite3 повторно использовать уже скомпилированный оператор. typed=True –
+# таблица основной базы "a.b" и TableName("a", "b") дают разные команды.
+@lru_cache(maxsize=256, typed=True)
+def _insert_sql(table_name: str, columns: Tuple[str, ...]) -> str:
+    cols = ", ".join(quote_identifier(col) for col in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    return f"INSERT INTO {quote_identifier(table_name)} ({cols}) VALUES ({placeholders})"
+
+
+@lru_cache(maxsize=256, typed=True)
+def _update_sql(table_name: str, columns: Tuple[str, ...]) -> str:
+    set_clause = ", ".join(f"{quote_identifier(col)}=?" for col in columns)
+    return f"UPDATE {quote_identifier(table_name)} SET {set_clause} WHERE rowid=?"
+
+
+@lru_cache(maxsize=256, typed=True)
+def _delete_sql(table_name: str) -> str:
+    return f"DELETE FROM {quote_identifier(table_name)} WHERE rowid=?"
+
+
+@lru_cache(maxsize=256)
+def _blob_select(columns: Tuple[str, ...]) -> str:
+    """
+    Список выборки, в котором BLOB не читаются целиком: для каждого столбца
+    три значения – само значение (NULL для BLOB), длина BLOB (NULL для остальных
+    типов) и первые байты BLOB (только у небольших BLOB: substr загружает
+    значение целиком). typeof() и length() содержимое BLOB из файла базы
+    не загружают. Значения не склеиваются в текст, поэтому кодировка базы
+    (UTF-16) на них не влияет. Строки собирает обратно DBManager._wrap_blobs.
+    """
+    parts = []
+    for column in columns:
+        col = quote_identifier(column)
+        is_blob = f"typeof({col}) = 'blob'"
+        parts.append(
+            f"CASE WHEN {is_blob} THEN NULL ELSE {col} END, "
+            f"CASE WHEN {is_blob} THEN length({col}) END, "
+            f"CASE WHEN {is_blob} AND length({col}) <= {INLINE_PREVIEW_LIMIT} "
+            f"THEN substr({col}, 1, {PREVIEW_BYTES}) END"
+        )
+    return ", ".join(parts)
+
+
+def _tracking_triggers(table_name: str, number: int, has_rowid: bool) -> List[str]:
+    """
+    TEMP-триггеры, записывающие rowid вставленных, изменённых и удалённых строк
+    таблицы в temp.CHANGES_TABLE. У таблиц WITHOUT ROWID rowid нет –
+    записывается NULL (изменённые строки неизвестны).
+    """
+    table = quote_identifier(table_name)
+    tag = "'" + str(table_name).replace("'", "''") + "'"
+    new_rowid, old_rowid = ("NEW.rowid", "OLD.rowid") if has_rowid else ("NULL", "NULL")
+    log = f"INSERT INTO {CHANGES_TABLE} (tbl, rid, op)"
+    name = f"_editor_track_{number}"
+    moved = f"{log} SELECT {tag}, OLD.rowid, 'D' WHERE OLD.rowid IS NOT NEW.rowid; " if has_rowid else ""
+    return [
+        f"CREATE TEMP TRIGGER IF NOT EXISTS {name}_i AFTER INSERT ON {table} "
+        f"BEGIN {log} VALUES ({tag}, {new_rowid}, 'I'); END",
+        f"CREATE TEMP TRIGGER IF NOT EXISTS {name}_u AFTER UPDATE ON {table} "
+        f"BEGIN {moved}{log} VALUES ({tag}, {new_rowid}, 'U'); END",
+        f"CREATE TEMP TRIGGER IF NOT EXISTS {name}_d AFTER DELETE ON {table} "
+        f"BEGIN {log} VALUES ({tag}, {old_rowid}, 'D'); END",
+    ]
+
 
 class DBManager:
     """
@@ -9,16 +305,512 @@ class DBManager:
     def __init__(self) -> None:
         self.conn: sqlite3.Connection | None = None
         self.db_file: str | None = None
+        self._tx_depth = 0
+        self.profile = DEFAULT_PROFILE
+        # Основное подключение – единственный писатель; фоновые чтения идут через пул
+        self.read_pool: ReadPool | None = None
+        self._executor: "ThreadPoolExecutor | None" = None
+        self._script_conn: sqlite3.Connection | None = None
+        # Подключение только для чтения, по которому отслеживается версия данных
+        self._watcher: sqlite3.Connection | None = None
+        self._watcher_lock = threading.Lock()
+        # Отслеживаемые таблицы: имя -> (номер триггеров, число подписчиков)
+        self._tracked: Dict[str, Tuple[int, int]] = {}
+        self._track_number = 0
+        # Рабочее пространство: подключённые (ATTACH) базы, псевдоним -> файл.
+        # Подключаются ко всем соединениям: основному, пула, скриптов и фоновым
+        self.attached: Dict[str, str] = {}
+        # Кэш результатов читающих запросов консоли; включается настройкой result_cache
+        self.result_cache: ResultCache | None = None
+        # Статистика таблиц: имя -> (версия данных, статистика)
+        self._table_stats: Dict[str, Tuple[Tuple[int, ...], Dict[str, Any]]] = {}
+        # Замеры всех команд, выполняемых через DBManager (и фоновыми потоками приложения)
+        self.query_log = QueryLog()
+        self._reset_schema_cache()
 
     def new_database(self, filename: str) -> None:
         """Создаёт новую базу данных."""
-        self.conn = sqlite3.connect(filename)
-        self.db_file = filename
+        self._connect(filename)
 
     def open_database(self, filename: str) -> None:
         """Открывает существующую базу данных."""
-        self.conn = sqlite3.connect(filename)
+        self._connect(filename)
+
+    def _connect(self, filename: str) -> None:
+        conn = sqlite3.connect(filename)
+        profile = get_db_setting(filename, "profile", DEFAULT_PROFILE)
+        if profile not in PROFILES:
+            profile = DEFAULT_PROFILE
+        try:
+            self._apply_profile(conn, profile, main=True)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        self.close()
+        self.conn = conn
         self.db_file = filename
+        self.profile = profile
+        self._tx_depth = 0
+        self._reset_schema_cache()
+        self._table_stats = {}
+        self.read_pool = self._create_read_pool()
+        if get_setting("result_cache", False):
+            self.result_cache = ResultCache(self.data_version)
+        # Рабочее пространство восстанавливается; исчезнувшие файлы пропускаются
+        for alias, path in get_db_setting(filename, "attached", {}).items():
+            if os.path.exists(path):
+                try:
+                    self.attach_database(path, alias, remember=False)
+                except Exception:
+                    pass
+
+    def _create_read_pool(self) -> ReadPool:
+        def configure(conn: sqlite3.Connection) -> None:
+            self._apply_profile(conn, self.profile)
+            self._attach_all(conn, read_only=True)
+        return ReadPool(self.db_file, configure=configure)  # type: ignore[arg-type]
+
+    def _attach_all(self, conn: sqlite3.Connection, read_only: bool = False) -> None:
+        # Подключения только для чтения открыты как URI: базы подключаются с mode=ro
+        for alias, path in self.attached.items():
+            target = read_only_uri(path) if read_only else path
+            conn.execute(f"ATTACH DATABASE ? AS {quote_identifier(alias)}", (target,))
+
+    def attach_database(self, filename: str, alias: str | None = None, remember: bool = True) -> str:
+        """
+        Подключает базу к рабочему пространству (ATTACH) под псевдонимом
+        (по умолчанию – имя файла без расширения); remember – запомнить её
+        для текущей базы и подключать при следующем открытии.
+        Таблицы подключённой базы доступны как TableName(псевдоним, таблица) и в SQL
+        как псевдоним.таблица. Возвращает псевдоним.
+        """
+        if not self.conn or not self.db_file:
+            raise Exception("Нет подключения к базе данных.")
+        if alias is None:
+            alias = re.sub(r"\W", "_", os.path.splitext(os.path.basename(filename))[0]) or "db"
+        if alias.lower() in ("main", "temp") or alias in self.attached:
+            raise Exception(f"Псевдоним {alias} уже занят.")
+        if os.path.abspath(filename) == os.path.abspath(self.db_file) or \
+                os.path.abspath(filename) in map(os.path.abspath, self.attached.values()):
+            raise Exception(f"База {filename} уже открыта.")
+        if self.conn.in_transaction:
+            raise Exception("Нельзя подключить базу во время транзакции.")
+        self.conn.execute(f"ATTACH DATABASE ? AS {quote_identifier(alias)}", (filename,))
+        self.attached[alias] = filename
+        if remember:
+            self._remember_workspace()
+        self._workspace_changed()
+        return alias
+
+    def detach_database(self, alias: str) -> None:
+        """Отключает базу от рабочего пространства."""
+        if not self.conn or alias not in self.attached:
+            raise Exception(f"База {alias} не подключена.")
+        if self.conn.in_transaction:
+            raise Exception("Нельзя отключить базу во время транзакции.")
+        self.conn.execute(f"DETACH DATABASE {quote_identifier(alias)}")
+        del self.attached[alias]
+        self._remember_workspace()
+        self._workspace_changed()
+
+    def _remember_workspace(self) -> None:
+        set_db_setting(self.db_file, "attached", dict(self.attached))  # type: ignore[arg-type]
+
+    def _workspace_changed(self) -> None:
+        # Остальные подключения пересоздаются с новым набором баз при следующем обращении
+        if self._script_conn:
+            self._script_conn.close()
+            self._script_conn = None
+        with self._watcher_lock:
+            if self._watcher:
+                self._watcher.close()
+                self._watcher = None
+        if self.read_pool:
+            self.read_pool.close()
+        self.read_pool = self._create_read_pool()
+        if self.result_cache:
+            self.result_cache.clear()
+        self._reset_schema_cache()
+        self._table_stats = {}
+
+    def get_workspace_tables(self) -> List[str]:
+        """Таблицы основной базы и (как TableName) таблицы подключённых баз."""
+        tables = self.get_tables()
+        if not self.conn:
+            return tables
+        for alias in self.attached:
+            tables.extend(
+                TableName(alias, name) for (name,) in self.conn.execute(
+                    f"SELECT name FROM {quote_identifier(alias)}.sqlite_master WHERE type='table' ORDER BY name"
+                )
+            )
+        return tables
+
+    def table_ref(self, name: str) -> str:
+        """Имя из списка get_workspace_tables по его строковому виду."""
+        schema, _, table = name.partition(".")
+        if table and schema in self.attached and name not in self.get_tables():
+            return TableName(schema, table)
+        return name
+
+    def copy_table(
+        self,
+        source: str,
+        target_schema: str,
+        target_name: str | None = None,
+        conn: sqlite3.Connection | None = None
+    ) -> int:
+        """
+        Копирует строки таблицы в другую базу рабочего пространства одной командой
+        INSERT ... SELECT – данные не проходят через Python.
+        Если целевой таблицы нет, она создаётся по определению исходной;
+        если есть – копируются столбцы с совпадающими именами.
+        conn – подключение с правом записи (new_connection); по умолчанию основное.
+        Возвращает число скопированных строк.
+        """
+        conn = conn or self.conn
+        if not conn:
+            raise Exception("Нет подключения к базе данных.")
+        source_schema, source_table = split_table_name(source)
+        target: str = TableName(target_schema, target_name or source_table) if target_schema != "main" \
+            else (target_name or source_table)
+        if split_table_name(target) == (source_schema, source_table):
+            raise Exception("Таблица копируется сама в себя.")
+        source_columns = [col[1] for col in conn.execute(table_pragma("table_info", source))]
+        target_columns = [col[1] for col in conn.execute(table_pragma("table_info", target))]
+        started = conn.in_transaction
+        if not started:
+            conn.execute("BEGIN")
+        try:
+            if not target_columns:
+                create_sql = conn.execute(
+                    f"SELECT sql FROM {quote_identifier(source_schema)}.sqlite_master WHERE type='table' AND name=?",
+                    (source_table,)
+                ).fetchone()
+                if create_sql is None:
+                    raise Exception(f"Таблица {source} не найдена.")
+                conn.execute(_rename_created(create_sql[0], target))
+                target_columns = source_columns
+            columns = ", ".join(quote_identifier(col) for col in source_columns if col in target_columns)
+            if not columns:
+                raise Exception("У таблиц нет общих столбцов.")
+            sql = (
+                f"INSERT INTO {quote_identifier(target)} ({columns}) "
+                f"SELECT {columns} FROM {quote_identifier(source)}"
+            )
+            with self.query_log.measure(conn, "copy_table", sql) as stat:
+                stat["rows"] = conn.execute(sql).rowcount
+            if not started:
+                conn.commit()
+        except BaseException:
+            if not started and conn.in_transaction:
+                conn.rollback()
+            raise
+        return stat["rows"]
+
+    def close(self) -> None:
+        """Закрывает основное подключение и пул подключений для чтения."""
+        if self._script_conn:
+            self._script_conn.close()
+            self._script_conn = None
+        if self._watcher:
+            self._watcher.close()
+            self._watcher = None
+        self.attached = {}
+        self._tracked = {}
+        if self.result_cache:
+            self.result_cache.close()
+            self.result_cache = None
+        if self.read_pool:
+            self.read_pool.close()
+            self.read_pool = None
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+        self.db_file = None
+
+    @contextmanager
+    def read_connection(self) -> Iterator[sqlite3.Connection]:
+        """Подключение только для чтения из пула; можно использовать в любом потоке."""
+        if not self.read_pool:
+            raise Exception("Нет подключения к базе данных.")
+        with self.read_pool.connection() as conn:
+            yield conn
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> "Future":
+        """
+        Выполняет fn(conn, *args) в фоновом пуле потоков на подключении только
+        для чтения и возвращает Future с результатом.
+        """
+        if not self.read_pool:
+            raise Exception("Нет подключения к базе данных.")
+        pool = self.read_pool
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="db-read")
+
+        def task() -> Any:
+            with pool.connection() as conn:
+                return fn(conn, *args)
+        return self._executor.submit(task)
+
+    @staticmethod
+    def _apply_profile(conn: sqlite3.Connection, profile: str, main: bool = False) -> None:
+        settings = PROFILES[profile]
+        if main and settings["journal_mode"]:
+            conn.execute(f"PRAGMA journal_mode={settings['journal_mode']}")
+        for name in CONNECTION_PRAGMAS:
+            if settings[name] is not None:
+                conn.execute(f"PRAGMA {name}={settings[name]}")
+
+    def set_profile(self, profile: str) -> None:
+        """Применяет профиль к текущей базе и запоминает его для этого файла."""
+        if not self.conn or not self.db_file:
+            raise Exception("Нет подключения к базе данных.")
+        if profile not in PROFILES:
+            raise Exception(f"Неизвестный профиль: {profile}")
+        self._apply_profile(self.conn, profile, main=True)
+        if self._script_conn:
+            self._apply_profile(self._script_conn, profile)
+        self.profile = profile
+        set_db_setting(self.db_file, "profile", profile)
+
+    def data_version(self) -> Tuple[int, ...]:
+        """
+        Версия данных и схемы: (PRAGMA data_version, PRAGMA schema_version) основной
+        базы, а за ними – такие же пары подключённых баз.
+        Читается на отдельном подключении, которое само ничего не пишет, поэтому
+        data_version на нём меняется при любой фиксации изменений в файле,
+        в том числе из этого же приложения. Можно вызывать из любого потока.
+        """
+        if not self.db_file:
+            raise Exception("Нет подключения к базе данных.")
+        with self._watcher_lock:
+            if self._watcher is None:
+                self._watcher = sqlite3.connect(read_only_uri(self.db_file), uri=True, check_same_thread=False)
+                self._attach_all(self._watcher, read_only=True)
+            version: List[int] = []
+            for schema in ["main", *self.attached]:
+                prefix = "" if schema == "main" else quote_identifier(schema) + "."
+                version.append(self._watcher.execute(f"PRAGMA {prefix}data_version").fetchone()[0])
+                version.append(self._watcher.execute(f"PRAGMA {prefix}schema_version").fetchone()[0])
+        return tuple(version)
+
+    def track_table(self, table_name: str) -> None:
+        """
+        Начинает отслеживать изменения строк таблицы, сделанные этим приложением:
+        TEMP-триггеры на основном подключении и подключении скриптов записывают
+        rowid изменённых строк, take_changes() их забирает. Вызовы считаются –
+        отслеживание снимается после стольких же untrack_table().
+        """
+        if not self.conn:
+            raise Exception("Нет подключения к базе данных.")
+        number, refs = self._tracked.get(table_name, (0, 0))
+        if refs == 0:
+            self._track_number += 1
+            number = self._track_number
+        self._tracked[table_name] = (number, refs + 1)
+        if refs == 0:
+            for conn in self._tracking_connections():
+                self._install_tracking(conn, table_name)
+
+    def untrack_table(self, table_name: str) -> None:
+        number, refs = self._tracked.get(table_name, (0, 0))
+        if refs > 1:
+            self._tracked[table_name] = (number, refs - 1)
+            return
+        if refs == 0:
+            return
+        del self._tracked[table_name]
+        for conn in self._tracking_connections():
+            for suffix in ("i", "u", "d"):
+                conn.execute(f"DROP TRIGGER IF EXISTS temp._editor_track_{number}_{suffix}")
+
+    def tracked_tables(self) -> List[str]:
+        return list(self._tracked)
+
+    def _tracking_connections(self) -> List[sqlite3.Connection]:
+        # Подключения, через которые пишет само приложение; фоновые (new_connection)
+        # не отслеживаются – их записи видны только по data_version
+        return [conn for conn in (self.conn, self._script_conn) if conn is not None]
+
+    def _install_tracking(self, conn: sqlite3.Connection, table_name: str) -> None:
+        conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {CHANGES_TABLE} (tbl TEXT, rid INTEGER, op TEXT)")
+        try:
+            conn.execute(f"SELECT rowid FROM {quote_identifier(table_name)} LIMIT 0")
+            has_rowid = True
+        except sqlite3.OperationalError:
+            has_rowid = False
+        for sql in _tracking_triggers(table_name, self._tracked[table_name][0], has_rowid):
+            conn.execute(sql)
+
+    def take_changes(self, include_script: bool = True) -> Dict[str, Dict[str, Set[int]] | None]:
+        """
+        Забирает накопленные изменения отслеживаемых таблиц (см. track_table):
+        имя таблицы -> {"inserted", "updated", "deleted"} – множества rowid;
+        None – изменённые строки неизвестны (таблица WITHOUT ROWID или изменено
+        больше TRACK_ROWS_LIMIT строк). Незафиксированные изменения не забираются.
+        include_script=False – не трогать подключение скриптов (оно занято в другом потоке).
+        """
+        connections = self._tracking_connections() if include_script else [self.conn]
+        names = {str(table_name): table_name for table_name in self._tracked}
+        result: Dict[str, Dict[str, Set[int]] | None] = {}
+        for conn in connections:
+            if conn is None or conn.in_transaction or not self._tracked:
+                continue
+            try:
+                counts = conn.execute(
+                    f"SELECT tbl, count(*), count(rid) FROM temp.{CHANGES_TABLE} GROUP BY tbl"
+                ).fetchall()
+            except sqlite3.OperationalError:
+                continue  # на подключении ещё не было отслеживания
+            if not counts:
+                continue
+            for tag, total, with_rowid in counts:
+                table_name = names.get(tag)
+                if table_name is None:
+                    continue
+                if total > TRACK_ROWS_LIMIT or with_rowid < total or \
+                        (table_name in result and result[table_name] is None):
+                    result[table_name] = None
+                    continue
+                changes = result.setdefault(table_name, {"inserted": set(), "updated": set(), "deleted": set()})
+                inserted, updated, deleted = changes["inserted"], changes["updated"], changes["deleted"]  # type: ignore[index]
+                # Операции сворачиваются по порядку: вставка и удаление одной строки
+                # взаимно уничтожаются, изменение новой строки остаётся вставкой
+                for rid, op in conn.execute(
+                    f"SELECT rid, op FROM temp.{CHANGES_TABLE} WHERE tbl = ? ORDER BY rowid", (tag,)
+                ):
+                    if op == "I":
+                        if rid in deleted:
+                            deleted.discard(rid)
+                            updated.add(rid)
+                        else:
+                            inserted.add(rid)
+                    elif op == "U":
+                        if rid not in inserted:
+                            updated.add(rid)
+                    elif rid in inserted:
+                        inserted.discard(rid)
+                    else:
+                        updated.discard(rid)
+                        deleted.add(rid)
+            conn.execute(f"DELETE FROM temp.{CHANGES_TABLE}")
+            if conn.in_transaction:
+                conn.commit()
+        return result
+
+    def local_changes(self) -> int:
+        """
+        Счётчик строк, изменённых подключениями приложения (total_changes):
+        если data_version изменилась, а этот счётчик нет – писал кто-то другой.
+        """
+        return sum(conn.total_changes for conn in self._tracking_connections())
+
+    def set_result_cache(self, enabled: bool) -> None:
+        """Включает или выключает кэш результатов запросов и запоминает выбор."""
+        set_setting("result_cache", enabled)
+        if not enabled and self.result_cache:
+            self.result_cache.close()
+            self.result_cache = None
+        elif enabled and not self.result_cache and self.db_file:
+            self.result_cache = ResultCache(self.data_version)
+
+    def get_table_stats(self, table_name: str, conn: sqlite3.Connection | None = None) -> Dict[str, Any]:
+        """
+        Статистика таблицы (table_stats.table_stats): размер по dbstat, индексы,
+        сводка по столбцам. Результат кэшируется, пока не изменится data_version.
+        conn – подключение для чтения (из пула); по умолчанию основное.
+        """
+        from table_stats import table_stats
+        if not self.conn:
+            raise Exception("Нет подключения к базе данных.")
+        # Версия берётся до подсчёта: изменения во время подсчёта сделают запись устаревшей
+        token = self.data_version()
+        cached = self._table_stats.get(table_name)
+        if cached is not None and cached[0] == token:
+            return cached[1]
+        stats = table_stats(conn or self.conn, table_name)
+        self._table_stats[table_name] = (token, stats)
+        return stats
+
+    def cached_table_stats(self, table_name: str) -> Dict[str, Any] | None:
+        """Статистика из кэша, если данные с момента подсчёта не менялись."""
+        cached = self._table_stats.get(table_name)
+        if cached is None or not self.db_file or cached[0] != self.data_version():
+            return None
+        return cached[1]
+
+    def get_pragmas(self) -> Dict[str, Any]:
+        """Текущие значения параметров, которыми управляют профили."""
+        if not self.conn:
+            return {}
+        return {
+            name: self.conn.execute(f"PRAGMA {name}").fetchone()[0]
+            for name in ("journal_mode",) + CONNECTION_PRAGMAS
+        }
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Выполняет блок в одной транзакции с фиксацией в конце.
+        Вложенные вызовы оформляются точками сохранения (SAVEPOINT), поэтому
+        пакетные методы можно объединять в общую транзакцию.
+        """
+        if not self.conn:
+            raise Exception("Нет подключения к базе данных.")
+        conn = self.conn
+        depth = self._tx_depth
+        savepoint = f"sp_{depth}"
+        if depth == 0:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+        else:
+            conn.execute(f"SAVEPOINT {savepoint}")
+        self._tx_depth += 1
+        try:
+            yield conn
+        except BaseException:
+            self._tx_depth = depth
+            if depth == 0:
+                conn.rollback()
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+        self._tx_depth = depth
+        if depth == 0:
+            conn.commit()
+        else:
+            conn.execute(f"RELEASE {savepoint}")
+
+    def new_connection(self, **kwargs: Any) -> sqlite3.Connection:
+        """
+        Открывает отдельное подключение к текущему файлу базы.
+        Используется фоновыми потоками: подключение нужно создавать в том потоке,
+        где оно будет использоваться.
+        """
+        if not self.db_file:
+            raise Exception("Нет подключения к базе данных.")
+        conn = sqlite3.connect(self.db_file, **kwargs)
+        self._apply_profile(conn, self.profile)
+        self._attach_all(conn)
+        return conn
+
+    def script_connection(self) -> sqlite3.Connection:
+        """
+        Постоянное подключение для выполнения скриптов из консоли (автокоммит).
+        Живёт до закрытия базы, поэтому кэш скомпилированных команд
+        (cached_statements) сохраняется между повторными запусками скрипта.
+        Может использоваться из любого потока, но только одним одновременно.
+        """
+        if self._script_conn is None:
+            self._script_conn = self.new_connection(
+                isolation_level=None, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+            )
+            for table_name in self._tracked:
+                self._install_tracking(self._script_conn, table_name)
+        return self._script_conn
 
     def export_sql(self) -> str:
         """Возвращает SQL-дамп базы данных."""
@@ -26,29 +818,320 @@ class DBManager:
             raise Exception("Нет подключения к базе данных.")
         return "\n".join(self.conn.iterdump())
 
-    def execute_script(self, script: str) -> None:
-        """Выполняет SQL‑скрипт (возможно, содержащий несколько команд)."""
+    def iter_dump(self, conn: sqlite3.Connection, tables: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Построчно выдаёт SQL-дамп. Без списка таблиц – полный дамп через iterdump(),
+        иначе только указанные таблицы с их данными, индексами и триггерами.
+        Служебные таблицы (internal_tables) пропускаются; счётчики AUTOINCREMENT
+        и статистика ANALYZE выбранных таблиц, как в iterdump(), пишутся
+        строками DELETE/INSERT в sqlite_sequence и sqlite_stat1.
+        """
+        if tables is None:
+            # Позиция прерванного выполнения SQL-файла в другую базу не переносится
+            skipped = (
+                f"CREATE TABLE {CHECKPOINT_TABLE} ", f"CREATE TABLE {quote_identifier(CHECKPOINT_TABLE)} ",
+                f'INSERT INTO "{CHECKPOINT_TABLE}" '
+            )
+            for line in conn.iterdump():
+                if not line.startswith(skipped):
+                    yield line
+            return
+        yield "BEGIN TRANSACTION;"
+        internal = internal_tables(conn)
+        has_sequence = "sqlite_sequence" in internal
+        has_stat = "sqlite_stat1" in internal
+        stat_created = False
+        for name in tables:
+            if name in internal:
+                continue
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (name,)
+            ).fetchone()
+            if row is None:
+                continue
+            yield f"{row[0]};"
+            table = quote_identifier(name)
+            columns = [col[1] for col in conn.execute(f"PRAGMA table_info({table})")]
+            values = "||','||".join(f"quote({quote_identifier(col)})" for col in columns)
+            prefix = f"INSERT INTO {table} VALUES(".replace("'", "''")
+            cur = conn.execute(f"SELECT '{prefix}'||{values}||');' FROM {table}")
+            for (statement,) in cur:
+                yield statement
+            if has_sequence:
+                seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (name,)).fetchone()
+                if seq is not None:
+                    literal = name.replace("'", "''")
+                    yield f"DELETE FROM \"sqlite_sequence\" WHERE name='{literal}';"
+                    yield f"INSERT INTO \"sqlite_sequence\" VALUES('{literal}',{seq[0]});"
+            if has_stat:
+                stats = conn.execute(
+                    "SELECT 'INSERT INTO \"sqlite_stat1\" VALUES('||quote(tbl)||','||quote(idx)||','||quote(stat)||');' "
+                    "FROM sqlite_stat1 WHERE tbl=?", (name,)
+                ).fetchall()
+                if stats:
+                    if not stat_created:
+                        # Создаёт sqlite_stat1 в восстановленной базе, как iterdump()
+                        yield "ANALYZE sqlite_master;"
+                        stat_created = True
+                    literal = name.replace("'", "''")
+                    yield f"DELETE FROM \"sqlite_stat1\" WHERE tbl='{literal}';"
+                    for (statement,) in stats:
+                        yield statement
+            cur = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') "
+                "AND tbl_name=? AND sql IS NOT NULL", (name,)
+            )
+            for (sql,) in cur:
+                yield f"{sql};"
+        yield "COMMIT;"
+
+    def backup_to_file(
+        self,
+        filename: str,
+        pages: int = BACKUP_PAGES,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """
+        Копирует базу в файл через Connection.backup по pages страниц за шаг
+        на собственном подключении (подходит для фонового потока).
+        В режиме WAL копия снимается с одного снимка данных в открытой транзакции
+        чтения: писатели не блокируются, а копирование не начинается заново при
+        их изменениях. В других режимах SQLite перезапускает копирование, если
+        базу изменило другое подключение.
+        progress_callback(скопировано страниц, всего страниц) может бросить
+        OperationCancelled – тогда копирование прерывается и файл удаляется.
+        Возвращает число страниц.
+        """
+        if not self.db_file:
+            raise Exception("Нет подключения к базе данных.")
+        if os.path.abspath(filename) == os.path.abspath(self.db_file):
+            raise Exception("Нельзя сохранить копию поверх открытой базы.")
+        total = 0
+
+        def on_progress(status: int, remaining: int, page_count: int) -> None:
+            nonlocal total
+            total = page_count
+            if progress_callback:
+                progress_callback(page_count - remaining, page_count)
+
+        src = self.new_connection(isolation_level=None)
+        try:
+            if os.path.exists(filename):
+                os.remove(filename)
+            dst = sqlite3.connect(filename)
+            try:
+                if src.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal":
+                    src.execute("BEGIN")
+                    src.execute("SELECT count(*) FROM sqlite_master").fetchone()
+                with self.query_log.measure(src, "backup", f"backup -> {filename}") as stat:
+                    src.backup(dst, pages=pages, progress=on_progress)
+                    stat["rows"] = total
+            finally:
+                dst.close()
+        except BaseException:
+            if os.path.exists(filename):
+                os.remove(filename)
+            raise
+        finally:
+            if src.in_transaction:
+                src.rollback()
+            src.close()
+        return total
+
+    def dump_to_file(
+        self,
+        filename: str,
+        tables: Optional[List[str]] = None,
+        compress: Optional[bool] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """
+        Записывает SQL-дамп прямо в файл, не собирая его в памяти.
+        Читает через подключение из пула, поэтому может выполняться в фоновом потоке.
+        progress_callback(символов, команд) вызывается периодически; если он бросает
+        OperationCancelled, недописанный файл удаляется.
+        Возвращает число записанных команд.
+        """
+        written = 0
+        statements = 0
+        try:
+            with self.read_connection() as conn, open_text(filename, "w", compress) as f:
+                for line in self.iter_dump(conn, tables):
+                    f.write(line)
+                    f.write("\n")
+                    written += len(line) + 1
+                    statements += 1
+                    if progress_callback and statements % DUMP_PROGRESS_EVERY == 0:
+                        progress_callback(written, statements)
+            if progress_callback:
+                progress_callback(written, statements)
+        except BaseException:
+            if os.path.exists(filename):
+                os.remove(filename)
+            raise
+        return statements
+
+    def bulk_load(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: Iterable[Sequence[Any]],
+        fast: bool = False,
+        defer_indexes: bool = False,
+        batch_size: int = LOAD_BATCH_SIZE,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """
+        Массовая загрузка строк пачками executemany в одной транзакции на собственном
+        подключении (подходит для фонового потока).
+        fast – PRAGMA synchronous=OFF и journal_mode=MEMORY на время загрузки
+        (режим WAL не меняется); defer_indexes – индексы таблицы удаляются
+        перед загрузкой и создаются заново после неё.
+        progress_callback(строк загружено) вызывается после каждой пачки; при ошибке
+        или OperationCancelled транзакция откатывается целиком, вместе с индексами.
+        Возвращает число загруженных строк.
+        """
+        sql = _insert_sql(table_name, tuple(columns))
+        conn = self.new_connection(isolation_level=None)
+        total = 0
+        try:
+            if fast:
+                conn.execute("PRAGMA synchronous=OFF")
+                if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+                    conn.execute("PRAGMA journal_mode=MEMORY")
+            conn.execute("BEGIN")
+            indexes = []
+            schema, name = split_table_name(table_name)
+            if defer_indexes:
+                indexes = conn.execute(
+                    f"SELECT name, sql FROM {quote_identifier(schema)}.sqlite_master WHERE type='index' "
+                    "AND tbl_name=? AND sql IS NOT NULL", (name,)
+                ).fetchall()
+                for index_name, _ in indexes:
+                    conn.execute(f"DROP INDEX {quote_identifier(TableName(schema, index_name))}")
+            with self.query_log.measure(conn, "bulk_load", sql) as stat:
+                batch: List[Sequence[Any]] = []
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        conn.executemany(sql, batch)
+                        total += len(batch)
+                        stat["rows"] = total
+                        batch = []
+                        if progress_callback:
+                            progress_callback(total)
+                if batch:
+                    conn.executemany(sql, batch)
+                    total += len(batch)
+                    stat["rows"] = total
+                for index_name, index_sql in indexes:
+                    if schema != "main":
+                        index_sql = _rename_created(index_sql, TableName(schema, index_name))
+                    conn.execute(index_sql)
+            conn.execute("COMMIT")
+            if progress_callback:
+                progress_callback(total)
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return total
+
+    def execute_script(self, script: str, stop_on_error: bool = True) -> List[Dict[str, Any]]:
+        """
+        Выполняет SQL‑скрипт по одной команде (см. ScriptRunner) и возвращает
+        результаты команд. При stop_on_error ошибка прерывает скрипт и бросается
+        исключением с номером команды.
+        """
         if not self.conn:
             raise Exception("Нет подключения к базе данных.")
-        cur = self.conn.cursor()
-        cur.executescript(script)
-        self.conn.commit()
+        runner = ScriptRunner(self.conn, self.query_log, "execute_script", stop_on_error)
+        results = runner.run(iter_statements([script]))
+        if stop_on_error and results and results[-1]["error"] is not None:
+            raise Exception(f"Команда {results[-1]['index']}: {results[-1]['error']}")
+        return results
+
+    def _reset_schema_cache(self) -> None:
+        self._schema_version: Tuple[int, ...] | None = None
+        self._schema: Dict[str, List[Tuple[str, str, str | None]]] = {}
+        self._table_info: Dict[str, List[Any]] = {}
+
+    def schema_version(self) -> int:
+        """PRAGMA schema_version: меняется при любом изменении схемы, в том числе из других подключений."""
+        if not self.conn:
+            raise Exception("Нет подключения к базе данных.")
+        return self.conn.execute("PRAGMA schema_version").fetchone()[0]
+
+    def _check_schema(self) -> None:
+        # Кэш схемы сбрасывается только при изменении schema_version (любой из баз)
+        version = (self.schema_version(),) + tuple(
+            self.conn.execute(f"PRAGMA {quote_identifier(alias)}.schema_version").fetchone()[0]  # type: ignore[union-attr]
+            for alias in self.attached
+        )
+        if version == self._schema_version:
+            return
+        schema: Dict[str, List[Tuple[str, str, str | None]]] = {
+            "table": [], "view": [], "index": [], "trigger": []
+        }
+        cur = self.conn.execute("SELECT type, name, tbl_name, sql FROM sqlite_master")  # type: ignore[union-attr]
+        for obj_type, name, tbl_name, sql in cur:
+            schema.setdefault(obj_type, []).append((name, tbl_name, sql))
+        self._schema = schema
+        self._table_info = {}
+        self._schema_version = version
+
+    def get_schema(self) -> Dict[str, List[Tuple[str, str, str | None]]]:
+        """
+        Возвращает объекты схемы по типам ('table', 'view', 'index', 'trigger'):
+        списки кортежей (name, tbl_name, sql). Результат кэшируется до изменения схемы.
+        """
+        if not self.conn:
+            return {}
+        self._check_schema()
+        return self._schema
 
     def get_tables(self) -> List[str]:
-        """Возвращает список таблиц в базе данных."""
+        """Возвращает список таблиц в базе данных (без служебной CHECKPOINT_TABLE)."""
         if not self.conn:
             return []
-        cur = self.conn.cursor()
-        cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        return [row[0] for row in cur.fetchall()]
+        return [name for name, _, _ in self.get_schema().get("table", []) if name != CHECKPOINT_TABLE]
+
+    def get_dump_tables(self) -> List[str]:
+        """Таблицы основной базы, которые можно выбрать для дампа (без служебных)."""
+        if not self.conn:
+            return []
+        internal = internal_tables(self.conn)
+        return [name for name in self.get_tables() if name not in internal]
+
+    def get_views(self) -> List[str]:
+        """Возвращает список представлений."""
+        return [name for name, _, _ in self.get_schema().get("view", [])]
+
+    def get_indexes(self, table_name: str | None = None) -> List[Tuple[str, str, str | None]]:
+        """Возвращает индексы (name, tbl_name, sql), при необходимости – только одной таблицы."""
+        return [
+            index for index in self.get_schema().get("index", [])
+            if table_name is None or index[1] == table_name
+        ]
+
+    def get_triggers(self, table_name: str | None = None) -> List[Tuple[str, str, str | None]]:
+        """Возвращает триггеры (name, tbl_name, sql), при необходимости – только одной таблицы."""
+        return [
+            trigger for trigger in self.get_schema().get("trigger", [])
+            if table_name is None or trigger[1] == table_name
+        ]
 
     def drop_table(self, table_name: str) -> None:
         """Удаляет таблицу из базы данных."""
         if not self.conn:
             raise Exception("Нет подключения к базе данных.")
-        cur = self.conn.cursor()
-        cur.execute(f"DROP TABLE {table_name}")
-        self.conn.commit()
+        sql = f"DROP TABLE {quote_identifier(table_name)}"
+        with self.query_log.measure(self.conn, "drop_table", sql):
+            cur = self.conn.cursor()
+            cur.execute(sql)
+            self.conn.commit()
 
     def get_table_info(self, table_name: str) -> List[Any]:
         """
@@ -57,44 +1140,380 @@ class DBManager:
         """
         if not self.conn:
             raise Exception("Нет подключения к базе данных.")
-        cur = self.conn.cursor()
-        cur.execute(f"PRAGMA table_info({table_name})")
-        return cur.fetchall()
+        self._check_schema()
+        info = self._table_info.get(table_name)
+        if info is None:
+            cur = self.conn.cursor()
+            cur.execute(table_pragma("table_info", table_name))
+            info = self._table_info[table_name] = cur.fetchall()
+        return info
 
     def get_table_rows(self, table_name: str) -> List[Any]:
         """Возвращает все строки таблицы с использованием rowid."""
         if not self.conn:
             raise Exception("Нет подключения к базе данных.")
-        cur = self.conn.cursor()
-        cur.execute(f"SELECT rowid, * FROM {table_name}")
-        return cur.fetchall()
+        sql = f"SELECT rowid, * FROM {table_name}"
+        with self.query_log.measure(self.conn, "get_table_rows", sql) as stat:
+            cur = self.conn.cursor()
+            cur.execute(sql)
+            rows = cur.fetchall()
+            stat["rows"] = len(rows)
+        return rows
+
+    def get_rows_after(
+        self, table_name: str, after_rowid: int | None, limit: int,
+        conn: sqlite3.Connection | None = None
+    ) -> List[Any]:
+        """
+        Возвращает до limit строк таблицы (rowid, *) с rowid больше after_rowid.
+        Keyset-пагинация: стоимость запроса не зависит от номера страницы.
+        conn – подключение для чтения (из пула); по умолчанию основное.
+        """
+        after = None if after_rowid is None else (after_rowid,)
+        return self.get_rows_page(table_name, after, limit, conn)
+
+    def get_rows_page(
+        self,
+        table_name: str,
+        after: Tuple[Any, ...] | None,
+        limit: int,
+        conn: sqlite3.Connection | None = None,
+        where: List[Tuple[str, List[Any]]] | None = None,
+        order_by: str | None = None,
+        descending: bool = False
+    ) -> List[Any]:
+        """
+        Страница строк (rowid, *) с фильтрами и сортировкой, вычисляемыми в SQLite.
+        where – условия (sql, параметры) из build_filter и т. п.;
+        сортировка – по order_by (или rowid), при равенстве по rowid.
+        after – ключ последней строки предыдущей страницы: (rowid,) или (значение, rowid);
+        следующая страница выбирается условием по ключу, а не через OFFSET.
+        """
+        conn = conn or self.conn
+        if not conn:
+            raise Exception("Нет подключения к базе данных.")
+        table = quote_identifier(table_name)
+        columns = self._row_columns(conn, table_name)
+        conditions = [sql for sql, _ in where or []]
+        params: List[Any] = [value for _, values in where or [] for value in values]
+        direction = "DESC" if descending else "ASC"
+        cmp = "<" if descending else ">"
+        if order_by is None:
+            order_sql = f"rowid {direction}"
+            if after is not None:
+                conditions.append(f"rowid {cmp} ?")
+                params.append(after[0])
+        else:
+            col = quote_identifier(order_by)
+            # NULL в SQLite меньше любых значений: первыми при ASC и последними при DESC
+            order_sql = f"{col} {direction}, rowid {direction}"
+            if after is not None:
+                value, rowid = after
+                value_sql = "?"
+                if isinstance(value, BlobValue):
+                    # Содержимое BLOB в строке не хранится – сравнение с ним выполняется в SQLite
+                    value_sql = f"(SELECT {col} FROM {table} WHERE rowid = ?)"
+                    value = rowid
+                if value is None and not descending:
+                    conditions.append(f"(({col} IS NULL AND rowid > ?) OR {col} IS NOT NULL)")
+                    params.append(rowid)
+                elif value is None:
+                    conditions.append(f"({col} IS NULL AND rowid < ?)")
+                    params.append(rowid)
+                elif not descending:
+                    conditions.append(f"({col}, rowid) > ({value_sql}, ?)")
+                    params.extend([value, rowid])
+                else:
+                    conditions.append(f"(({col}, rowid) < ({value_sql}, ?) OR {col} IS NULL)")
+                    params.extend([value, rowid])
+        where_sql = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = (
+            f"SELECT rowid, {_blob_select(tuple(columns))} FROM {table}{where_sql} "
+            f"ORDER BY {order_sql} LIMIT ?"
+        )
+        with self.query_log.measure(conn, "get_rows_page", sql) as stat:
+            cur = conn.cursor()
+            cur.execute(sql, params + [limit])
+            rows = cur.fetchall()
+            stat["rows"] = len(rows)
+        return self._wrap_blobs(conn, table_name, columns, rows)
+
+    @staticmethod
+    def _row_columns(conn: sqlite3.Connection, table_name: str) -> List[str]:
+        # Читается на том же подключении, что и строки: метод вызывается из потоков пула
+        return [col[1] for col in conn.execute(table_pragma("table_info", table_name))]
+
+    @staticmethod
+    def _wrap_blobs(
+        conn: sqlite3.Connection, table_name: str, columns: List[str], rows: List[Any]
+    ) -> List[Any]:
+        """
+        Строки выборки (rowid, _blob_select) -> (rowid, значения), где BLOB
+        представлены BlobValue. Первые байты больших BLOB читаются через blobopen –
+        без загрузки содержимого.
+        """
+        result = []
+        for row in rows:
+            values = [row[0]]
+            for i, column in enumerate(columns):
+                value, size, head = row[1 + 3 * i:4 + 3 * i]
+                if size is None:
+                    values.append(value)
+                    continue
+                if head is None and size > 0 and hasattr(conn, "blobopen"):
+                    try:
+                        schema, name = split_table_name(table_name)
+                        with conn.blobopen(name, column, row[0], readonly=True, name=schema) as blob:
+                            head = blob.read(PREVIEW_BYTES)
+                    except sqlite3.Error:
+                        head = None  # например, таблица WITHOUT ROWID
+                values.append(BlobValue(size, b"" if size == 0 else head))
+            result.append(tuple(values))
+        return result
+
+    def get_rows_by_rowid(
+        self,
+        table_name: str,
+        rowids: Iterable[int],
+        conn: sqlite3.Connection | None = None,
+        where: List[Tuple[str, List[Any]]] | None = None
+    ) -> List[Any]:
+        """
+        Строки (rowid, *) с указанными rowid – для точечного обновления после записи.
+        where – условия как в get_rows_page: строки, которые им больше
+        не удовлетворяют, не возвращаются.
+        """
+        conn = conn or self.conn
+        if not conn:
+            raise Exception("Нет подключения к базе данных.")
+        table = quote_identifier(table_name)
+        columns = self._row_columns(conn, table_name)
+        select = _blob_select(tuple(columns))
+        conditions = "".join(f" AND {sql}" for sql, _ in where or [])
+        params: List[Any] = [value for _, values in where or [] for value in values]
+        ids = list(rowids)
+        result: List[Any] = []
+        # Не больше ROWID_CHUNK параметров в одном запросе
+        for start in range(0, len(ids), ROWID_CHUNK):
+            chunk = ids[start:start + ROWID_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            result.extend(conn.execute(
+                f"SELECT rowid, {select} FROM {table} WHERE rowid IN ({placeholders}){conditions}", chunk + params
+            ).fetchall())
+        return self._wrap_blobs(conn, table_name, columns, result)
+
+    def _open_blob(
+        self, conn: sqlite3.Connection, table_name: str, column: str, rowid: int, readonly: bool
+    ) -> Any:
+        if not hasattr(conn, "blobopen"):
+            raise Exception("Потоковая работа с BLOB требует Python 3.11 или новее.")
+        schema, name = split_table_name(table_name)
+        try:
+            return conn.blobopen(name, column, rowid, readonly=readonly, name=schema)
+        except sqlite3.OperationalError as e:
+            raise Exception(f"Не удалось открыть BLOB {table_name}.{column} (rowid {rowid}): {e}")
+
+    def read_blob(
+        self, table_name: str, column: str, rowid: int, conn: sqlite3.Connection | None = None
+    ) -> bytes:
+        """Полное содержимое BLOB ячейки (по требованию, через blobopen)."""
+        conn = conn or self.conn
+        if not conn:
+            raise Exception("Нет подключения к базе данных.")
+        with self._open_blob(conn, table_name, column, rowid, readonly=True) as blob:
+            return blob.read()
+
+    def read_blob_to_file(
+        self,
+        table_name: str,
+        column: str,
+        rowid: int,
+        filename: str,
+        conn: sqlite3.Connection | None = None,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """
+        Потоково записывает BLOB ячейки в файл, не загружая его в память целиком.
+        conn – подключение для чтения (из пула); по умолчанию основное.
+        При ошибке или OperationCancelled из progress_callback(байт) файл удаляется.
+        Возвращает число записанных байт.
+        """
+        conn = conn or self.conn
+        if not conn:
+            raise Exception("Нет подключения к базе данных.")
+        try:
+            with self._open_blob(conn, table_name, column, rowid, readonly=True) as blob, \
+                    open(filename, "wb") as f:
+                return copy_blob_to_file(blob, f, progress_callback)
+        except BaseException:
+            if os.path.exists(filename):
+                os.remove(filename)
+            raise
+
+    def write_blob_from_file(
+        self,
+        table_name: str,
+        column: str,
+        rowid: int,
+        filename: str,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """
+        Записывает содержимое файла в ячейку потоково: сначала zeroblob нужного
+        размера, затем запись кусками через blobopen. Возвращает число байт.
+        """
+        with self.transaction() as conn:
+            return self._write_blob_file(conn, table_name, column, rowid, filename, progress_callback)
+
+    def _write_blob_file(
+        self,
+        conn: sqlite3.Connection,
+        table_name: str,
+        column: str,
+        rowid: int,
+        filename: str,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> int:
+        size = os.path.getsize(filename)
+        conn.execute(
+            f"UPDATE {quote_identifier(table_name)} SET {quote_identifier(column)} = zeroblob(?) WHERE rowid = ?",
+            (size, rowid)
+        )
+        if size == 0:
+            return 0
+        with self._open_blob(conn, table_name, column, rowid, readonly=False) as blob, open(filename, "rb") as f:
+            return copy_file_to_blob(f, blob, progress_callback)
+
+    def has_fts_index(self, table_name: str) -> bool:
+        # Полнотекстовые индексы поддерживаются только для таблиц основной базы
+        return not isinstance(table_name, TableName) and fts_table_name(table_name) in self.get_tables()
+
+    def create_fts_index(self, table_name: str) -> None:
+        """
+        Создаёт FTS5-индекс с внешним содержимым по текстовым столбцам таблицы
+        и триггеры, поддерживающие его в актуальном состоянии.
+        """
+        if isinstance(table_name, TableName):
+            raise Exception("Полнотекстовый индекс можно создать только в основной базе.")
+        columns = [
+            col[1] for col in self.get_table_info(table_name)
+            if (col[2] or "TEXT").upper() not in ("INTEGER", "REAL", "BLOB")
+        ]
+        if not columns:
+            raise Exception("В таблице нет текстовых столбцов.")
+        table = quote_identifier(table_name)
+        fts = quote_identifier(fts_table_name(table_name))
+        cols = ", ".join(quote_identifier(col) for col in columns)
+        new_values = ", ".join(f"new.{quote_identifier(col)}" for col in columns)
+        old_values = ", ".join(f"old.{quote_identifier(col)}" for col in columns)
+        delete = f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES('delete', old.rowid, {old_values});"
+        insert = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values});"
+        with self.transaction() as conn:
+            conn.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content={table}, content_rowid='rowid')"
+            )
+            for suffix, body in (("ai", insert), ("ad", delete), ("au", delete + " " + insert)):
+                event = {"ai": "INSERT", "ad": "DELETE", "au": "UPDATE"}[suffix]
+                trigger = quote_identifier(f"{fts_table_name(table_name)}_{suffix}")
+                conn.execute(f"CREATE TRIGGER {trigger} AFTER {event} ON {table} BEGIN {body} END")
+            conn.execute(f"INSERT INTO {fts}({fts}) VALUES('rebuild')")
+
+    def search_condition(self, table_name: str, text: str) -> Tuple[str, List[Any]]:
+        """
+        Условие быстрого поиска по таблице: через FTS5-индекс, если он есть,
+        иначе LIKE по всем текстовым столбцам.
+        """
+        if self.has_fts_index(table_name):
+            fts = quote_identifier(fts_table_name(table_name))
+            return f"rowid IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)", [text]
+        parts = []
+        params: List[Any] = []
+        for col in self.get_table_info(table_name):
+            if (col[2] or "TEXT").upper() in ("INTEGER", "REAL", "BLOB"):
+                continue
+            sql, values = build_filter(col[1], "TEXT", text)
+            parts.append(sql)
+            params.extend(values)
+        if not parts:
+            return "0", []
+        return "(" + " OR ".join(parts) + ")", params
 
     def insert_row(self, table_name: str, columns: List[str], values: List[Any]) -> None:
         """Вставляет новую строку в таблицу."""
-        if not self.conn:
-            raise Exception("Нет подключения к базе данных.")
-        placeholders = ", ".join("?" for _ in values)
-        cols = ", ".join(columns)
-        sql = f"INSERT INTO {table_name} ({cols}) VALUES ({placeholders})"
-        cur = self.conn.cursor()
-        cur.execute(sql, values)
-        self.conn.commit()
+        self.insert_rows(table_name, columns, [values])
 
     def update_row(self, table_name: str, columns: List[str], values: List[Any], rowid: int) -> None:
         """Обновляет строку таблицы по rowid."""
-        if not self.conn:
-            raise Exception("Нет подключения к базе данных.")
-        set_clause = ", ".join(f"{col}=?" for col in columns)
-        sql = f"UPDATE {table_name} SET {set_clause} WHERE rowid=?"
-        cur = self.conn.cursor()
-        cur.execute(sql, values + [rowid])
-        self.conn.commit()
+        self.update_rows(table_name, columns, [(rowid, values)])
 
     def delete_row(self, table_name: str, rowid: int) -> None:
         """Удаляет строку из таблицы по rowid."""
-        if not self.conn:
-            raise Exception("Нет подключения к базе данных.")
-        sql = f"DELETE FROM {table_name} WHERE rowid=?"
-        cur = self.conn.cursor()
-        cur.execute(sql, (rowid,))
-        self.conn.commit()
+        self.delete_rows(table_name, [rowid])
+
+    def insert_rows(self, table_name: str, columns: List[str], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Вставляет набор строк одной командой executemany в одной транзакции.
+        Возвращает число вставленных строк.
+        """
+        sql = _insert_sql(table_name, tuple(columns))
+        pending: List[Sequence[Any]] = []
+        with self.transaction() as conn, self.query_log.measure(conn, "insert_rows", sql) as stat:
+            total = 0
+            for row in rows:
+                if not any(isinstance(value, BlobFile) for value in row):
+                    pending.append(row)
+                    continue
+                # Строка с файлом вставляется отдельно (порядок строк сохраняется):
+                # содержимое пишется потоково по её rowid
+                if pending:
+                    total += conn.executemany(sql, pending).rowcount
+                    pending = []
+                cur = conn.execute(sql, [None if isinstance(value, BlobFile) else value for value in row])
+                for column, value in zip(columns, row):
+                    if isinstance(value, BlobFile):
+                        self._write_blob_file(conn, table_name, column, cur.lastrowid, value.path)  # type: ignore[arg-type]
+                total += 1
+            if pending:
+                total += conn.executemany(sql, pending).rowcount
+            stat["rows"] = total
+        return total
+
+    def update_rows(
+        self, table_name: str, columns: List[str], updates: Iterable[Tuple[int, Sequence[Any]]]
+    ) -> int:
+        """
+        Обновляет строки по rowid. updates – пары (rowid, значения столбцов).
+        Возвращает число изменённых строк.
+        """
+        sql = _update_sql(table_name, tuple(columns))
+        blobs: List[Tuple[int, Sequence[Any]]] = []
+
+        def plain_updates() -> Iterator[Sequence[Any]]:
+            for rowid, values in updates:
+                if any(isinstance(value, (BlobValue, BlobFile)) for value in values):
+                    blobs.append((rowid, values))
+                else:
+                    yield (*values, rowid)
+        with self.transaction() as conn, self.query_log.measure(conn, "update_rows", sql) as stat:
+            total = conn.executemany(sql, plain_updates()).rowcount
+            # Неизменённые BLOB (BlobValue) не перезаписываются, файлы пишутся потоково
+            for rowid, values in blobs:
+                kept = [(col, value) for col, value in zip(columns, values) if not isinstance(value, BlobValue)]
+                if kept:
+                    total += conn.execute(
+                        _update_sql(table_name, tuple(col for col, _ in kept)),
+                        [None if isinstance(value, BlobFile) else value for _, value in kept] + [rowid]
+                    ).rowcount
+                for col, value in kept:
+                    if isinstance(value, BlobFile):
+                        self._write_blob_file(conn, table_name, col, rowid, value.path)
+            stat["rows"] = total
+        return total
+
+    def delete_rows(self, table_name: str, rowids: Iterable[int]) -> int:
+        """Удаляет строки по rowid. Возвращает число удалённых строк."""
+        sql = _delete_sql(table_name)
+        with self.transaction() as conn, self.query_log.measure(conn, "delete_rows", sql) as stat:
+            cur = conn.executemany(sql, ((rowid,) for rowid in rowids))
+            stat["rows"] = cur.rowcount
+        return cur.rowcount
@@ -0,0 +1,821 @@
+# dialogs.py
+import time
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget,
+    QListWidgetItem, QCheckBox, QPlainTextEdit, QProgressBar, QFileDialog,
+    QMessageBox, QWidget, QComboBox, QLineEdit, QFormLayout, QTreeWidget, QTreeWidgetItem,
+    QTabWidget, QSpinBox
+)
+from PyQt5.QtCore import Qt
+from typing import List, Any, Dict, Optional
+from db_manager import DBManager, open_text
+from importer import FORMATS, guess_format
+from maintenance import database_info, vacuum_into, incremental_vacuum, optimize
+from profiling import short_sql
+from query_plan import explain, advise, create_index_and_time, run_analyze
+from sql_file import SCRIPT_BATCH, sql_file_checkpoint
+from workers import DumpWorker, ImportWorker, ExportDataWorker, WriteWorker, BackupWorker, SqlFileWorker
+
+PREVIEW_CHARS = 64 * 1024   # сколько символов дампа показывать в предпросмотре
+
+
+class ExportDumpDialog(QDialog):
+    """
+    Диалог экспорта SQL-дампа в файл.
+    Дамп пишется на диск в фоновом потоке; в окне показываются прогресс
+    и только начало получившегося файла.
+    """
+    def __init__(self, parent: QWidget, db_manager: DBManager) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.worker: Optional[DumpWorker] = None
+        self.filename = ""
+        self.compress = False
+        self.setWindowTitle("Экспорт SQL")
+        self.resize(600, 500)
+        self.init_ui()
+
+    def init_ui(self) -> None:
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Таблицы:"))
+        self.table_list = QListWidget()
+        for name in self.db_manager.get_dump_tables():
+            item = QListWidgetItem(name)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.table_list.addItem(item)
+        layout.addWidget(self.table_list)
+        self.compress_check = QCheckBox("Сжать (gzip)")
+        layout.addWidget(self.compress_check)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.preview = QPlainTextEdit()
+        self.preview.setReadOnly(True)
+        layout.addWidget(self.preview)
+        btn_layout = QHBoxLayout()
+        self.btn_export = QPushButton("Сохранить в файл")
+        self.btn_export.clicked.connect(self.start_export)
+        self.btn_cancel = QPushButton("Отмена")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_export)
+        btn_layout.addWidget(self.btn_export)
+        btn_layout.addWidget(self.btn_cancel)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+    def selected_tables(self) -> Optional[List[str]]:
+        """Список отмеченных таблиц или None, если отмечены все (полный дамп)."""
+        names = []
+        for i in range(self.table_list.count()):
+            item = self.table_list.item(i)
+            if item.checkState() == Qt.Checked:
+                names.append(item.text())
+        if len(names) == self.table_list.count():
+            return None
+        return names
+
+    def start_export(self) -> None:
+        tables = self.selected_tables()
+        if tables == []:
+            QMessageBox.warning(self, "Внимание", "Не выбрано ни одной таблицы!")
+            return
+        compress = self.compress_check.isChecked()
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Сохранить SQL дамп", "dump.sql.gz" if compress else "dump.sql",
+            "SQL File (*.sql *.sql.gz);;Все файлы (*)"
+        )
+        if not filename:
+            return
+        # Сжатие определяет окончательное имя файла: имя в диалоге могли исправить
+        compress = filename.lower().endswith(".gz")
+        self.compress_check.setChecked(compress)
+        self.filename = filename
+        self.compress = compress
+        self.preview.clear()
+        self.progress_bar.setRange(0, 0)
+        self.worker = DumpWorker(self.db_manager, filename, tables, compress, self)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.failed.connect(lambda error: QMessageBox.critical(self, "Ошибка", error))
+        self.worker.completed.connect(self.on_completed)
+        self.worker.finished.connect(self.on_finished)
+        self.btn_export.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        self.worker.start()
+
+    def cancel_export(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def on_progress(self, written: int, statements: int) -> None:
+        self.status_label.setText(
+            f"Записано: {written / (1024 * 1024):.1f} МБ, команд: {statements}"
+        )
+
+    def on_completed(self, statements: int) -> None:
+        self.status_label.setText(f"Дамп сохранён в {self.filename} (команд: {statements})")
+        try:
+            with open_text(self.filename, "r", self.compress) as f:
+                self.preview.setPlainText(f.read(PREVIEW_CHARS))
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+
+    def on_finished(self) -> None:
+        self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(1 if self.worker is not None and not self.worker.cancelled else 0)
+        if self.worker is not None and self.worker.cancelled:
+            self.status_label.setText("Экспорт отменён.")
+        self.worker = None
+        self.btn_export.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+
+    def reject(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().reject()
+
+
+class ImportDialog(QDialog):
+    """
+    Диалог импорта CSV/TSV/JSONL в существующую таблицу.
+    Загрузка идёт в фоновом потоке пачками в одной транзакции; её можно отменить.
+    """
+    def __init__(self, parent: QWidget, db_manager: DBManager, table_name: Optional[str] = None) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.worker: Optional[ImportWorker] = None
+        self.started_at = 0.0
+        self.setWindowTitle("Импорт данных")
+        self.resize(500, 250)
+        self.init_ui(table_name)
+
+    def init_ui(self, table_name: Optional[str]) -> None:
+        layout = QVBoxLayout()
+        form_layout = QFormLayout()
+        file_layout = QHBoxLayout()
+        self.file_edit = QLineEdit()
+        btn_browse = QPushButton("...")
+        btn_browse.clicked.connect(self.choose_file)
+        file_layout.addWidget(self.file_edit)
+        file_layout.addWidget(btn_browse)
+        form_layout.addRow("Файл:", file_layout)
+        self.format_combo = QComboBox()
+        self.format_combo.addItems(list(FORMATS))
+        form_layout.addRow("Формат:", self.format_combo)
+        self.table_combo = QComboBox()
+        self.table_combo.addItems(self.db_manager.get_tables())
+        if table_name:
+            self.table_combo.setCurrentText(table_name)
+        form_layout.addRow("Таблица:", self.table_combo)
+        layout.addLayout(form_layout)
+        self.header_check = QCheckBox("Первая строка – заголовок")
+        self.header_check.setChecked(True)
+        layout.addWidget(self.header_check)
+        self.fast_check = QCheckBox("Быстрый режим (synchronous=OFF, journal_mode=MEMORY)")
+        layout.addWidget(self.fast_check)
+        self.defer_check = QCheckBox("Пересоздать индексы после загрузки")
+        layout.addWidget(self.defer_check)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        btn_layout = QHBoxLayout()
+        self.btn_import = QPushButton("Импортировать")
+        self.btn_import.clicked.connect(self.start_import)
+        self.btn_cancel = QPushButton("Отмена")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_import)
+        btn_layout.addWidget(self.btn_import)
+        btn_layout.addWidget(self.btn_cancel)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+    def choose_file(self) -> None:
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Файл для импорта", "",
+            "Данные (*.csv *.tsv *.jsonl *.json *.ndjson *.gz);;Все файлы (*)"
+        )
+        if filename:
+            self.file_edit.setText(filename)
+            self.format_combo.setCurrentText(guess_format(filename))
+
+    def start_import(self) -> None:
+        filename = self.file_edit.text().strip()
+        table_name = self.table_combo.currentText()
+        if not filename or not table_name:
+            QMessageBox.warning(self, "Внимание", "Необходимо выбрать файл и таблицу!")
+            return
+        try:
+            self.worker = ImportWorker(
+                self.db_manager, filename, table_name, self.format_combo.currentText(),
+                self.header_check.isChecked(), self.fast_check.isChecked(),
+                self.defer_check.isChecked(), self
+            )
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+            return
+        self.worker.progress.connect(self.on_progress)
+        self.worker.failed.connect(lambda error: QMessageBox.critical(self, "Ошибка", error))
+        self.worker.completed.connect(self.on_completed)
+        self.worker.finished.connect(self.on_finished)
+        self.btn_import.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        self.progress_bar.setValue(0)
+        self.started_at = time.monotonic()
+        self.worker.start()
+
+    def cancel_import(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def on_progress(self, rows: int, position: int, size: int) -> None:
+        if size:
+            self.progress_bar.setValue(min(1000, position * 1000 // size))
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        self.status_label.setText(f"Загружено строк: {rows} ({rows / elapsed:.0f} строк/с)")
+
+    def on_completed(self, rows: int) -> None:
+        self.progress_bar.setValue(1000)
+        self.status_label.setText(
+            f"Импортировано строк: {rows} за {time.monotonic() - self.started_at:.1f} с"
+        )
+
+    def on_finished(self) -> None:
+        if self.worker is not None and self.worker.cancelled:
+            self.progress_bar.setValue(0)
+            self.status_label.setText("Импорт отменён, изменения откатаны.")
+        self.worker = None
+        self.btn_import.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+
+    def reject(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().reject()
+
+
+class RunSqlFileDialog(QDialog):
+    """
+    Выполнение SQL-файла или дампа без загрузки в редактор: команды читаются
+    потоком и фиксируются транзакциями по заданному числу команд. Если выполнение
+    файла прерывалось, оно продолжается с последней зафиксированной транзакции.
+    """
+    def __init__(self, parent: QWidget, db_manager: DBManager) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.worker: Optional[SqlFileWorker] = None
+        self.started_at = 0.0
+        self.last_progress = (0.0, 0, 0)
+        self.setWindowTitle("Выполнить SQL-файл")
+        self.resize(500, 220)
+        self.init_ui()
+
+    def init_ui(self) -> None:
+        layout = QVBoxLayout()
+        form_layout = QFormLayout()
+        file_layout = QHBoxLayout()
+        self.file_edit = QLineEdit()
+        self.file_edit.textChanged.connect(self.update_checkpoint)
+        btn_browse = QPushButton("...")
+        btn_browse.clicked.connect(self.choose_file)
+        file_layout.addWidget(self.file_edit)
+        file_layout.addWidget(btn_browse)
+        form_layout.addRow("Файл:", file_layout)
+        self.batch_spin = QSpinBox()
+        self.batch_spin.setRange(1, 1000000)
+        self.batch_spin.setValue(SCRIPT_BATCH)
+        form_layout.addRow("Команд в транзакции:", self.batch_spin)
+        layout.addLayout(form_layout)
+        self.resume_check = QCheckBox("Продолжить прерванное выполнение")
+        self.resume_check.setChecked(True)
+        self.resume_check.setEnabled(False)
+        layout.addWidget(self.resume_check)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        btn_layout = QHBoxLayout()
+        self.btn_run = QPushButton("Выполнить")
+        self.btn_run.clicked.connect(self.start_run)
+        self.btn_cancel = QPushButton("Отмена")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_run)
+        btn_layout.addWidget(self.btn_run)
+        btn_layout.addWidget(self.btn_cancel)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+    def choose_file(self) -> None:
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "SQL-файл", "", "SQL (*.sql *.sql.gz *.gz);;Все файлы (*)"
+        )
+        if filename:
+            self.file_edit.setText(filename)
+
+    def update_checkpoint(self) -> None:
+        filename = self.file_edit.text().strip()
+        checkpoint = None
+        try:
+            if filename and self.db_manager.conn:
+                checkpoint = sql_file_checkpoint(self.db_manager.conn, filename)
+        except OSError:
+            pass
+        self.resume_check.setEnabled(checkpoint is not None)
+        self.resume_check.setText(
+            f"Продолжить прерванное выполнение (команд выполнено: {checkpoint['statements']})"
+            if checkpoint else "Продолжить прерванное выполнение"
+        )
+
+    def start_run(self) -> None:
+        filename = self.file_edit.text().strip()
+        if not filename:
+            QMessageBox.warning(self, "Внимание", "Необходимо выбрать файл!")
+            return
+        self.worker = SqlFileWorker(
+            self.db_manager, filename, self.batch_spin.value(), self.resume_check.isChecked(), self
+        )
+        self.worker.progress.connect(self.on_progress)
+        self.worker.failed.connect(lambda error: QMessageBox.critical(self, "Ошибка", error))
+        self.worker.completed.connect(self.on_completed)
+        self.worker.finished.connect(self.on_finished)
+        self.btn_run.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        self.progress_bar.setValue(0)
+        self.started_at = time.monotonic()
+        self.last_progress = (self.started_at, 0, 0)
+        self.worker.start()
+
+    def cancel_run(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def on_progress(self, position: int, size: int, statements: int) -> None:
+        if size:
+            self.progress_bar.setValue(min(1000, position * 1000 // size))
+        # Скорость – за время с предыдущего сигнала, а не средняя с начала
+        now = time.monotonic()
+        last_time, last_position, last_statements = self.last_progress
+        elapsed = max(now - last_time, 1e-6)
+        self.last_progress = (now, position, statements)
+        self.status_label.setText(
+            f"Выполнено команд: {statements} ({(statements - last_statements) / elapsed:.0f} команд/с, "
+            f"{(position - last_position) / elapsed / (1024 * 1024):.1f} МБ/с)"
+        )
+
+    def on_completed(self, result: Dict[str, Any]) -> None:
+        self.progress_bar.setValue(1000)
+        resumed = f", продолжено с байта {result['resumed_from']}" if result["resumed_from"] else ""
+        self.status_label.setText(
+            f"Выполнено команд: {result['statements']} за {result['seconds']:.1f} с{resumed}"
+        )
+
+    def on_finished(self) -> None:
+        if self.worker is not None and self.worker.cancelled:
+            self.status_label.setText("Остановлено; выполнение можно продолжить с последней транзакции.")
+        self.worker = None
+        self.btn_run.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+        self.update_checkpoint()
+
+    def reject(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().reject()
+
+
+class ExportDataDialog(QDialog):
+    """
+    Диалог выгрузки результата запроса или таблицы в CSV/TSV/JSONL.
+    Строки читаются пачками и пишутся прямо в файл в фоновом потоке.
+    """
+    def __init__(self, parent: QWidget, db_manager: DBManager, sql: str, title: str) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.sql = sql
+        self.worker: Optional[ExportDataWorker] = None
+        self.filename = ""
+        self.setWindowTitle(f"Экспорт данных: {title}")
+        self.resize(450, 150)
+        self.init_ui()
+
+    def init_ui(self) -> None:
+        layout = QVBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        btn_layout = QHBoxLayout()
+        self.btn_export = QPushButton("Сохранить в файл")
+        self.btn_export.clicked.connect(self.start_export)
+        self.btn_cancel = QPushButton("Отмена")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_export)
+        btn_layout.addWidget(self.btn_export)
+        btn_layout.addWidget(self.btn_cancel)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+    def start_export(self) -> None:
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Сохранить данные", "",
+            "CSV (*.csv);;TSV (*.tsv);;JSON Lines (*.jsonl);;Сжатые (*.gz);;Все файлы (*)"
+        )
+        if not filename:
+            return
+        self.filename = filename
+        self.worker = ExportDataWorker(self.db_manager, self.sql, filename, self)
+        self.worker.progress.connect(
+            lambda rows: self.status_label.setText(f"Записано строк: {rows}")
+        )
+        self.worker.failed.connect(lambda error: QMessageBox.critical(self, "Ошибка", error))
+        self.worker.completed.connect(
+            lambda rows: self.status_label.setText(f"Сохранено строк: {rows} в {self.filename}")
+        )
+        self.worker.finished.connect(self.on_finished)
+        self.progress_bar.setRange(0, 0)
+        self.btn_export.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        self.worker.start()
+
+    def cancel_export(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def on_finished(self) -> None:
+        self.progress_bar.setRange(0, 1)
+        if self.worker is not None and self.worker.cancelled:
+            self.progress_bar.setValue(0)
+            self.status_label.setText("Экспорт отменён.")
+        else:
+            self.progress_bar.setValue(1)
+        self.worker = None
+        self.btn_export.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+
+    def reject(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().reject()
+
+
+class QueryPlanDialog(QDialog):
+    """
+    Дерево EXPLAIN QUERY PLAN для запроса и советы по индексам:
+    полные просмотры больших таблиц и предлагаемые CREATE INDEX.
+    Индекс можно создать одной кнопкой с замером запроса до и после.
+    """
+    def __init__(self, parent: QWidget, db_manager: DBManager, sql: str) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.sql = sql
+        self.worker: Optional[WriteWorker] = None
+        self.setWindowTitle("План запроса")
+        self.resize(700, 500)
+        self.init_ui()
+        self.refresh_plan()
+
+    def init_ui(self) -> None:
+        layout = QVBoxLayout()
+        sql_label = QLabel(self.sql if len(self.sql) < 500 else self.sql[:500] + "...")
+        sql_label.setWordWrap(True)
+        layout.addWidget(sql_label)
+        self.plan_tree = QTreeWidget()
+        self.plan_tree.setHeaderLabels(["План"])
+        layout.addWidget(self.plan_tree)
+        layout.addWidget(QLabel("Рекомендации:"))
+        self.advice_list = QListWidget()
+        self.advice_list.currentItemChanged.connect(self.update_buttons)
+        layout.addWidget(self.advice_list)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        btn_layout = QHBoxLayout()
+        self.btn_analyze = QPushButton("ANALYZE и обновить")
+        self.btn_analyze.clicked.connect(self.analyze)
+        self.btn_create = QPushButton("Создать индекс и замерить")
+        self.btn_create.clicked.connect(self.create_index)
+        self.btn_cancel = QPushButton("Отмена")
+        self.btn_cancel.clicked.connect(self.cancel_work)
+        btn_layout.addWidget(self.btn_analyze)
+        btn_layout.addWidget(self.btn_create)
+        btn_layout.addWidget(self.btn_cancel)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+        self.update_buttons()
+
+    def refresh_plan(self) -> None:
+        self.plan_tree.clear()
+        self.advice_list.clear()
+        try:
+            with self.db_manager.read_connection() as conn:
+                plan = explain(conn, self.sql)
+                suggestions = advise(conn, self.sql, plan)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+            return
+        # Узлы плана ссылаются на родителя по id; 0 – корень
+        flagged = {suggestion["detail"] for suggestion in suggestions}
+        items = {}
+        for node_id, parent_id, detail in plan:
+            parent_item = items.get(parent_id)
+            item = QTreeWidgetItem(parent_item if parent_item is not None else self.plan_tree, [detail])
+            if detail in flagged:
+                item.setForeground(0, Qt.red)
+            items[node_id] = item
+        self.plan_tree.expandAll()
+        for suggestion in suggestions:
+            text = suggestion["message"]
+            if suggestion["create_sql"]:
+                text += f"\n    {suggestion['create_sql']}"
+            item = QListWidgetItem(text)
+            item.setData(Qt.UserRole, suggestion["create_sql"])
+            self.advice_list.addItem(item)
+        if not suggestions:
+            self.advice_list.addItem("Полных просмотров больших таблиц не найдено.")
+        self.update_buttons()
+
+    def selected_create_sql(self) -> Optional[str]:
+        item = self.advice_list.currentItem()
+        return item.data(Qt.UserRole) if item is not None else None
+
+    def update_buttons(self) -> None:
+        busy = self.worker is not None
+        self.btn_analyze.setEnabled(not busy)
+        self.btn_create.setEnabled(not busy and bool(self.selected_create_sql()))
+        self.btn_cancel.setEnabled(busy)
+
+    def start_worker(self, worker: WriteWorker, status: str) -> None:
+        self.worker = worker
+        worker.failed.connect(lambda error: QMessageBox.critical(self, "Ошибка", error))
+        worker.finished.connect(self.on_finished)
+        self.status_label.setText(status)
+        self.update_buttons()
+        worker.start()
+
+    def analyze(self) -> None:
+        worker = WriteWorker(self.db_manager, run_analyze, parent=self)
+        worker.succeeded.connect(lambda _: self.status_label.setText("Статистика обновлена."))
+        self.start_worker(worker, "Выполняется ANALYZE...")
+
+    def create_index(self) -> None:
+        create_sql = self.selected_create_sql()
+        if not create_sql:
+            return
+        worker = WriteWorker(self.db_manager, create_index_and_time, self.sql, create_sql, parent=self)
+        worker.succeeded.connect(self.on_index_created)
+        self.start_worker(worker, "Замер запроса и создание индекса...")
+
+    def on_index_created(self, result) -> None:
+        before, after, rows = result
+        speedup = f" (в {before / after:.1f} раз быстрее)" if after > 0 else ""
+        self.status_label.setText(
+            f"Индекс создан. Время запроса: {before:.3f} с -> {after:.3f} с{speedup}, строк: {rows}"
+        )
+
+    def cancel_work(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def on_finished(self) -> None:
+        if self.worker is not None and self.worker.cancelled:
+            self.status_label.setText("Операция отменена.")
+        self.worker = None
+        self.refresh_plan()
+
+    def reject(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().reject()
+
+
+class QueryLogDialog(QDialog):
+    """
+    Журнал замеров: последние выполненные команды (из памяти) и постоянный
+    журнал медленных запросов с настраиваемым порогом.
+    """
+    COLUMNS = ["Время", "Источник", "мс", "Строк", "Шагов VM", "SQL"]
+
+    def __init__(self, parent: QWidget, db_manager: DBManager) -> None:
+        super().__init__(parent)
+        self.query_log = db_manager.query_log
+        self.setWindowTitle("Журнал запросов")
+        self.resize(900, 500)
+        self.init_ui()
+        self.refresh()
+
+    def init_ui(self) -> None:
+        layout = QVBoxLayout()
+        self.tabs = QTabWidget()
+        self.recent_tree = self.create_tree()
+        self.slow_tree = self.create_tree()
+        self.tabs.addTab(self.recent_tree, "Последние")
+        self.tabs.addTab(self.slow_tree, "Медленные")
+        layout.addWidget(self.tabs)
+        form = QFormLayout()
+        self.threshold_spin = QSpinBox()
+        self.threshold_spin.setRange(0, 3600 * 1000)
+        self.threshold_spin.setSuffix(" мс")
+        self.threshold_spin.setValue(self.query_log.slow_ms)
+        self.threshold_spin.valueChanged.connect(self.query_log.set_slow_threshold)
+        form.addRow("Порог медленного запроса:", self.threshold_spin)
+        layout.addLayout(form)
+        btn_layout = QHBoxLayout()
+        btn_refresh = QPushButton("Обновить")
+        btn_refresh.clicked.connect(self.refresh)
+        btn_clear = QPushButton("Очистить")
+        btn_clear.clicked.connect(self.clear)
+        btn_layout.addStretch()
+        btn_layout.addWidget(btn_refresh)
+        btn_layout.addWidget(btn_clear)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+    def create_tree(self) -> QTreeWidget:
+        tree = QTreeWidget()
+        tree.setRootIsDecorated(False)
+        tree.setHeaderLabels(self.COLUMNS)
+        tree.setSortingEnabled(True)
+        return tree
+
+    def fill_tree(self, tree: QTreeWidget, entries: List[Dict[str, Any]]) -> None:
+        tree.setSortingEnabled(False)
+        tree.clear()
+        # Новые записи сверху
+        for entry in reversed(entries):
+            item = QTreeWidgetItem([
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["time"])),
+                entry["source"],
+                f"{entry['seconds'] * 1000:.1f}",
+                str(entry["rows"]) if entry["rows"] >= 0 else "",
+                str(entry["steps"]),
+                short_sql(entry["sql"], 200),
+            ])
+            # Числовые колонки сортируются по значению, а не по тексту
+            item.setData(2, Qt.DisplayRole, round(entry["seconds"] * 1000, 1))
+            item.setData(4, Qt.DisplayRole, entry["steps"])
+            item.setToolTip(5, entry["sql"] if not entry.get("error") else f"{entry['sql']}\n\n{entry['error']}")
+            if entry.get("error"):
+                item.setForeground(5, Qt.red)
+            tree.addTopLevelItem(item)
+        for col in range(len(self.COLUMNS) - 1):
+            tree.resizeColumnToContents(col)
+        tree.setSortingEnabled(True)
+
+    def refresh(self) -> None:
+        self.fill_tree(self.recent_tree, self.query_log.recent())
+        self.fill_tree(self.slow_tree, self.query_log.slow_queries())
+
+    def clear(self) -> None:
+        if self.tabs.currentWidget() is self.slow_tree:
+            self.query_log.clear_slow_log()
+        else:
+            self.query_log.clear()
+        self.refresh()
+
+
+class MaintenanceDialog(QDialog):
+    """
+    Обслуживание базы: резервная копия (backup API, по страницам), VACUUM INTO,
+    incremental_vacuum и PRAGMA optimize. Операции выполняются в фоновом потоке
+    с прогрессом и отменой. operation – операция, запускаемая при открытии.
+    """
+    OPERATIONS = ("backup", "vacuum_into", "incremental_vacuum", "optimize")
+
+    def __init__(self, parent: QWidget, db_manager: DBManager, operation: Optional[str] = None) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.worker: Any = None
+        self.setWindowTitle("Обслуживание базы")
+        self.resize(500, 250)
+        self.init_ui()
+        self.refresh_info()
+        if operation is not None:
+            self.start(operation)
+
+    def init_ui(self) -> None:
+        layout = QVBoxLayout()
+        self.info_label = QLabel()
+        layout.addWidget(self.info_label)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+        self.status_label = QLabel()
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+        btn_layout = QHBoxLayout()
+        self.buttons = []
+        for operation, title in zip(self.OPERATIONS, (
+            "Резервная копия...", "VACUUM INTO...", "Incremental vacuum", "PRAGMA optimize"
+        )):
+            button = QPushButton(title)
+            button.clicked.connect(lambda checked, op=operation: self.start(op))
+            btn_layout.addWidget(button)
+            self.buttons.append(button)
+        layout.addLayout(btn_layout)
+        self.btn_cancel = QPushButton("Отмена")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_work)
+        layout.addWidget(self.btn_cancel)
+        self.setLayout(layout)
+
+    def refresh_info(self) -> None:
+        try:
+            with self.db_manager.read_connection() as conn:
+                info = database_info(conn)
+        except Exception as e:
+            self.info_label.setText(str(e))
+            return
+        auto_vacuum = {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}.get(info["auto_vacuum"], info["auto_vacuum"])
+        self.info_label.setText(
+            f"Размер: {info['size'] / (1024 * 1024):.1f} МБ ({info['page_count']} стр. по {info['page_size']} Б), "
+            f"свободно: {info['free_size'] / (1024 * 1024):.1f} МБ\n"
+            f"journal_mode: {info['journal_mode']}, auto_vacuum: {auto_vacuum}"
+        )
+
+    def ask_filename(self, title: str, default: str) -> str:
+        filename, _ = QFileDialog.getSaveFileName(self, title, default, "SQLite DB (*.db *.sqlite);;Все файлы (*)")
+        return filename
+
+    def start(self, operation: str) -> None:
+        if self.worker is not None:
+            return
+        if operation == "backup":
+            filename = self.ask_filename("Резервная копия", "backup.db")
+            if not filename:
+                return
+            worker: Any = BackupWorker(self.db_manager, filename, self)
+            worker.progress.connect(self.on_backup_progress)
+            worker.completed.connect(
+                lambda pages: self.status_label.setText(f"Копия сохранена в {filename} ({pages} стр.)")
+            )
+            status = "Резервное копирование..."
+        elif operation == "vacuum_into":
+            filename = self.ask_filename("VACUUM INTO", "compact.db")
+            if not filename:
+                return
+            worker = WriteWorker(self.db_manager, vacuum_into, filename, parent=self)
+            worker.succeeded.connect(
+                lambda size: self.status_label.setText(
+                    f"Сжатая копия сохранена в {filename} ({size / (1024 * 1024):.1f} МБ)"
+                )
+            )
+            status = "VACUUM INTO..."
+        elif operation == "incremental_vacuum":
+            worker = WriteWorker(self.db_manager, incremental_vacuum, parent=self)
+            worker.succeeded.connect(
+                lambda pages: self.status_label.setText(f"Освобождено страниц: {pages}")
+            )
+            status = "incremental_vacuum..."
+        else:
+            worker = WriteWorker(self.db_manager, optimize, parent=self)
+            worker.succeeded.connect(lambda _: self.status_label.setText("PRAGMA optimize выполнен."))
+            status = "PRAGMA optimize..."
+        worker.failed.connect(lambda error: QMessageBox.critical(self, "Ошибка", error))
+        worker.finished.connect(self.on_finished)
+        self.worker = worker
+        self.status_label.setText(status)
+        self.progress_bar.setRange(0, 0)
+        for button in self.buttons:
+            button.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        worker.start()
+
+    def on_backup_progress(self, copied: int, total: int) -> None:
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(copied)
+
+    def cancel_work(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def on_finished(self) -> None:
+        cancelled = self.worker is not None and self.worker.cancelled
+        self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(0 if cancelled else 1)
+        if cancelled:
+            self.status_label.setText("Операция отменена.")
+        self.worker = None
+        for button in self.buttons:
+            button.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+        self.refresh_info()
+
+    def reject(self) -> None:
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().reject()
@@ -0,0 +1,112 @@
+# exporter.py
+import csv
+import json
+import os
+import sqlite3
+from typing import List, Any, Optional, Callable, Sequence
+from db_manager import DBManager, open_text, quote_identifier
+
+EXPORT_BATCH = 5000   # строк в одном вызове fetchmany
+FORMATS = ("csv", "tsv", "jsonl")
+
+
+def guess_format(filename: str) -> str:
+    """Определяет формат выгрузки по расширению (с учётом .gz)."""
+    name = filename.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    for fmt in FORMATS:
+        if name.endswith("." + fmt):
+            return fmt
+    return "csv"
+
+
+def _plain(value: Any) -> Any:
+    # BLOB записывается шестнадцатеричной строкой
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def export_query(
+    db_manager: DBManager,
+    sql: str,
+    filename: str,
+    params: Sequence[Any] = (),
+    fmt: Optional[str] = None,
+    progress_callback: Optional[Callable[[int], None]] = None
+) -> int:
+    """
+    Выгружает результат запроса в CSV/TSV/JSONL (*.gz – со сжатием).
+    Курсор читается пачками fetchmany и сразу пишется в файл, поэтому память
+    не зависит от размера результата. Читает через подключение только для чтения
+    из пула, поэтому может выполняться в фоновом потоке.
+    progress_callback(строк записано) может бросить OperationCancelled – тогда
+    недописанный файл удаляется.
+    Возвращает число выгруженных строк.
+    """
+    fmt = fmt or guess_format(filename)
+    total = 0
+    try:
+        with db_manager.read_connection() as conn:
+            total = _write_rows(conn, sql, params, filename, fmt, progress_callback)
+    except BaseException:
+        if os.path.exists(filename):
+            os.remove(filename)
+        raise
+    return total
+
+
+def _write_rows(
+    conn: sqlite3.Connection,
+    sql: str,
+    params: Sequence[Any],
+    filename: str,
+    fmt: str,
+    progress_callback: Optional[Callable[[int], None]]
+) -> int:
+    total = 0
+    cur = conn.execute(sql, params)
+    try:
+        if not cur.description:
+            raise Exception("Запрос не возвращает строк.")
+        columns: List[str] = [col[0] for col in cur.description]
+        with open_text(filename, "w") as f:
+            if fmt == "jsonl":
+                dumps = json.JSONEncoder(ensure_ascii=False, default=_plain).encode
+                while True:
+                    rows = cur.fetchmany(EXPORT_BATCH)
+                    if not rows:
+                        break
+                    f.writelines(dumps(dict(zip(columns, row))) + "\n" for row in rows)
+                    total += len(rows)
+                    if progress_callback:
+                        progress_callback(total)
+            else:
+                writer = csv.writer(f, delimiter="\t" if fmt == "tsv" else ",")
+                writer.writerow(columns)
+                while True:
+                    rows = cur.fetchmany(EXPORT_BATCH)
+                    if not rows:
+                        break
+                    writer.writerows([_plain(value) for value in row] for row in rows)
+                    total += len(rows)
+                    if progress_callback:
+                        progress_callback(total)
+    finally:
+        cur.close()
+    return total
+
+
+def export_table(
+    db_manager: DBManager,
+    table_name: str,
+    filename: str,
+    fmt: Optional[str] = None,
+    progress_callback: Optional[Callable[[int], None]] = None
+) -> int:
+    """Выгружает всю таблицу; см. export_query."""
+    return export_query(
+        db_manager, f"SELECT * FROM {quote_identifier(table_name)}", filename,
+        fmt=fmt, progress_callback=progress_callback
+    )
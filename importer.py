@@ -0,0 +1,151 @@
+# importer.py
+import csv
+import gzip
+import io
+import json
+import os
+from typing import List, Any, Iterator, Optional, Callable
+from db_manager import DBManager, coerce_value
+
+READ_BUFFER = 1024 * 1024   # размер буфера чтения файла, байт
+FORMATS = ("csv", "tsv", "jsonl")
+
+
+def guess_format(filename: str) -> str:
+    """Определяет формат файла по расширению (с учётом .gz)."""
+    name = filename.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    for fmt in FORMATS:
+        if name.endswith("." + fmt):
+            return fmt
+    if name.endswith(".json") or name.endswith(".ndjson"):
+        return "jsonl"
+    return "csv"
+
+
+class RecordReader:
+    """
+    Потоковое чтение записей из CSV/TSV/JSONL (в том числе *.gz) блоками по READ_BUFFER.
+    Для CSV/TSV с заголовком и для JSONL header содержит имена полей
+    после чтения первой записи; position() – сколько байт файла уже прочитано.
+    """
+    def __init__(self, filename: str, fmt: Optional[str] = None, has_header: bool = True) -> None:
+        self.filename = filename
+        self.fmt = fmt or guess_format(filename)
+        self.has_header = has_header
+        self.size = os.path.getsize(filename)
+        self.header: Optional[List[str]] = None
+        self._raw = open(filename, "rb", buffering=READ_BUFFER)
+        stream: Any = self._raw
+        if filename.lower().endswith(".gz"):
+            stream = gzip.GzipFile(fileobj=self._raw)
+        self._text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        self._records = self._iter_jsonl() if self.fmt == "jsonl" else self._iter_delimited()
+
+    def position(self) -> int:
+        return self._raw.tell()
+
+    def close(self) -> None:
+        self._text.close()
+        self._raw.close()
+
+    def __enter__(self) -> "RecordReader":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def peek_header(self) -> Optional[List[str]]:
+        """Читает первую запись, чтобы узнать заголовок, не теряя её."""
+        first = next(self._records, None)
+        if first is not None:
+            records = self._records
+
+            def chained() -> Iterator[Any]:
+                yield first
+                yield from records
+            self._records = chained()
+        return self.header
+
+    def __iter__(self) -> Iterator[Any]:
+        return self._records
+
+    def _iter_delimited(self) -> Iterator[List[str]]:
+        reader = csv.reader(self._text, delimiter="\t" if self.fmt == "tsv" else ",")
+        if self.has_header:
+            self.header = next(reader, None)
+        for row in reader:
+            if row:
+                yield row
+
+    def _iter_jsonl(self) -> Iterator[dict]:
+        for line in self._text:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if self.header is None:
+                self.header = list(record.keys())
+            yield record
+
+
+def import_file(
+    db_manager: DBManager,
+    filename: str,
+    table_name: str,
+    fmt: Optional[str] = None,
+    has_header: bool = True,
+    fast: bool = False,
+    defer_indexes: bool = False,
+    progress_callback: Optional[Callable[[int, int, int], None]] = None,
+    columns_info: Optional[List[Any]] = None
+) -> int:
+    """
+    Импортирует файл в существующую таблицу.
+    Столбцы сопоставляются по заголовку (или по порядку, если заголовка нет);
+    значения приводятся к типу столбца по тем же правилам, что и в редакторе строк.
+    progress_callback(строк, байт прочитано, размер файла) может бросить
+    OperationCancelled – тогда импорт откатывается целиком.
+    columns_info (результат get_table_info) передаётся при вызове из фонового потока.
+    Возвращает число загруженных строк.
+    """
+    if columns_info is None:
+        columns_info = db_manager.get_table_info(table_name)
+    types = {col[1]: (col[2] or "TEXT").upper() for col in columns_info}
+    with RecordReader(filename, fmt, has_header) as reader:
+        header = reader.peek_header()
+        if header is None:
+            columns = [col[1] for col in columns_info]
+        else:
+            unknown = [name for name in header if name not in types]
+            if unknown and reader.fmt != "jsonl":
+                raise Exception(f"В таблице {table_name} нет столбцов: {', '.join(unknown)}")
+            columns = [name for name in header if name in types]
+        if not columns:
+            raise Exception("Нет столбцов для импорта.")
+        col_types = [types[name] for name in columns]
+
+        def rows() -> Iterator[List[Any]]:
+            for line_no, record in enumerate(reader, start=2 if has_header else 1):
+                if isinstance(record, dict):
+                    values = [record.get(name) for name in columns]
+                else:
+                    values = record[:len(columns)]
+                    values += [""] * (len(columns) - len(values))
+                try:
+                    yield [
+                        coerce_value(value, col_type) if isinstance(value, str) else value
+                        for value, col_type in zip(values, col_types)
+                    ]
+                except ValueError as e:
+                    raise Exception(f"Запись {line_no}: {e}") from e
+
+        def on_progress(count: int) -> None:
+            if progress_callback:
+                progress_callback(count, reader.position(), reader.size)
+
+        return db_manager.bulk_load(
+            table_name, columns, rows(), fast=fast, defer_indexes=defer_indexes,
+            progress_callback=on_progress
+        )
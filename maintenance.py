@@ -0,0 +1,55 @@
+# maintenance.py
+import os
+import sqlite3
+from typing import Any, Dict
+
+
+def database_info(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Размер базы в страницах, свободные страницы и режимы обслуживания."""
+    info: Dict[str, Any] = {
+        name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+        for name in ("page_size", "page_count", "freelist_count", "auto_vacuum", "journal_mode")
+    }
+    info["size"] = info["page_size"] * info["page_count"]
+    info["free_size"] = info["page_size"] * info["freelist_count"]
+    return info
+
+
+def vacuum_into(conn: sqlite3.Connection, filename: str) -> int:
+    """
+    Записывает дефрагментированную копию базы (VACUUM INTO) в новый файл.
+    При ошибке или отмене недописанный файл удаляется. Возвращает размер файла.
+    """
+    if os.path.exists(filename):
+        os.remove(filename)  # VACUUM INTO не перезаписывает существующий файл
+    try:
+        conn.execute("VACUUM INTO ?", (filename,))
+    except BaseException:
+        if os.path.exists(filename):
+            os.remove(filename)
+        raise
+    return os.path.getsize(filename)
+
+
+def incremental_vacuum(conn: sqlite3.Connection, pages: int = 0) -> int:
+    """
+    Возвращает свободные страницы файловой системе (pages=0 – все).
+    Работает только при auto_vacuum=INCREMENTAL; включение режима для
+    существующей базы требует полного VACUUM.
+    Возвращает число освобождённых страниц.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        raise Exception(
+            "Для базы не включён режим auto_vacuum=INCREMENTAL "
+            "(PRAGMA auto_vacuum=INCREMENTAL и затем VACUUM)."
+        )
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    conn.commit()
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def optimize(conn: sqlite3.Connection) -> None:
+    """PRAGMA optimize: обновляет статистику планировщика там, где это нужно."""
+    conn.execute("PRAGMA optimize").fetchall()
+    conn.commit()
@@ -0,0 +1,88 @@
+# pool.py
+import pathlib
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Callable, Iterator
+
+POOL_SIZE = 4   # подключений только для чтения (и потоков фонового пула)
+
+
+def read_only_uri(db_file: str) -> str:
+    """URI для открытия файла базы только на чтение."""
+    return pathlib.Path(db_file).resolve().as_uri() + "?mode=ro"
+
+
+class ReadPool:
+    """
+    Пул подключений только для чтения (URI mode=ro).
+    Подключения создаются по требованию, не более size, и могут использоваться
+    из любого потока, но одновременно только одним. В режиме WAL читатели
+    не блокируются записью через основное подключение.
+    """
+    def __init__(
+        self,
+        db_file: str,
+        size: int = POOL_SIZE,
+        configure: Optional[Callable[[sqlite3.Connection], None]] = None
+    ) -> None:
+        self.db_file = db_file
+        self.size = size
+        self.configure = configure
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _create(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(read_only_uri(self.db_file), uri=True, check_same_thread=False)
+        if self.configure:
+            self.configure(conn)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._closed:
+                raise Exception("Пул подключений закрыт.")
+            if len(self._all) < self.size:
+                conn = self._create()
+                self._all.append(conn)
+                return conn
+        while True:
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                if self._closed:
+                    raise Exception("Пул подключений закрыт.")
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if self._closed:
+                conn.close()
+                return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """Закрывает свободные подключения; занятые закроются при возврате."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
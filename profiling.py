@@ -0,0 +1,147 @@
+# profiling.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Any, Dict, Iterator, Optional
+from settings import SETTINGS_DIR, get_setting, set_setting
+
+RING_SIZE = 500                # сколько последних замеров держать в памяти
+PROFILE_STEPS = 1000           # шагов VM между вызовами счётчика
+DEFAULT_SLOW_MS = 500          # порог медленного запроса по умолчанию, мс
+SLOW_LOG_FILE = os.path.join(SETTINGS_DIR, "slow_queries.log")
+SQL_PREVIEW_CHARS = 2000       # сколько символов текста запроса сохранять
+
+
+class QueryLog:
+    """
+    Журнал замеров выполнения команд: кольцевой буфер последних RING_SIZE записей
+    и постоянный журнал медленных запросов (JSON Lines в каталоге настроек).
+    Запись – словарь: time, source, sql, seconds, rows, steps, error.
+    Потокобезопасен: команды замеряются и в фоновых потоках.
+    """
+    def __init__(self, size: int = RING_SIZE, slow_log_file: str = SLOW_LOG_FILE) -> None:
+        self.slow_log_file = slow_log_file
+        self._records: "deque[Dict[str, Any]]" = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.slow_ms = int(get_setting("slow_query_ms", DEFAULT_SLOW_MS))
+
+    def set_slow_threshold(self, slow_ms: int) -> None:
+        """Задаёт порог медленного запроса (мс) и сохраняет его в настройках."""
+        self.slow_ms = slow_ms
+        set_setting("slow_query_ms", slow_ms)
+
+    def record(
+        self,
+        source: str,
+        sql: str,
+        seconds: float,
+        rows: int = -1,
+        steps: int = 0,
+        error: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Добавляет замер; медленные запросы дописываются в журнал на диске."""
+        entry = {
+            "time": time.time(),
+            "source": source,
+            "sql": sql[:SQL_PREVIEW_CHARS],
+            "seconds": seconds,
+            "rows": rows,
+            "steps": steps,
+            "error": error,
+        }
+        with self._lock:
+            self._records.append(entry)
+        if self.slow_ms >= 0 and seconds * 1000 >= self.slow_ms:
+            self._write_slow(entry)
+        return entry
+
+    def _write_slow(self, entry: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.slow_log_file), exist_ok=True)
+            with self._lock, open(self.slow_log_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError:
+            pass  # журнал – вспомогательный, его недоступность не должна мешать работе
+
+    def recent(self) -> List[Dict[str, Any]]:
+        """Последние замеры, от старых к новым."""
+        with self._lock:
+            return list(self._records)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+    def slow_queries(self, limit: int = RING_SIZE) -> List[Dict[str, Any]]:
+        """Последние limit записей журнала медленных запросов."""
+        try:
+            with open(self.slow_log_file, "r", encoding="utf-8") as f:
+                lines = deque(f, maxlen=limit)
+        except OSError:
+            return []
+        result = []
+        for line in lines:
+            try:
+                result.append(json.loads(line))
+            except ValueError:
+                continue
+        return result
+
+    def clear_slow_log(self) -> None:
+        with self._lock:
+            if os.path.exists(self.slow_log_file):
+                os.remove(self.slow_log_file)
+
+    @contextmanager
+    def measure(self, conn: sqlite3.Connection, source: str, sql: str) -> Iterator[Dict[str, Any]]:
+        """
+        Замеряет выполнение блока на подключении: время и шаги VM (через
+        set_progress_handler). Блок может записать в выданный словарь "rows" –
+        число полученных или изменённых строк. Подключение не должно
+        одновременно использоваться другим потоком.
+        """
+        stat: Dict[str, Any] = {"rows": -1, "steps": 0}
+
+        def count_steps() -> int:
+            stat["steps"] += PROFILE_STEPS
+            return 0
+
+        conn.set_progress_handler(count_steps, PROFILE_STEPS)
+        started = time.perf_counter()
+        error = None
+        try:
+            yield stat
+        except BaseException as e:
+            error = str(e) or type(e).__name__
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            conn.set_progress_handler(None, 0)
+            self.record(source, sql, seconds, stat["rows"], stat["steps"], error)
+
+
+def format_stat(entry: Dict[str, Any]) -> str:
+    """Краткая строка замера (время и шаги VM) для панели вывода."""
+    return f"{entry['seconds'] * 1000:.1f} мс, шагов VM: ~{entry['steps']}"
+
+
+def short_sql(sql: str, limit: int = 60) -> str:
+    """Текст команды в одну строку, обрезанный до limit символов."""
+    text = " ".join(sql.split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def format_size(size: Optional[int]) -> str:
+    """Размер в байтах в удобных единицах."""
+    if size is None:
+        return "—"
+    value = float(size)
+    for unit in ("Б", "КБ", "МБ", "ГБ"):
+        if value < 1024 or unit == "ГБ":
+            return f"{value:.0f} {unit}" if unit == "Б" else f"{value:.1f} {unit}"
+        value /= 1024
+    return str(size)
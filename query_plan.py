@@ -0,0 +1,241 @@
+# query_plan.py
+import itertools
+import re
+import sqlite3
+import time
+from typing import List, Any, Dict, Tuple, Optional
+from db_manager import quote_identifier
+
+LARGE_TABLE_ROWS = 10000   # с какого размера полный просмотр таблицы считается проблемой
+
+_explain_counter = itertools.count()
+
+_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?("(?:[^"]|"")+"|\S+)(?: AS (\S+))?', re.IGNORECASE)
+_SOURCE_RE = re.compile(
+    r'\b(?:FROM|JOIN)\s+((?:"(?:[^"]|"")+"|\w+)(?:\s*\.\s*(?:"(?:[^"]|"")+"|\w+))?)'
+    r'(?:\s+(?:AS\s+)?(\w+))?',
+    re.IGNORECASE
+)
+_IDENT = r'(?:(\w+|"(?:[^"]|"")+")\s*\.\s*)?(\w+|"(?:[^"]|"")+")'
+_COMPARE_LEFT_RE = re.compile(_IDENT + r'\s*(==|=|<=|>=|<>|!=|<|>|\bIN\b|\bBETWEEN\b|\bIS\b|\bLIKE\b)', re.IGNORECASE)
+_COMPARE_RIGHT_RE = re.compile(r'(==|=|<=|>=|<|>)\s*' + _IDENT, re.IGNORECASE)
+_ORDER_RE = re.compile(r'\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|\bOFFSET\b|$)', re.IGNORECASE | re.DOTALL)
+_KEYWORDS = {
+    "where", "join", "on", "left", "right", "inner", "outer", "cross", "natural", "full",
+    "group", "order", "limit", "using", "union", "except", "intersect", "window", "having",
+    "indexed", "not", "set", "values", "returning"
+}
+
+
+def _unquote(name: str) -> str:
+    name = name.strip()
+    if name.startswith('"') and name.endswith('"'):
+        return name[1:-1].replace('""', '"')
+    return name
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[Tuple[int, int, str]]:
+    """Выполняет EXPLAIN QUERY PLAN и возвращает узлы (id, parent, detail)."""
+    # EXPLAIN не проверяет версию схемы сам: сначала обычное чтение подгружает
+    # свежую схему (новые индексы), а уникальный комментарий не даёт sqlite3
+    # взять из кэша оператор, подготовленный по старой схеме
+    conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+    cur = conn.execute(f"EXPLAIN QUERY PLAN {sql}\n-- {next(_explain_counter)}")
+    return [(row[0], row[1], row[3]) for row in cur.fetchall()]
+
+
+def table_sources(sql: str) -> Dict[str, str]:
+    """Сопоставляет имена и псевдонимы из FROM/JOIN с именами таблиц."""
+    sources: Dict[str, str] = {}
+    for match in _SOURCE_RE.finditer(sql):
+        name = _unquote(match.group(1).split(".")[-1])
+        alias = match.group(2)
+        sources[name] = name
+        if alias and alias.lower() not in _KEYWORDS:
+            sources[alias] = name
+    return sources
+
+
+def estimate_rows(conn: sqlite3.Connection, table_name: str) -> Tuple[int, bool]:
+    """
+    Оценка числа строк: из sqlite_stat1 (после ANALYZE), иначе max(rowid) –
+    это поиск по B-дереву, а не просмотр таблицы.
+    Возвращает (оценка, получена ли она из статистики).
+    """
+    try:
+        row = conn.execute(
+            "SELECT stat FROM sqlite_stat1 WHERE tbl=? ORDER BY idx IS NULL LIMIT 1", (table_name,)
+        ).fetchone()
+        if row and row[0]:
+            return int(row[0].split()[0]), True
+    except sqlite3.Error:
+        pass
+    try:
+        row = conn.execute(f"SELECT max(rowid) FROM {quote_identifier(table_name)}").fetchone()
+        return int(row[0] or 0), False
+    except sqlite3.Error:
+        return 0, False
+
+
+def _filter_columns(sql: str, table_name: str, alias: str, columns: List[str]) -> Tuple[List[str], List[str]]:
+    """Столбцы таблицы из условий сравнения: (равенства, диапазоны/прочие)."""
+    known = {col.lower(): col for col in columns}
+    qualifiers = {alias.lower(), table_name.lower()}
+    equality: List[str] = []
+    ranges: List[str] = []
+
+    def add(qualifier: Optional[str], name: str, op: str) -> None:
+        if qualifier and _unquote(qualifier).lower() not in qualifiers:
+            return
+        col = known.get(_unquote(name).lower())
+        if col is None or col in equality:
+            return
+        if op.strip().upper() in ("=", "==", "IN", "IS"):
+            if col in ranges:
+                ranges.remove(col)
+            equality.append(col)
+        elif col not in ranges:
+            ranges.append(col)
+
+    for match in _COMPARE_LEFT_RE.finditer(sql):
+        add(match.group(1), match.group(2), match.group(3))
+    for match in _COMPARE_RIGHT_RE.finditer(sql):
+        add(match.group(2), match.group(3), match.group(1))
+    return equality, ranges
+
+
+def _order_columns(sql: str, table_name: str, alias: str, columns: List[str]) -> List[str]:
+    match = _ORDER_RE.search(sql)
+    if not match:
+        return []
+    known = {col.lower(): col for col in columns}
+    qualifiers = {alias.lower(), table_name.lower()}
+    result = []
+    for term in match.group(1).split(","):
+        parts = term.strip().split()
+        if not parts:
+            continue
+        ident = parts[0]
+        qualifier, _, name = ident.rpartition(".")
+        if qualifier and _unquote(qualifier).lower() not in qualifiers:
+            return []
+        col = known.get(_unquote(name).lower())
+        if col is None:
+            return []
+        result.append(col)
+    return result
+
+
+def _has_index_prefix(conn: sqlite3.Connection, table_name: str, columns: List[str]) -> bool:
+    """Есть ли индекс, начинающийся с тех же столбцов."""
+    for index in conn.execute(f"PRAGMA index_list({quote_identifier(table_name)})").fetchall():
+        info = conn.execute(f"PRAGMA index_info({quote_identifier(index[1])})").fetchall()
+        names = [row[2] for row in sorted(info)]
+        if names[:len(columns)] == columns:
+            return True
+    return False
+
+
+def advise(
+    conn: sqlite3.Connection,
+    sql: str,
+    plan: List[Tuple[int, int, str]],
+    large_rows: int = LARGE_TABLE_ROWS
+) -> List[Dict[str, Any]]:
+    """
+    Ищет в плане полные просмотры больших таблиц и предлагает индексы.
+    Столбцы индекса: сначала участвующие в сравнениях на равенство, затем
+    в диапазонах; если фильтров нет, но план сортирует во временном B-дереве,
+    предлагается индекс по столбцам ORDER BY.
+    Возвращает список словарей: table, detail (узел плана), rows, from_stats,
+    message, create_sql (или None).
+    """
+    sources = table_sources(sql)
+    temp_sort = any("TEMP B-TREE FOR ORDER BY" in detail.upper() for _, _, detail in plan)
+    result: List[Dict[str, Any]] = []
+    seen = set()
+    for _, _, detail in plan:
+        match = _SCAN_RE.match(detail)
+        if not match:
+            continue
+        alias = _unquote(match.group(2) or match.group(1))
+        table_name = sources.get(alias, alias)
+        if table_name.lower() in seen:
+            continue
+        columns = [row[1] for row in conn.execute(
+            f"PRAGMA table_info({quote_identifier(table_name)})"
+        ).fetchall()]
+        if not columns:
+            continue  # подзапрос, CTE или представление
+        seen.add(table_name.lower())
+        rows, from_stats = estimate_rows(conn, table_name)
+        if rows < large_rows:
+            continue
+        equality, ranges = _filter_columns(sql, table_name, alias, columns)
+        index_columns = equality + ranges[:1]
+        if not index_columns and temp_sort:
+            index_columns = _order_columns(sql, table_name, alias, columns)
+        suggestion: Dict[str, Any] = {
+            "table": table_name,
+            "detail": detail,
+            "rows": rows,
+            "from_stats": from_stats,
+            "create_sql": None,
+        }
+        approx = "" if from_stats else "~"
+        if index_columns and not _has_index_prefix(conn, table_name, index_columns):
+            index_name = "idx_" + "_".join([table_name] + index_columns)
+            index_name = re.sub(r'\W+', "_", index_name)
+            cols = ", ".join(quote_identifier(col) for col in index_columns)
+            suggestion["create_sql"] = (
+                f"CREATE INDEX {quote_identifier(index_name)} ON {quote_identifier(table_name)} ({cols})"
+            )
+            suggestion["message"] = (
+                f"Полный просмотр {table_name} ({approx}{rows} строк): индекс по {', '.join(index_columns)}"
+            )
+        else:
+            suggestion["message"] = (
+                f"Полный просмотр {table_name} ({approx}{rows} строк): подходящих столбцов для индекса не найдено"
+            )
+        result.append(suggestion)
+    return result
+
+
+def time_query(conn: sqlite3.Connection, sql: str, batch: int = 5000) -> Tuple[float, int]:
+    """Выполняет запрос, вычитывает все строки и возвращает (секунды, строк)."""
+    started = time.perf_counter()
+    cur = conn.execute(sql)
+    rows = 0
+    while True:
+        chunk = cur.fetchmany(batch)
+        if not chunk:
+            break
+        rows += len(chunk)
+    return time.perf_counter() - started, rows
+
+
+def create_index_and_time(conn: sqlite3.Connection, sql: str, create_sql: str) -> Tuple[float, float, int]:
+    """
+    Замеряет запрос, создаёт индекс и замеряет снова.
+    Замеры идут с PRAGMA query_only, чтобы не выполнить случайно изменяющую команду.
+    Возвращает (секунд до, секунд после, строк).
+    """
+    conn.execute("PRAGMA query_only=ON")
+    try:
+        before, _ = time_query(conn, sql)
+    finally:
+        conn.execute("PRAGMA query_only=OFF")
+    conn.execute(create_sql)
+    conn.commit()
+    conn.execute("PRAGMA query_only=ON")
+    try:
+        after, rows = time_query(conn, sql)
+    finally:
+        conn.execute("PRAGMA query_only=OFF")
+    return before, after, rows
+
+
+def run_analyze(conn: sqlite3.Connection) -> None:
+    """Собирает статистику sqlite_stat1 для планировщика."""
+    conn.execute("ANALYZE")
+    conn.commit()
@@ -0,0 +1,223 @@
+# result_cache.py
+import os
+import pickle
+import re
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Any, Dict, Iterator, Optional, Sequence, Tuple, Callable
+
+MEMORY_BUDGET = 64 * 1024 * 1024      # байт результатов в памяти
+SPILL_THRESHOLD = 8 * 1024 * 1024     # результат больше этого пишется во временный файл
+DISK_BUDGET = 512 * 1024 * 1024       # байт во временных файлах
+SIZE_SAMPLE_ROWS = 200                # строк для оценки размера результата
+
+_LITERAL_RE = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+# Функции, результат которых зависит не только от данных. Функции даты и времени
+# без аргументов означают 'now', поэтому volatile любой их вызов
+_VOLATILE_RE = re.compile(
+    r"\b(random|randomblob|changes|total_changes|last_insert_rowid|current_time|current_date|"
+    r"current_timestamp)\b|'now'|"
+    r"\b(date|time|datetime|julianday|unixepoch|strftime|timediff)\s*\(",
+    re.IGNORECASE
+)
+_WRITE_RE = re.compile(r"\b(insert|update|delete|replace|create|drop|alter|pragma|attach)\b", re.IGNORECASE)
+# Обращения к схеме temp: её изменения не видны в data_version
+_TEMP_RE = re.compile(r"(?:\btemp\b|\"temp\"|\[temp\]|`temp`)\s*\.|\bsqlite_temp_", re.IGNORECASE)
+
+
+def normalize_sql(sql: str) -> str:
+    """Текст запроса без лишних пробелов и завершающей ';' (строковые литералы не меняются)."""
+    parts = _LITERAL_RE.split(sql.strip().rstrip(";").strip())
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", parts[i])
+    return "".join(parts)
+
+
+def is_cacheable(sql: str) -> bool:
+    """Кэшируются только читающие запросы без функций, зависящих от времени и случая."""
+    head = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    if head not in ("SELECT", "VALUES", "WITH"):
+        return False
+    if _VOLATILE_RE.search(sql) or _TEMP_RE.search(sql):
+        return False
+    code = "".join(_LITERAL_RE.split(sql)[::2])
+    return head != "WITH" or not _WRITE_RE.search(code)
+
+
+def has_temp_tables(conn: sqlite3.Connection, ignore: Sequence[str] = ()) -> bool:
+    """
+    Есть ли на подключении временные таблицы или представления (кроме ignore).
+    Они видны только этому подключению, и их изменения не меняют data_version,
+    поэтому результаты запросов на таком подключении не кэшируются.
+    """
+    names = ", ".join("?" for _ in ignore)
+    sql = "SELECT 1 FROM temp.sqlite_master WHERE type IN ('table', 'view')"
+    if ignore:
+        sql += f" AND name NOT IN ({names})"
+    return conn.execute(sql + " LIMIT 1", tuple(ignore)).fetchone() is not None
+
+
+def estimate_size(rows: Sequence[Any]) -> int:
+    """Приблизительный объём строк в памяти (по выборке первых строк)."""
+    if not rows:
+        return 0
+    sample = rows[:SIZE_SAMPLE_ROWS]
+    total = 0
+    for row in sample:
+        total += 56 + 8 * len(row)
+        for value in row:
+            total += len(value) + 49 if isinstance(value, (str, bytes)) else 24
+    return total * len(rows) // len(sample)
+
+
+class CachedResult:
+    """
+    Закэшированный результат: столбцы и строки в памяти либо во временном файле
+    (пачками pickle). batches() выдаёт строки теми же пачками.
+    """
+    def __init__(self, columns: List[str], token: Tuple[int, ...]) -> None:
+        self.columns = columns
+        self.token = token
+        self.row_count = 0
+        self.size = 0
+        self._batches: List[List[Any]] = []
+        self.spill_file: Optional[str] = None
+
+    def add(self, batch: List[Any], spill_threshold: int) -> None:
+        self.row_count += len(batch)
+        self.size += estimate_size(batch)
+        if self.spill_file is None and self.size <= spill_threshold:
+            self._batches.append(batch)
+            return
+        if self.spill_file is None:
+            fd, self.spill_file = tempfile.mkstemp(prefix="sql_editor_cache_", suffix=".bin")
+            with os.fdopen(fd, "wb") as f:
+                for pending in self._batches:
+                    pickle.dump(pending, f, pickle.HIGHEST_PROTOCOL)
+            self._batches = []
+        with open(self.spill_file, "ab") as f:
+            pickle.dump(batch, f, pickle.HIGHEST_PROTOCOL)
+
+    def batches(self) -> Iterator[List[Any]]:
+        if self.spill_file is None:
+            yield from self._batches
+            return
+        with open(self.spill_file, "rb") as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    break
+
+    def discard(self) -> None:
+        self._batches = []
+        if self.spill_file is not None:
+            try:
+                os.remove(self.spill_file)
+            except OSError:
+                pass
+            self.spill_file = None
+
+
+class ResultCache:
+    """
+    Кэш результатов читающих запросов с ключом (нормализованный SQL, параметры).
+    Запись действительна, пока не изменилась версия данных и схемы, которую
+    возвращает data_version (DBManager.data_version).
+    Вытеснение LRU по бюджетам памяти и временных файлов.
+    """
+    def __init__(
+        self,
+        data_version: Callable[[], Tuple[int, ...]],
+        memory_budget: int = MEMORY_BUDGET,
+        spill_threshold: int = SPILL_THRESHOLD,
+        disk_budget: int = DISK_BUDGET
+    ) -> None:
+        self.memory_budget = memory_budget
+        self.spill_threshold = spill_threshold
+        self.disk_budget = disk_budget
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, Tuple[Any, ...]], CachedResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._data_version = data_version
+
+    def token(self) -> Tuple[int, ...]:
+        """Текущая версия данных и схемы базы."""
+        return self._data_version()
+
+    @staticmethod
+    def key(sql: str, params: Sequence[Any] = ()) -> Tuple[str, Tuple[Any, ...]]:
+        return normalize_sql(sql), tuple(params)
+
+    def get(self, sql: str, params: Sequence[Any] = ()) -> Optional[CachedResult]:
+        key = self.key(sql, params)
+        token = self.token()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.token != token:
+                del self._entries[key]
+                entry.discard()
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def start(self, columns: List[str], token: Tuple[int, ...]) -> CachedResult:
+        """
+        Начинает запись нового результата. token нужно получить до выполнения
+        запроса: если данные изменятся во время чтения, запись сразу окажется устаревшей.
+        """
+        return CachedResult(columns, token)
+
+    def put(self, sql: str, params: Sequence[Any], entry: CachedResult) -> None:
+        if entry.spill_file is None and entry.size > self.memory_budget:
+            entry.discard()
+            return
+        if entry.spill_file is not None and entry.size > self.disk_budget:
+            entry.discard()
+            return
+        key = self.key(sql, params)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                old.discard()
+            self._entries[key] = entry
+            self._evict()
+
+    def _evict(self) -> None:
+        while True:
+            memory = sum(e.size for e in self._entries.values() if e.spill_file is None)
+            disk = sum(e.size for e in self._entries.values() if e.spill_file is not None)
+            if memory <= self.memory_budget and disk <= self.disk_budget:
+                return
+            spilled = disk > self.disk_budget
+            for key, entry in self._entries.items():
+                if (entry.spill_file is not None) == spilled:
+                    del self._entries[key]
+                    entry.discard()
+                    break
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "memory": sum(e.size for e in self._entries.values() if e.spill_file is None),
+                "disk": sum(e.size for e in self._entries.values() if e.spill_file is not None),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in self._entries.values():
+                entry.discard()
+            self._entries.clear()
+
+    def close(self) -> None:
+        self.clear()
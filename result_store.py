@@ -0,0 +1,115 @@
+# result_store.py
+import marshal
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Any, Optional, Set
+
+RESULT_PAGE_ROWS = 1000                  # строк в одной странице результата
+RESULT_MEMORY_BUDGET = 64 * 1024 * 1024  # байт упакованных страниц в памяти
+DECODED_PAGES = 8                        # распакованных страниц для отображения
+
+
+class ResultStore:
+    """
+    Строки результата произвольного запроса с ограниченным расходом памяти.
+    Строки адресуются номером, поэтому rowid у результата не нужен.
+    Заполненная страница упаковывается (marshal) и хранится в памяти, пока
+    упакованные страницы укладываются в memory_budget; давно не читавшиеся
+    страницы сверх бюджета выгружаются во временную базу SQLite и при обращении
+    читаются оттуда – запрос заново не выполняется.
+    append вызывается из потока, читающего курсор, row – из потока GUI.
+    """
+    def __init__(
+        self,
+        columns: List[str],
+        memory_budget: int = RESULT_MEMORY_BUDGET,
+        page_rows: int = RESULT_PAGE_ROWS
+    ) -> None:
+        self.columns = list(columns)
+        self.memory_budget = memory_budget
+        self.page_rows = page_rows
+        self.row_count = 0
+        self.memory_size = 0
+        self.spilled_pages = 0
+        self._pages = 0   # заполненных страниц; следующая копится в _tail
+        self._tail: List[Any] = []
+        self._packed: "OrderedDict[int, bytes]" = OrderedDict()
+        self._decoded: "OrderedDict[int, List[Any]]" = OrderedDict()
+        self._on_disk: Set[int] = set()
+        self._spill: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def append(self, rows: List[Any]) -> None:
+        with self._lock:
+            for row in rows:
+                self._tail.append(tuple(row))
+                self.row_count += 1
+                if len(self._tail) == self.page_rows:
+                    self._seal()
+
+    def _seal(self) -> None:
+        data = marshal.dumps(self._tail)
+        self._tail = []
+        self._packed[self._pages] = data
+        self._pages += 1
+        self.memory_size += len(data)
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.memory_size > self.memory_budget and len(self._packed) > 1:
+            page, data = self._packed.popitem(last=False)
+            self.memory_size -= len(data)
+            if page not in self._on_disk:
+                self._spill_connection().execute("INSERT INTO pages (page, data) VALUES (?, ?)", (page, data))
+                self._on_disk.add(page)
+                self.spilled_pages += 1
+
+    def _spill_connection(self) -> sqlite3.Connection:
+        if self._spill is None:
+            # Пустое имя – временная база на диске, SQLite удаляет её при закрытии
+            conn = sqlite3.connect("", isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("PRAGMA cache_size = -2048")
+            conn.execute("CREATE TABLE pages (page INTEGER PRIMARY KEY, data BLOB)")
+            self._spill = conn
+        return self._spill
+
+    def row(self, index: int) -> Any:
+        with self._lock:
+            page = index // self.page_rows
+            rows = self._decoded.get(page)
+            if rows is not None:
+                self._decoded.move_to_end(page)
+            elif page == self._pages:
+                return self._tail[index % self.page_rows]
+            else:
+                rows = marshal.loads(self._load(page))
+                self._decoded[page] = rows
+                if len(self._decoded) > DECODED_PAGES:
+                    self._decoded.popitem(last=False)
+            return rows[index % self.page_rows]
+
+    def _load(self, page: int) -> bytes:
+        data = self._packed.get(page)
+        if data is not None:
+            self._packed.move_to_end(page)
+            return data
+        data = self._spill_connection().execute("SELECT data FROM pages WHERE page = ?", (page,)).fetchone()[0]
+        # Прочитанная страница снова держится в памяти; на диске она уже есть
+        self._packed[page] = data
+        self.memory_size += len(data)
+        self._evict()
+        return data
+
+    def close(self) -> None:
+        with self._lock:
+            self._tail = []
+            self._packed.clear()
+            self._decoded.clear()
+            self._on_disk.clear()
+            self.memory_size = 0
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
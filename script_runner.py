@@ -0,0 +1,165 @@
+# script_runner.py
+import sqlite3
+import time
+from typing import List, Any, Dict, Iterable, Optional, Callable, Sequence
+from profiling import QueryLog, PROFILE_STEPS
+from result_cache import ResultCache, has_temp_tables, is_cacheable
+
+FETCH_BATCH = 1000            # строк в одной пачке результата
+STATEMENT_CACHE_SIZE = 512    # скомпилированных команд в кэше подключения (cached_statements)
+
+
+class ScriptRunner:
+    """
+    Выполняет команды скрипта по одной на заданном подключении.
+    Для каждой команды возвращается результат – словарь: index, sql, columns,
+    rows (получено или изменено, -1 – неизвестно), seconds, steps, error, cached.
+    Строки SELECT передаются пачками в on_rows и в памяти не накапливаются.
+    stop_on_error – остановиться на первой ошибке (открытая транзакция
+    откатывается) или записать ошибку и продолжить со следующей команды.
+    Повторно выполняемые команды берутся из кэша скомпилированных операторов
+    sqlite3, если подключение открыто с достаточным cached_statements.
+    Если задан result_cache, читающие запросы вне транзакции отдаются из кэша,
+    пока данные и схема базы не изменились. Пока на подключении есть временные
+    таблицы или представления (кроме служебных ignore_temp), кэш не используется.
+    cancel() можно вызывать из другого потока.
+    """
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        query_log: Optional[QueryLog] = None,
+        source: str = "script",
+        stop_on_error: bool = True,
+        fetch_batch: int = FETCH_BATCH,
+        result_cache: Optional[ResultCache] = None,
+        ignore_temp: Sequence[str] = ()
+    ) -> None:
+        self.conn = conn
+        self.query_log = query_log
+        self.source = source
+        self.stop_on_error = stop_on_error
+        self.fetch_batch = fetch_batch
+        self.result_cache = result_cache
+        self.ignore_temp = tuple(ignore_temp)
+        self.cancelled = False
+        self.steps = 0
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        self.conn.interrupt()
+
+    def run(
+        self,
+        statements: Iterable[str],
+        on_columns: Optional[Callable[[List[str]], None]] = None,
+        on_rows: Optional[Callable[[List[Any]], None]] = None,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Выполняет команды; progress_callback(шагов VM) вызывается каждые PROFILE_STEPS шагов.
+        Если все команды прошли (или ошибки пропускались), открытая скриптом
+        транзакция фиксируется.
+        """
+        conn = self.conn
+
+        def on_progress() -> int:
+            self.steps += PROFILE_STEPS
+            if progress_callback:
+                progress_callback(self.steps)
+            return 1 if self.cancelled else 0
+
+        results: List[Dict[str, Any]] = []
+        conn.set_progress_handler(on_progress, PROFILE_STEPS)
+        failed = False
+        try:
+            for index, sql in enumerate(statements, start=1):
+                if self.cancelled:
+                    break
+                result = self._execute(index, sql, on_columns, on_rows)
+                results.append(result)
+                if on_result:
+                    on_result(result)
+                if result["error"] is not None and (self.stop_on_error or self.cancelled):
+                    failed = True
+                    break
+            if conn.in_transaction and not (failed or self.cancelled):
+                conn.commit()
+        finally:
+            conn.set_progress_handler(None, 0)
+            if conn.in_transaction:
+                conn.rollback()
+        return results
+
+    def _execute(
+        self,
+        index: int,
+        sql: str,
+        on_columns: Optional[Callable[[List[str]], None]],
+        on_rows: Optional[Callable[[List[Any]], None]]
+    ) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "index": index, "sql": sql, "columns": None, "rows": -1,
+            "seconds": 0.0, "steps": 0, "error": None, "cached": False,
+        }
+        started = time.perf_counter()
+        steps = self.steps
+        # Внутри транзакции запрос может видеть незафиксированные изменения,
+        # а временные таблицы меняются незаметно для data_version – без кэша
+        cache = self.result_cache
+        if cache is not None and (self.conn.in_transaction or not is_cacheable(sql)):
+            cache = None
+        try:
+            if cache is not None and has_temp_tables(self.conn, self.ignore_temp):
+                cache = None
+            token = cache.token() if cache is not None else None
+            cached = cache.get(sql) if cache is not None else None
+            if cached is not None:
+                result["cached"] = True
+                result["columns"] = cached.columns
+                if on_columns:
+                    on_columns(cached.columns)
+                for rows in cached.batches():
+                    if self.cancelled:
+                        break
+                    if on_rows:
+                        on_rows(rows)
+                result["rows"] = cached.row_count
+            else:
+                cur = self.conn.execute(sql)
+                if cur.description:
+                    result["columns"] = [col[0] for col in cur.description]
+                    if on_columns:
+                        on_columns(result["columns"])
+                    entry = cache.start(result["columns"], token) if cache is not None else None  # type: ignore[arg-type]
+                    total = 0
+                    while not self.cancelled:
+                        rows = cur.fetchmany(self.fetch_batch)
+                        if not rows:
+                            break
+                        total += len(rows)
+                        if entry is not None:
+                            entry.add(rows, cache.spill_threshold)  # type: ignore[union-attr]
+                            if entry.size > cache.disk_budget:  # type: ignore[union-attr]
+                                entry.discard()  # слишком большой результат не кэшируется
+                                entry = None
+                        if on_rows:
+                            on_rows(rows)
+                    result["rows"] = total
+                    cur.close()
+                    if entry is not None:
+                        if self.cancelled:
+                            entry.discard()
+                        else:
+                            cache.put(sql, (), entry)  # type: ignore[union-attr]
+                else:
+                    result["rows"] = cur.rowcount
+        except sqlite3.Error as e:
+            result["error"] = str(e)
+        result["seconds"] = time.perf_counter() - started
+        result["steps"] = self.steps - steps
+        if self.query_log is not None:
+            self.query_log.record(
+                self.source, sql, result["seconds"], result["rows"], result["steps"], result["error"]
+            )
+        return result
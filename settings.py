@@ -0,0 +1,50 @@
+# settings.py
+import json
+import os
+from typing import Any, Dict
+
+# Каталог настроек можно переопределить переменной окружения (например, для CI)
+SETTINGS_DIR = os.environ.get("SQL_EDITOR_HOME") or os.path.join(os.path.expanduser("~"), ".sql_editor")
+SETTINGS_FILE = os.path.join(SETTINGS_DIR, "settings.json")
+
+
+def load_settings() -> Dict[str, Any]:
+    """Читает настройки приложения; при отсутствии или повреждении файла – пустой словарь."""
+    try:
+        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_settings(data: Dict[str, Any]) -> None:
+    """Атомарно записывает настройки приложения."""
+    os.makedirs(SETTINGS_DIR, exist_ok=True)
+    tmp_file = SETTINGS_FILE + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, SETTINGS_FILE)
+
+
+def get_setting(key: str, default: Any = None) -> Any:
+    return load_settings().get(key, default)
+
+
+def set_setting(key: str, value: Any) -> None:
+    data = load_settings()
+    data[key] = value
+    save_settings(data)
+
+
+def get_db_setting(db_file: str, key: str, default: Any = None) -> Any:
+    """Возвращает настройку, сохранённую для конкретного файла базы."""
+    per_db = load_settings().get("databases", {})
+    return per_db.get(os.path.abspath(db_file), {}).get(key, default)
+
+
+def set_db_setting(db_file: str, key: str, value: Any) -> None:
+    data = load_settings()
+    per_db = data.setdefault("databases", {})
+    per_db.setdefault(os.path.abspath(db_file), {})[key] = value
+    save_settings(data)
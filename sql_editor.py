@@ -0,0 +1,274 @@
+# sql_editor.py
+import bisect
+import re
+import sqlite3
+from typing import List, Any, Dict, Optional
+from PyQt5.QtWidgets import QPlainTextEdit, QCompleter
+from PyQt5.QtCore import Qt, QTimer, QStringListModel
+from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont, QKeySequence, QTextCursor
+from db_manager import DBManager, quote_identifier
+from workers import PoolTask
+
+COMPLETE_DELAY_MS = 150     # пауза после ввода перед показом подсказок
+COMPLETE_MIN_CHARS = 2      # с какой длины слова подсказывать без Ctrl+Space
+MAX_COMPLETIONS = 100       # подсказок в списке
+
+SQL_KEYWORDS = (
+    "ABORT ACTION ADD AFTER ALL ALTER ALWAYS ANALYZE AND AS ASC ATTACH AUTOINCREMENT BEFORE BEGIN "
+    "BETWEEN BY CASCADE CASE CAST CHECK COLLATE COLUMN COMMIT CONFLICT CONSTRAINT CREATE CROSS CURRENT "
+    "CURRENT_DATE CURRENT_TIME CURRENT_TIMESTAMP DATABASE DEFAULT DEFERRABLE DEFERRED DELETE DESC DETACH "
+    "DISTINCT DO DROP EACH ELSE END ESCAPE EXCEPT EXCLUDE EXCLUSIVE EXISTS EXPLAIN FAIL FILTER FIRST "
+    "FOLLOWING FOR FOREIGN FROM FULL GENERATED GLOB GROUP GROUPS HAVING IF IGNORE IMMEDIATE IN INDEX "
+    "INDEXED INITIALLY INNER INSERT INSTEAD INTERSECT INTO IS ISNULL JOIN KEY LAST LEFT LIKE LIMIT MATCH "
+    "MATERIALIZED NATURAL NO NOT NOTHING NOTNULL NULL NULLS OF OFFSET ON OR ORDER OTHERS OUTER OVER "
+    "PARTITION PLAN PRAGMA PRECEDING PRIMARY QUERY RAISE RANGE RECURSIVE REFERENCES REGEXP REINDEX "
+    "RELEASE RENAME REPLACE RESTRICT RETURNING RIGHT ROLLBACK ROW ROWS SAVEPOINT SELECT SET STRICT TABLE "
+    "TEMP TEMPORARY THEN TIES TO TRANSACTION TRIGGER UNBOUNDED UNION UNIQUE UPDATE USING VACUUM VALUES "
+    "VIEW VIRTUAL WHEN WHERE WINDOW WITH WITHOUT "
+    "INTEGER REAL TEXT BLOB NUMERIC"
+).split()
+_KEYWORD_SET = frozenset(SQL_KEYWORDS)
+
+# Состояния блока (строки) для многострочных конструкций
+_NORMAL, _IN_COMMENT, _IN_STRING, _IN_IDENTIFIER = -1, 1, 2, 3
+_TOKEN_RE = re.compile(
+    r"(?P<comment>--.*)|(?P<block>/\*)|(?P<string>')|(?P<ident>\")"
+    r"|(?P<number>\b\d+(?:\.\d*)?(?:[eE][+-]?\d+)?\b)|(?P<word>[A-Za-z_][A-Za-z0-9_$]*)"
+)
+# Конец многострочной конструкции: '' и "" внутри – экранированные кавычки
+_CLOSE_RE = {
+    _IN_COMMENT: re.compile(r"\*/"),
+    _IN_STRING: re.compile(r"'(?!')|''"),
+    _IN_IDENTIFIER: re.compile(r"\"(?!\")|\"\""),
+}
+_STATE_KINDS = {_IN_COMMENT: "comment", _IN_STRING: "string", _IN_IDENTIFIER: "ident"}
+_WORD_BEFORE_CURSOR_RE = re.compile(r"(?:([A-Za-z_][\w$]*)\.)?([A-Za-z_][\w$]*)?$")
+
+
+def _format(color: str, bold: bool = False, italic: bool = False) -> QTextCharFormat:
+    fmt = QTextCharFormat()
+    fmt.setForeground(QColor(color))
+    if bold:
+        fmt.setFontWeight(QFont.Bold)
+    fmt.setFontItalic(italic)
+    return fmt
+
+
+class SqlHighlighter(QSyntaxHighlighter):
+    """
+    Подсветка SQL по строкам: QSyntaxHighlighter перекрашивает только изменённую
+    строку, а следующие – лишь если изменилось состояние её конца (открытый
+    комментарий /* */, строка или идентификатор в кавычках).
+    """
+    def __init__(self, document) -> None:
+        super().__init__(document)
+        self.formats = {
+            "keyword": _format("#569cd6", bold=True),
+            "string": _format("#ce9178"),
+            "ident": _format("#9cdcfe"),
+            "comment": _format("#6a9955", italic=True),
+            "number": _format("#b5cea8"),
+        }
+
+    def highlightBlock(self, text: str) -> None:
+        state = self.previousBlockState()
+        pos = 0
+        length = len(text)
+        kinds = _STATE_KINDS
+        while pos < length or state in kinds:
+            if state in kinds:
+                end = self._close(state, text, pos)
+                if end < 0:
+                    self.setFormat(pos, length - pos, self.formats[kinds[state]])
+                    self.setCurrentBlockState(state)
+                    return
+                self.setFormat(pos, end - pos, self.formats[kinds[state]])
+                pos = end
+                state = _NORMAL
+                continue
+            m = _TOKEN_RE.search(text, pos)
+            if m is None:
+                break
+            kind = m.lastgroup
+            start = m.start()
+            if kind == "comment":
+                self.setFormat(start, length - start, self.formats["comment"])
+                break
+            if kind == "block":
+                state, pos = _IN_COMMENT, m.end()
+                self.setFormat(start, 2, self.formats["comment"])
+            elif kind == "string":
+                state, pos = _IN_STRING, m.end()
+                self.setFormat(start, 1, self.formats["string"])
+            elif kind == "ident":
+                state, pos = _IN_IDENTIFIER, m.end()
+                self.setFormat(start, 1, self.formats["ident"])
+            else:
+                if kind == "number" or m.group().upper() in _KEYWORD_SET:
+                    self.setFormat(start, m.end() - start, self.formats[kind if kind == "number" else "keyword"])
+                pos = m.end()
+        self.setCurrentBlockState(_NORMAL)
+
+    @staticmethod
+    def _close(state: int, text: str, pos: int) -> int:
+        """Позиция после закрывающей последовательности или -1, если её нет в строке."""
+        pattern = _CLOSE_RE[state]
+        while True:
+            m = pattern.search(text, pos)
+            if m is None:
+                return -1
+            if len(m.group()) == 2 and state != _IN_COMMENT:
+                pos = m.end()  # удвоенная кавычка внутри строки
+                continue
+            return m.end()
+
+
+def completion_words(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """
+    Словарь для автодополнения по схеме всех баз подключения: tables – имена
+    таблиц и представлений, columns – столбцы по имени таблицы (в нижнем регистре),
+    functions – функции SQLite. Выполняется в фоновом потоке на подключении пула.
+    """
+    tables: List[str] = []
+    columns: Dict[str, List[str]] = {}
+    for _, schema, _ in conn.execute("PRAGMA database_list").fetchall():
+        for (name,) in conn.execute(
+            f"SELECT name FROM {quote_identifier(schema)}.sqlite_master "
+            "WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+        ).fetchall():
+            tables.append(name)
+            info = conn.execute(f"PRAGMA {quote_identifier(schema)}.table_info({quote_identifier(name)})")
+            columns.setdefault(name.lower(), []).extend(col[1] for col in info)
+    try:
+        functions = sorted({row[0] for row in conn.execute("PRAGMA function_list")})
+    except sqlite3.Error:
+        functions = []  # SQLite собран без SQLITE_INTROSPECTION_PRAGMAS
+    return {"tables": tables, "columns": columns, "functions": functions}
+
+
+class SqlEditor(QPlainTextEdit):
+    """
+    Редактор SQL с подсветкой и автодополнением.
+    Словарь (ключевые слова, таблицы, столбцы, функции) строится в фоновом пуле
+    при refresh_schema() и хранится отсортированным, поэтому подбор подсказок –
+    двоичный поиск по префиксу, независимо от размера схемы. Подсказки
+    показываются с задержкой COMPLETE_DELAY_MS после ввода и по Ctrl+Space;
+    после "таблица." предлагаются её столбцы. Обработка нажатия смотрит только
+    на текущую строку, а не на весь текст.
+    """
+    def __init__(self, db_manager: DBManager, parent=None) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.highlighter = SqlHighlighter(self.document())
+        self._keys: List[str] = []
+        self._words: List[str] = []
+        self._columns: Dict[str, List[str]] = {}
+        self._set_words({"tables": [], "columns": {}, "functions": []})
+        self.schema_task: Optional[PoolTask] = None
+        self.completer = QCompleter(self)
+        self.completer.setWidget(self)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.completer.setModel(QStringListModel(self.completer))
+        self.completer.activated[str].connect(self.insert_completion)
+        self._prefix = ""
+        self._forced = False
+        self.complete_timer = QTimer(self)
+        self.complete_timer.setSingleShot(True)
+        self.complete_timer.setInterval(COMPLETE_DELAY_MS)
+        self.complete_timer.timeout.connect(self.update_completions)
+
+    def refresh_schema(self) -> None:
+        """Перестраивает словарь подсказок в фоне (после изменения схемы или открытия базы)."""
+        if self.schema_task is not None:
+            self.schema_task.cancel()
+            self.schema_task.deleteLater()
+            self.schema_task = None
+        if not self.db_manager.conn:
+            self._set_words({"tables": [], "columns": {}, "functions": []})
+            return
+        task = PoolTask(self.db_manager, completion_words, parent=self)
+        task.succeeded.connect(lambda words: self._on_words(task, words))
+        task.failed.connect(lambda error: self._on_words(task, None))
+        self.schema_task = task
+        task.start()
+
+    def _on_words(self, task: PoolTask, words: Optional[Dict[str, Any]]) -> None:
+        if task is not self.schema_task:
+            return
+        self.schema_task = None
+        task.deleteLater()
+        if words is not None:
+            self._set_words(words)
+
+    def _set_words(self, words: Dict[str, Any]) -> None:
+        columns = {name for names in words["columns"].values() for name in names}
+        vocabulary = set(SQL_KEYWORDS) | set(words["tables"]) | set(words["functions"]) | columns
+        pairs = sorted((word.lower(), word) for word in vocabulary)
+        self._keys = [key for key, _ in pairs]
+        self._words = [word for _, word in pairs]
+        self._columns = {table: sorted(set(names), key=str.lower) for table, names in words["columns"].items()}
+
+    def completions(self, qualifier: Optional[str], prefix: str) -> List[str]:
+        """Подсказки для слова prefix; qualifier – имя перед точкой ("таблица.")."""
+        if qualifier is not None:
+            names = self._columns.get(qualifier.lower())
+            if names is not None:
+                low = prefix.lower()
+                return [name for name in names if name.lower().startswith(low)][:MAX_COMPLETIONS]
+        low = prefix.lower()
+        result = []
+        i = bisect.bisect_left(self._keys, low)
+        while i < len(self._keys) and len(result) < MAX_COMPLETIONS and self._keys[i].startswith(low):
+            if self._keys[i] != low:
+                result.append(self._words[i])
+            i += 1
+        return result
+
+    def keyPressEvent(self, event) -> None:
+        popup = self.completer.popup()
+        if popup.isVisible() and event.key() in (
+            Qt.Key_Enter, Qt.Key_Return, Qt.Key_Tab, Qt.Key_Backtab, Qt.Key_Escape
+        ):
+            event.ignore()  # клавишу обработает список подсказок
+            return
+        if event.key() == Qt.Key_Space and event.modifiers() & Qt.ControlModifier:
+            self._forced = True
+            self.update_completions()
+            return
+        super().keyPressEvent(event)
+        if event.text() and (event.text()[-1].isalnum() or event.text()[-1] in "_.$"):
+            self.complete_timer.start()
+        elif popup.isVisible():
+            if event.key() == Qt.Key_Backspace:
+                self.complete_timer.start()
+            elif event.text() or event.matches(QKeySequence.MoveToNextChar) or \
+                    event.matches(QKeySequence.MoveToPreviousChar):
+                popup.hide()
+
+    def update_completions(self) -> None:
+        forced, self._forced = self._forced, False
+        cursor = self.textCursor()
+        text = cursor.block().text()[:cursor.positionInBlock()]
+        m = _WORD_BEFORE_CURSOR_RE.search(text)
+        qualifier, prefix = m.group(1), m.group(2) or ""
+        popup = self.completer.popup()
+        if qualifier is None and len(prefix) < COMPLETE_MIN_CHARS and not forced:
+            popup.hide()
+            return
+        words = self.completions(qualifier, prefix)
+        if not words:
+            popup.hide()
+            return
+        self._prefix = prefix
+        self.completer.model().setStringList(words)
+        rect = self.cursorRect()
+        rect.setWidth(popup.sizeHintForColumn(0) + popup.verticalScrollBar().sizeHint().width())
+        self.completer.complete(rect)
+        popup.setCurrentIndex(self.completer.completionModel().index(0, 0))
+
+    def insert_completion(self, word: str) -> None:
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.Left, QTextCursor.KeepAnchor, len(self._prefix))
+        cursor.insertText(word)
+        self.setTextCursor(cursor)
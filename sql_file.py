@@ -0,0 +1,170 @@
+# sql_file.py
+import gzip
+import os
+import re
+import sqlite3
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+from db_manager import DBManager, CHECKPOINT_TABLE, quote_identifier
+
+READ_BUFFER = 1024 * 1024    # размер блока чтения файла, байт
+SCRIPT_BATCH = 1000          # команд в одной транзакции
+
+# Управление транзакциями из файла (BEGIN/COMMIT дампа) пропускается: транзакциями управляет run_sql_file
+_TRANSACTION_RE = re.compile(
+    r"^(?:BEGIN(?:\s+(?:DEFERRED|IMMEDIATE|EXCLUSIVE))?|COMMIT|END)(?:\s+TRANSACTION)?\s*;?$",
+    re.IGNORECASE
+)
+
+
+def iter_statements_from(stream: BinaryIO, offset: int = 0) -> Iterator[Tuple[str, int]]:
+    """
+    Читает команды SQL из двоичного потока UTF-8 блоками READ_BUFFER, начиная
+    с байта offset. Выдаёт (команда, байт после неё) – по этой позиции выполнение
+    можно продолжить. Граница команды – ';', которую подтверждает
+    sqlite3.complete_statement(); ';' в UTF-8 всегда отдельный байт, поэтому
+    накопленный буфер декодируется целиком.
+    """
+    buffer = b""
+    position = offset
+    start = offset   # байт начала buffer в потоке
+    while True:
+        chunk = stream.read(READ_BUFFER)
+        if not chunk:
+            break
+        parts = chunk.split(b";")
+        for i, part in enumerate(parts):
+            buffer += part
+            position += len(part)
+            if i == len(parts) - 1:
+                break
+            buffer += b";"
+            position += 1
+            text = buffer.decode("utf-8-sig" if start == 0 else "utf-8")
+            if sqlite3.complete_statement(text):
+                statement = text.strip()
+                buffer = b""
+                start = position
+                if statement != ";":
+                    yield statement, position
+    text = buffer.decode("utf-8").strip()
+    if text:
+        yield text, position
+
+
+def _file_identity(filename: str) -> Tuple[str, int, float]:
+    return os.path.abspath(filename), os.path.getsize(filename), os.path.getmtime(filename)
+
+
+def sql_file_checkpoint(conn: sqlite3.Connection, filename: str) -> Optional[Dict[str, Any]]:
+    """
+    Сохранённая позиция прерванного выполнения файла: offset (байт), statements
+    (команд выполнено) или None. Позиция действительна, только если файл с тех пор не менялся.
+    """
+    try:
+        row = conn.execute(
+            f"SELECT size, mtime, offset, statements FROM {quote_identifier(CHECKPOINT_TABLE)} WHERE file = ?",
+            (os.path.abspath(filename),)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None  # таблицы нет – файлы не прерывались
+    if row is None:
+        return None
+    _, size, mtime = _file_identity(filename)
+    if (row[0], row[1]) != (size, mtime):
+        return None
+    return {"offset": row[2], "statements": row[3]}
+
+
+def run_sql_file(
+    db_manager: DBManager,
+    filename: str,
+    batch_size: int = SCRIPT_BATCH,
+    resume: bool = True,
+    progress_callback: Optional[Callable[[int, int, int], None]] = None
+) -> Dict[str, Any]:
+    """
+    Выполняет SQL-файл (в том числе *.gz, например дамп из export_sql/dump_to_file),
+    не загружая его в память: команды читаются потоком и выполняются
+    на собственном подключении транзакциями по batch_size команд.
+    Вместе с каждой транзакцией в таблицу CHECKPOINT_TABLE записывается позиция
+    в файле, поэтому прерванное выполнение (ошибка, отмена, сбой) при resume
+    продолжается с первой незафиксированной команды. Таблица создаётся первой
+    зафиксированной транзакцией; после успешного завершения запись удаляется,
+    а опустевшая таблица – тоже. BEGIN/COMMIT из файла пропускаются.
+    progress_callback(байт файла прочитано, размер файла, команд выполнено)
+    вызывается после каждой транзакции; если он бросает OperationCancelled,
+    текущая транзакция откатывается.
+    Возвращает словарь: statements, bytes, seconds, resumed_from (байт или 0).
+    """
+    identity = _file_identity(filename)
+    conn = db_manager.new_connection(isolation_level=None)
+    checkpoint = quote_identifier(CHECKPOINT_TABLE)
+    started = time.perf_counter()
+    try:
+        saved = sql_file_checkpoint(conn, filename) if resume else None
+        offset = saved["offset"] if saved else 0
+        statements = saved["statements"] if saved else 0
+        raw = open(filename, "rb", buffering=READ_BUFFER)
+        try:
+            stream: Any = gzip.GzipFile(fileobj=raw) if filename.lower().endswith(".gz") else raw
+            stream.seek(offset)
+            in_batch = 0
+            position = offset
+            conn.execute("BEGIN")
+            try:
+                for sql, position in iter_statements_from(stream, offset):
+                    if not _TRANSACTION_RE.match(sql):
+                        try:
+                            conn.execute(sql).fetchall()
+                        except sqlite3.Error as e:
+                            raise Exception(f"Команда {statements + 1} (байт {position}): {e}") from e
+                    statements += 1
+                    in_batch += 1
+                    if in_batch >= batch_size:
+                        _commit_batch(conn, identity, position, statements)
+                        in_batch = 0
+                        if progress_callback:
+                            progress_callback(raw.tell(), identity[1], statements)
+                        conn.execute("BEGIN")
+                if _has_checkpoint_table(conn):
+                    conn.execute(f"DELETE FROM {checkpoint} WHERE file = ?", (identity[0],))
+                    if conn.execute(f"SELECT count(*) FROM {checkpoint}").fetchone()[0] == 0:
+                        conn.execute(f"DROP TABLE {checkpoint}")
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            if progress_callback:
+                progress_callback(identity[1], identity[1], statements)
+        finally:
+            raw.close()
+    finally:
+        conn.close()
+    return {
+        "statements": statements,
+        "bytes": position - offset,
+        "seconds": time.perf_counter() - started,
+        "resumed_from": offset,
+    }
+
+
+def _commit_batch(conn: sqlite3.Connection, identity: Tuple[str, int, float], offset: int, statements: int) -> None:
+    # Позиция фиксируется той же транзакцией, что и выполненные команды
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS main.{quote_identifier(CHECKPOINT_TABLE)} "
+        "(file TEXT PRIMARY KEY, size INTEGER, mtime REAL, offset INTEGER, statements INTEGER)"
+    )
+    conn.execute(
+        f"INSERT OR REPLACE INTO {quote_identifier(CHECKPOINT_TABLE)} "
+        "(file, size, mtime, offset, statements) VALUES (?, ?, ?, ?, ?)",
+        (*identity, offset, statements)
+    )
+    conn.execute("COMMIT")
+
+
+def _has_checkpoint_table(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM main.sqlite_master WHERE type='table' AND name = ?", (CHECKPOINT_TABLE,)
+    ).fetchone() is not None
@@ -1,16 +1,29 @@
 # table_editor.py
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-    QTableWidget, QTableWidgetItem, QWidget, QMessageBox
+    QTableView, QAbstractItemView, QWidget, QMessageBox, QShortcut, QFileDialog
 )
-from PyQt5.QtCore import Qt
-from typing import List, Any, Optional, Dict, Callable
-from db_manager import DBManager
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QKeySequence
+from typing import List, Any, Optional, Dict, Set, Callable
+from blob_io import BlobValue, BlobFile
+from change_journal import ChangeJournal
+from change_tracker import ChangeTracker
+from db_manager import DBManager, build_filter, coerce_value, quote_identifier
+from table_model import LazyTableModel, apply_sampled_column_widths
+from dialogs import ExportDataDialog
+from workers import PoolTask
+
+FILTER_DELAY_MS = 400   # пауза после ввода перед перезапросом данных
 
 class RowEditorDialog(QDialog):
     """
     Диалог для добавления или редактирования строки таблицы.
     Проводится валидация данных в зависимости от типа столбца.
+    Если задан submit_callback, значения передаются ему вместо немедленной записи в базу.
+    Столбцы BLOB не редактируются как текст: показываются размер и тип, содержимое
+    загружается из файла (BlobFile, пишется потоково при сохранении) или
+    выгружается в файл через blobopen.
     """
     def __init__(
         self,
@@ -21,7 +34,8 @@ class RowEditorDialog(QDialog):
         mode: str = "add",
         rowid: Optional[int] = None,
         current_values: Optional[List[Any]] = None,
-        refresh_callback: Optional[Callable[[], None]] = None
+        refresh_callback: Optional[Callable[[], None]] = None,
+        submit_callback: Optional[Callable[[List[str], List[Any]], None]] = None
     ) -> None:
         super().__init__(parent)
         self.db_manager = db_manager
@@ -30,8 +44,13 @@ class RowEditorDialog(QDialog):
         self.mode = mode
         self.rowid = rowid
         self.refresh_callback = refresh_callback
+        self.submit_callback = submit_callback
         self.setWindowTitle("Добавить строку" if mode == "add" else f"Редактировать строку {rowid}")
         self.inputs: Dict[str, QLineEdit] = {}
+        # Значения столбцов BLOB: None, BlobValue (без изменений) или BlobFile
+        self.blob_values: Dict[str, Any] = {}
+        self.blob_labels: Dict[str, QLabel] = {}
+        self.blob_task: Optional[PoolTask] = None
         self.init_ui(current_values)
 
     def init_ui(self, current_values: Optional[List[Any]]) -> None:
@@ -42,15 +61,17 @@ class RowEditorDialog(QDialog):
             col_type = (col[2] or "TEXT").upper()
             notnull = col[3]
             label = QLabel(f"{col_name} ({col_type})" + (" *" if notnull else ""))
-            input_edit = QLineEdit()
-            if self.mode == "edit" and current_values:
-                value = current_values[i]
-                if value is not None:
-                    input_edit.setText(str(value))
-            self.inputs[col_name] = input_edit
+            value = current_values[i] if self.mode == "edit" and current_values else None
             row_layout = QHBoxLayout()
             row_layout.addWidget(label)
-            row_layout.addWidget(input_edit)
+            if "BLOB" in col_type or isinstance(value, (BlobValue, BlobFile, bytes)):
+                self.add_blob_field(row_layout, col_name, value)
+            else:
+                input_edit = QLineEdit()
+                if value is not None:
+                    input_edit.setText(str(value))
+                self.inputs[col_name] = input_edit
+                row_layout.addWidget(input_edit)
             layout.addLayout(row_layout)
         btn_text = "Добавить" if self.mode == "add" else "Сохранить"
         btn_submit = QPushButton(btn_text)
@@ -58,6 +79,63 @@ class RowEditorDialog(QDialog):
         layout.addWidget(btn_submit)
         self.setLayout(layout)
 
+    def add_blob_field(self, row_layout: QHBoxLayout, col_name: str, value: Any) -> None:
+        value_label = QLabel()
+        btn_load = QPushButton("Из файла...")
+        btn_load.clicked.connect(lambda: self.load_blob(col_name))
+        btn_save = QPushButton("В файл...")
+        btn_save.clicked.connect(lambda: self.save_blob(col_name))
+        btn_null = QPushButton("NULL")
+        btn_null.clicked.connect(lambda: self.set_blob(col_name, None))
+        row_layout.addWidget(value_label, 1)
+        row_layout.addWidget(btn_load)
+        row_layout.addWidget(btn_save)
+        row_layout.addWidget(btn_null)
+        self.blob_labels[col_name] = value_label
+        self.set_blob(col_name, value)
+
+    def set_blob(self, col_name: str, value: Any) -> None:
+        self.blob_values[col_name] = value
+        self.blob_labels[col_name].setText("NULL" if value is None else str(value))
+
+    def load_blob(self, col_name: str) -> None:
+        filename, _ = QFileDialog.getOpenFileName(self, f"Загрузить {col_name} из файла", "", "Все файлы (*)")
+        if filename:
+            self.set_blob(col_name, BlobFile(filename))
+
+    def save_blob(self, col_name: str) -> None:
+        value = self.blob_values.get(col_name)
+        # Выгружается только содержимое, уже записанное в базу
+        if not isinstance(value, BlobValue) or self.rowid is None or self.rowid < 0 or self.blob_task is not None:
+            return
+        filename, _ = QFileDialog.getSaveFileName(self, f"Сохранить {col_name} в файл", "", "Все файлы (*)")
+        if not filename:
+            return
+        db_manager = self.db_manager
+        task = PoolTask(
+            db_manager,
+            lambda conn, table, column, rowid, path: db_manager.read_blob_to_file(table, column, rowid, path, conn),
+            self.table_name, col_name, self.rowid, filename, parent=self
+        )
+        task.succeeded.connect(lambda size: self.on_blob_saved(col_name, size))
+        task.failed.connect(lambda error: self.on_blob_saved(col_name, None, error))
+        self.blob_task = task
+        self.blob_labels[col_name].setText("Сохранение...")
+        task.start()
+
+    def on_blob_saved(self, col_name: str, size: Optional[int], error: Optional[str] = None) -> None:
+        if self.blob_task is not None:
+            self.blob_task.deleteLater()
+        self.blob_task = None
+        self.set_blob(col_name, self.blob_values.get(col_name))
+        if error is not None:
+            QMessageBox.critical(self, "Ошибка", error)
+
+    def reject(self) -> None:
+        if self.blob_task is not None:
+            self.blob_task.cancel()
+        super().reject()
+
     def on_submit(self) -> None:
         columns = []
         values = []
@@ -66,30 +144,31 @@ class RowEditorDialog(QDialog):
             col_name = col[1]
             col_type = (col[2] or "TEXT").upper()
             notnull = col[3]
-            text = self.inputs[col_name].text().strip()
-            if not text:
-                if notnull:
+            if col_name in self.blob_values:
+                if self.blob_values[col_name] is None and notnull:
                     QMessageBox.critical(self, "Ошибка", f"Поле '{col_name}' обязательно для заполнения!")
                     return
-                else:
-                    processed = None
-            else:
+                columns.append(col_name)
+                values.append(self.blob_values[col_name])
+                continue
+            text = self.inputs[col_name].text().strip()
+            if not text and notnull:
+                QMessageBox.critical(self, "Ошибка", f"Поле '{col_name}' обязательно для заполнения!")
+                return
+            try:
+                processed = coerce_value(text, col_type)
+            except ValueError:
                 if col_type == "INTEGER":
-                    try:
-                        processed = int(text)
-                    except ValueError:
-                        QMessageBox.critical(self, "Ошибка", f"Поле '{col_name}' должно быть целым числом!")
-                        return
-                elif col_type == "REAL":
-                    try:
-                        processed = float(text)
-                    except ValueError:
-                        QMessageBox.critical(self, "Ошибка", f"Поле '{col_name}' должно быть числом с плавающей точкой!")
-                        return
+                    QMessageBox.critical(self, "Ошибка", f"Поле '{col_name}' должно быть целым числом!")
                 else:
-                    processed = text
+                    QMessageBox.critical(self, "Ошибка", f"Поле '{col_name}' должно быть числом с плавающей точкой!")
+                return
             columns.append(col_name)
             values.append(processed)
+        if self.submit_callback:
+            self.submit_callback(columns, values)
+            self.accept()
+            return
         try:
             if self.mode == "add":
                 self.db_manager.insert_row(self.table_name, columns, values)
@@ -107,21 +186,77 @@ class TableEditorWindow(QDialog):
     """
     Окно для просмотра и редактирования данных таблицы.
     Отображает содержимое таблицы с возможностью добавления, редактирования и удаления строк.
+    Изменения сразу видны в таблице, накапливаются в журнале с отменой и повтором
+    и записываются одной транзакцией по кнопке «Применить»; после записи
+    перечитываются только изменённые строки.
+    С tracker окно следит и за изменениями таблицы из других окон, консоли SQL
+    и других процессов и так же обновляет только затронутые строки.
+    Фильтры по столбцам, поиск и сортировка по заголовку выполняются запросом к SQLite.
     """
-    def __init__(self, parent: QWidget, db_manager: DBManager, table_name: str) -> None:
+    def __init__(
+        self, parent: QWidget, db_manager: DBManager, table_name: str, tracker: Optional[ChangeTracker] = None
+    ) -> None:
         super().__init__(parent)
         self.db_manager = db_manager
         self.table_name = table_name
+        self.tracker = tracker
         self.setWindowTitle(f"Таблица: {table_name}")
         self.resize(600, 400)
         self.columns_info: List[Any] = self.db_manager.get_table_info(table_name)
         self.columns: List[str] = [col[1] for col in self.columns_info]
+        # Журнал несохранённых изменений
+        self.journal = ChangeJournal()
         self.init_ui()
+        if tracker is not None:
+            tracker.watch(table_name)
+            tracker.rows_changed.connect(self.on_rows_changed)
+            tracker.table_changed.connect(self.on_table_changed)
+            self.finished.connect(self.stop_tracking)
 
     def init_ui(self) -> None:
         layout = QVBoxLayout()
-        self.table_widget = QTableWidget()
-        layout.addWidget(self.table_widget)
+        self.model = LazyTableModel(self.db_manager, self.table_name, self.columns, parent=self)
+        self.model.page_loaded.connect(self.on_page_loaded)
+        self.model.load_failed.connect(lambda error: QMessageBox.critical(self, "Ошибка", error))
+        self.model.changes_applied.connect(self.on_changes_applied)
+        self.widths_pending = True
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DELAY_MS)
+        self.filter_timer.timeout.connect(self.apply_filters)
+        search_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Поиск по текстовым столбцам")
+        self.search_edit.textChanged.connect(self.filter_timer.start)
+        self.btn_fts = QPushButton("Создать FTS-индекс")
+        self.btn_fts.setToolTip("Полнотекстовый индекс FTS5 для быстрого поиска по словам")
+        self.btn_fts.clicked.connect(self.create_fts_index)
+        search_layout.addWidget(QLabel("Поиск:"))
+        search_layout.addWidget(self.search_edit)
+        search_layout.addWidget(self.btn_fts)
+        layout.addLayout(search_layout)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.model)
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table_view.setSelectionMode(QAbstractItemView.SingleSelection)
+        header = self.table_view.horizontalHeader()
+        header.setSortIndicator(0, Qt.AscendingOrder)
+        self.table_view.setSortingEnabled(True)
+        # Строка фильтров над таблицей: поле на каждый столбец, выровненное по заголовку
+        self.filter_bar = QWidget()
+        self.filter_edits: List[QLineEdit] = []
+        for name in self.model.headers:
+            edit = QLineEdit(self.filter_bar)
+            edit.setPlaceholderText(name)
+            edit.setToolTip("Подстрока, сравнение (>10, <=5, =abc, !=x), NULL или !NULL")
+            edit.textChanged.connect(self.filter_timer.start)
+            self.filter_edits.append(edit)
+        self.filter_bar.setFixedHeight(self.filter_edits[0].sizeHint().height())
+        header.sectionResized.connect(self.place_filters)
+        header.geometriesChanged.connect(self.place_filters)
+        self.table_view.horizontalScrollBar().valueChanged.connect(self.place_filters)
+        layout.addWidget(self.filter_bar)
+        layout.addWidget(self.table_view)
         btn_layout = QHBoxLayout()
         btn_add = QPushButton("Добавить строку")
         btn_add.clicked.connect(self.add_row)
@@ -132,80 +267,258 @@ class TableEditorWindow(QDialog):
         btn_layout.addWidget(btn_add)
         btn_layout.addWidget(btn_edit)
         btn_layout.addWidget(btn_delete)
+        btn_export = QPushButton("Экспорт данных")
+        btn_export.clicked.connect(self.export_data)
+        btn_layout.addWidget(btn_export)
         layout.addLayout(btn_layout)
+        apply_layout = QHBoxLayout()
+        self.pending_label = QLabel()
+        self.btn_undo = QPushButton("Шаг назад")
+        self.btn_undo.setToolTip("Отменить последнее изменение (Ctrl+Z)")
+        self.btn_undo.clicked.connect(self.undo)
+        self.btn_redo = QPushButton("Шаг вперёд")
+        self.btn_redo.setToolTip("Повторить отменённое изменение (Ctrl+Y)")
+        self.btn_redo.clicked.connect(self.redo)
+        QShortcut(QKeySequence.Undo, self, self.undo)
+        QShortcut(QKeySequence.Redo, self, self.redo)
+        self.btn_apply = QPushButton("Применить")
+        self.btn_apply.clicked.connect(self.apply_changes)
+        self.btn_discard = QPushButton("Отменить изменения")
+        self.btn_discard.clicked.connect(self.discard_changes)
+        apply_layout.addWidget(self.pending_label)
+        apply_layout.addStretch()
+        apply_layout.addWidget(self.btn_undo)
+        apply_layout.addWidget(self.btn_redo)
+        apply_layout.addWidget(self.btn_apply)
+        apply_layout.addWidget(self.btn_discard)
+        layout.addLayout(apply_layout)
         self.setLayout(layout)
+        self.update_pending_state()
+        self.update_fts_state()
         self.refresh_table()
 
+    def place_filters(self, *args: Any) -> None:
+        header = self.table_view.horizontalHeader()
+        offset = self.table_view.frameWidth() + self.table_view.verticalHeader().width()
+        for col, edit in enumerate(self.filter_edits):
+            edit.setGeometry(
+                offset + header.sectionViewportPosition(col), 0,
+                header.sectionSize(col), self.filter_bar.height()
+            )
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        self.place_filters()
+
+    def query_conditions(self) -> List[Any]:
+        """Условия WHERE (sql, параметры) из полей фильтров и строки поиска."""
+        names = ["rowid"] + self.columns
+        types = ["INTEGER"] + [(col[2] or "TEXT").upper() for col in self.columns_info]
+        where = []
+        for name, col_type, edit in zip(names, types, self.filter_edits):
+            text = edit.text().strip()
+            if text:
+                where.append(build_filter(name, col_type, text))
+        search = self.search_edit.text().strip()
+        if search:
+            where.append(self.db_manager.search_condition(self.table_name, search))
+        return where
+
+    def apply_filters(self) -> None:
+        self.filter_timer.stop()
+        header = self.table_view.horizontalHeader()
+        try:
+            self.model.set_query(
+                self.query_conditions(), header.sortIndicatorSection(),
+                header.sortIndicatorOrder() == Qt.DescendingOrder
+            )
+            if self.model.canFetchMore():
+                self.model.fetchMore()
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+
+    def update_fts_state(self) -> None:
+        has_fts = self.db_manager.has_fts_index(self.table_name)
+        self.btn_fts.setEnabled(not has_fts)
+        self.search_edit.setToolTip(
+            "Поиск через FTS5 (синтаксис MATCH)" if has_fts else "Поиск подстроки (LIKE)"
+        )
+
+    def create_fts_index(self) -> None:
+        try:
+            self.db_manager.create_fts_index(self.table_name)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+            return
+        self.update_fts_state()
+        if self.search_edit.text().strip():
+            self.apply_filters()
+
     def refresh_table(self) -> None:
+        # Загружается только первая страница, остальные – по мере прокрутки
+        try:
+            self.model.reset()
+            self.widths_pending = True
+            if self.model.canFetchMore():
+                self.model.fetchMore()
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+
+    def on_page_loaded(self) -> None:
+        # Ширина колонок подбирается один раз – по первой пришедшей странице
+        if self.widths_pending:
+            self.widths_pending = False
+            apply_sampled_column_widths(self.table_view)
+
+    def selected_row(self) -> Optional[Any]:
+        """Возвращает кортеж (rowid, ...) выбранной строки или None."""
+        index = self.table_view.currentIndex()
+        if not index.isValid():
+            return None
+        return self.model.row_at(index.row())
+
+    def pending_count(self) -> int:
+        return self.journal.pending_count()
+
+    def update_pending_state(self) -> None:
+        inserts, updates, deletes = self.journal.state()
+        count = len(inserts) + len(updates) + len(deletes)
+        self.pending_label.setText(f"Несохранённых изменений: {count}" if count else "")
+        self.btn_apply.setEnabled(count > 0)
+        self.btn_discard.setEnabled(count > 0)
+        self.btn_undo.setEnabled(self.journal.can_undo())
+        self.btn_redo.setEnabled(self.journal.can_redo())
+        self.model.set_pending(list(inserts.items()), updates, deletes)
+
+    def queue_insert(self, columns: List[str], values: List[Any]) -> None:
+        self.journal.insert(values)
+        self.update_pending_state()
+
+    def queue_update(self, rowid: int, old_values: List[Any], values: List[Any]) -> None:
+        self.journal.update(rowid, old_values, values)
+        self.update_pending_state()
+
+    def undo(self) -> None:
+        if self.journal.undo() is not None:
+            self.update_pending_state()
+
+    def redo(self) -> None:
+        if self.journal.redo() is not None:
+            self.update_pending_state()
+
+    def apply_changes(self) -> None:
+        """
+        Записывает все накопленные изменения одной транзакцией (каждый вид
+        изменений – в своей точке сохранения) и обновляет только затронутые строки.
+        """
+        inserts, updates, deletes = self.journal.state()
         try:
-            rows = self.db_manager.get_table_rows(self.table_name)
+            with self.db_manager.transaction():
+                if deletes:
+                    self.db_manager.delete_rows(self.table_name, deletes)
+                if updates:
+                    self.db_manager.update_rows(self.table_name, self.columns, updates.items())
+                if inserts:
+                    self.db_manager.insert_rows(self.table_name, self.columns, inserts.values())
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", str(e))
             return
-        # Первая колонка – rowid, далее данные столбцов
-        self.table_widget.clear()
-        self.table_widget.setRowCount(len(rows))
-        self.table_widget.setColumnCount(len(self.columns) + 1)
-        headers = ["RowID"] + self.columns
-        self.table_widget.setHorizontalHeaderLabels(headers)
-        for row_idx, row_data in enumerate(rows):
-            for col_idx, value in enumerate(row_data):
-                item = QTableWidgetItem(str(value) if value is not None else "")
-                self.table_widget.setItem(row_idx, col_idx, item)
-        self.table_widget.resizeColumnsToContents()
+        self.journal.clear()
+        self.update_pending_state()
+        if self.tracker is not None:
+            # Записанные строки приходят через rows_changed, как и чужие изменения
+            self.tracker.check()
+            return
+        try:
+            refreshed = self.db_manager.get_rows_by_rowid(self.table_name, updates.keys())
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+            self.refresh_table()
+            return
+        if not self.model.apply_saved(refreshed, deletes, bool(inserts)):
+            self.refresh_table()
+        elif inserts and self.model.canFetchMore():
+            self.model.fetchMore()
+
+    def on_rows_changed(self, table_name: str, changes: Dict[str, Set[int]]) -> None:
+        if table_name == self.table_name:
+            self.patch_rows(changes["updated"] | changes["inserted"], changes["deleted"], bool(changes["inserted"]))
+
+    def on_table_changed(self, table_name: str) -> None:
+        if table_name == self.table_name:
+            self.patch_rows(None, set(), True)
+
+    def patch_rows(self, rowids: Optional[Set[int]], deleted: Set[int], inserted: bool) -> None:
+        # Строки перечитываются в фоне; итог приходит в on_changes_applied
+        self.model.apply_changes(rowids, deleted, inserted)
+
+    def on_changes_applied(self, applied: bool, inserted: bool) -> None:
+        if not applied:
+            self.refresh_table()
+        elif inserted and self.model.canFetchMore():
+            self.model.fetchMore()
+
+    def stop_tracking(self) -> None:
+        if self.tracker is not None:
+            self.tracker.rows_changed.disconnect(self.on_rows_changed)
+            self.tracker.table_changed.disconnect(self.on_table_changed)
+            self.tracker.unwatch(self.table_name)
+            self.tracker = None
+
+    def discard_changes(self) -> None:
+        self.journal.clear()
+        self.update_pending_state()
+
+    def reject(self) -> None:
+        if self.pending_count():
+            reply = QMessageBox.question(
+                self, "Подтверждение", "Сохранить несохранённые изменения?",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel
+            )
+            if reply == QMessageBox.Cancel:
+                return
+            if reply == QMessageBox.Yes:
+                self.apply_changes()
+                if self.pending_count():
+                    return
+        super().reject()
+
+    def export_data(self) -> None:
+        sql = f"SELECT * FROM {quote_identifier(self.table_name)}"
+        dialog = ExportDataDialog(self, self.db_manager, sql, self.table_name)
+        dialog.exec_()
 
     def add_row(self) -> None:
         dialog = RowEditorDialog(
             self, self.db_manager, self.table_name,
-            self.columns_info, mode="add", refresh_callback=self.refresh_table
+            self.columns_info, mode="add", submit_callback=self.queue_insert
         )
         dialog.exec_()
 
     def edit_row(self) -> None:
-        selected = self.table_widget.currentRow()
-        if selected < 0:
+        row = self.selected_row()
+        if row is None:
             QMessageBox.warning(self, "Внимание", "Не выбрана строка!")
             return
-        rowid_item = self.table_widget.item(selected, 0)
-        if rowid_item is None:
-            return
-        try:
-            rowid = int(rowid_item.text())
-        except ValueError:
-            QMessageBox.critical(self, "Ошибка", "Неверный идентификатор строки.")
+        rowid = row[0]
+        if self.model.is_deleted(rowid):
+            QMessageBox.warning(self, "Внимание", "Строка помечена на удаление.")
             return
-        current_values = []
-        for col in range(1, self.table_widget.columnCount()):
-            item = self.table_widget.item(selected, col)
-            current_values.append(item.text() if item is not None else "")
+        current_values = list(row[1:])
         dialog = RowEditorDialog(
             self, self.db_manager, self.table_name,
-            self.columns_info, mode="edit", rowid=rowid,
-            current_values=current_values, refresh_callback=self.refresh_table
+            self.columns_info, mode="edit", rowid=rowid, current_values=current_values,
+            submit_callback=lambda columns, values: self.queue_update(rowid, current_values, values)
         )
         dialog.exec_()
 
     def delete_row(self) -> None:
-        selected = self.table_widget.currentRow()
-        if selected < 0:
+        row = self.selected_row()
+        if row is None:
             QMessageBox.warning(self, "Внимание", "Не выбрана строка!")
             return
-        rowid_item = self.table_widget.item(selected, 0)
-        if rowid_item is None:
+        rowid = row[0]
+        if self.model.is_deleted(rowid):
             return
-        try:
-            rowid = int(rowid_item.text())
-        except ValueError:
-            QMessageBox.critical(self, "Ошибка", "Неверный идентификатор строки.")
-            return
-        reply = QMessageBox.question(
-            self, "Подтверждение", f"Удалить строку {rowid}?",
-            QMessageBox.Yes | QMessageBox.No
-        )
-        if reply == QMessageBox.Yes:
-            try:
-                self.db_manager.delete_row(self.table_name, rowid)
-                QMessageBox.information(self, "Успех", "Строка удалена.")
-                self.refresh_table()
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", str(e))
+        self.journal.delete(rowid, list(row[1:]))
+        self.update_pending_state()
@@ -0,0 +1,493 @@
+# table_model.py
+import bisect
+from collections import OrderedDict
+from typing import List, Any, Optional, Dict, Iterable, Set, Tuple
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor, QFont
+from PyQt5.QtWidgets import QTableView
+from blob_io import describe_value
+from db_manager import DBManager
+from result_store import ResultStore
+from workers import PoolTask
+
+PAGE_SIZE = 500         # строк в одной странице
+MAX_CACHED_PAGES = 40   # сколько страниц держать в памяти одновременно
+LOADING_TEXT = "…"      # ячейка строки, страница которой ещё читается
+
+
+class LazyTableModel(QAbstractTableModel):
+    """
+    Модель данных таблицы с ленивой подгрузкой.
+    Строки читаются страницами (keyset-пагинация по столбцу сортировки и rowid) через
+    canFetchMore/fetchMore в фоновом пуле подключений для чтения; в памяти хранится
+    ограниченное число страниц (LRU). Вытесненная страница при следующем обращении
+    перечитывается по сохранённой границе тоже в пуле: пока она читается, ячейки
+    показывают заглушку, после чтения модель сообщает dataChanged.
+    Фильтры и сортировка (set_query, sort) выполняются в SQLite, а не в модели.
+    Первая колонка – rowid, далее столбцы таблицы.
+    Несохранённые изменения (set_pending) накладываются поверх прочитанных строк;
+    новые строки показываются в начале. После записи apply_saved обновляет
+    только затронутые строки, не перечитывая таблицу; apply_changes так же
+    отражает изменения, сделанные другими подключениями и процессами.
+    """
+    page_loaded = pyqtSignal()
+    load_failed = pyqtSignal(str)
+    changes_applied = pyqtSignal(bool, bool)   # отражены ли изменения apply_changes; добавлялись ли строки
+
+    def __init__(
+        self,
+        db_manager: DBManager,
+        table_name: str,
+        columns: List[str],
+        page_size: int = PAGE_SIZE,
+        max_pages: int = MAX_CACHED_PAGES,
+        parent=None
+    ) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.table_name = table_name
+        self.headers = ["RowID"] + columns
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._inserted: List[Tuple[int, List[Any]]] = []
+        self._updated: Dict[int, List[Any]] = {}
+        self._deleted: Set[int] = set()
+        self._where: List[Tuple[str, List[Any]]] = []
+        self._sort_column = 0
+        self._descending = False
+        self._clear()
+
+    def _clear(self) -> None:
+        # _bounds[n] – ключ строки, после которой начинается страница n (None для первой);
+        # _starts[n] и _lengths[n] – первая строка и длина страницы (после удаления
+        # строк страницы становятся короче)
+        self._bounds: List[Optional[Tuple[Any, ...]]] = []
+        self._starts: List[int] = []
+        self._lengths: List[int] = []
+        self._pages: "OrderedDict[int, List[Any]]" = OrderedDict()
+        self._row_count = 0
+        self._last_key: Optional[Tuple[Any, ...]] = None
+        self._exhausted = False
+        self._task: Optional[PoolTask] = None
+        self._reloads: Dict[int, PoolTask] = {}   # вытесненные страницы, читаемые заново
+        self._patch_task: Optional[PoolTask] = None
+        # Изменения, пришедшие, пока читается предыдущая порция: rowids, deleted, inserted
+        self._patch_pending: Optional[Tuple[Optional[Set[int]], Set[int], bool]] = None
+
+    def reset(self) -> None:
+        """Сбрасывает кэш и начинает чтение таблицы заново."""
+        self.beginResetModel()
+        if self._task is not None:
+            self._task.cancel()
+        for task in self._reloads.values():
+            task.cancel()
+        if self._patch_task is not None:
+            self._patch_task.cancel()
+        self._clear()
+        self.endResetModel()
+
+    def set_query(
+        self, where: List[Tuple[str, List[Any]]], sort_column: int = 0, descending: bool = False
+    ) -> None:
+        """
+        Задаёт условия отбора (sql, параметры) и колонку сортировки модели
+        (0 – rowid) и перечитывает данные.
+        """
+        self._where = list(where)
+        self._sort_column = sort_column
+        self._descending = descending
+        self.reset()
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder) -> None:
+        descending = order == Qt.DescendingOrder
+        if column == self._sort_column and descending == self._descending:
+            return
+        self.set_query(self._where, column, descending)
+        if self.canFetchMore():
+            self.fetchMore()
+
+    def _order_by(self) -> Optional[str]:
+        return self.headers[self._sort_column] if self._sort_column > 0 else None
+
+    def _key(self, row: Any) -> Tuple[Any, ...]:
+        if self._sort_column > 0:
+            return (row[self._sort_column], row[0])
+        return (row[0],)
+
+    def is_loading(self) -> bool:
+        return self._task is not None
+
+    def set_pending(
+        self,
+        inserted: List[Tuple[int, List[Any]]],
+        updated: Dict[int, List[Any]],
+        deleted: Set[int]
+    ) -> None:
+        """
+        Задаёт несохранённые изменения: новые строки (временный rowid, значения),
+        новые значения по rowid и удалённые rowid.
+        """
+        old_count = len(self._inserted)
+        new_count = len(inserted)
+        if new_count > old_count:
+            self.beginInsertRows(QModelIndex(), old_count, new_count - 1)
+            self._inserted = list(inserted)
+            self.endInsertRows()
+        elif new_count < old_count:
+            self.beginRemoveRows(QModelIndex(), new_count, old_count - 1)
+            self._inserted = list(inserted)
+            self.endRemoveRows()
+        else:
+            self._inserted = list(inserted)
+        self._updated = updated
+        self._deleted = deleted
+        if self.rowCount():
+            self.dataChanged.emit(
+                self.index(0, 0), self.index(self.rowCount() - 1, len(self.headers) - 1)
+            )
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._inserted) + self._row_count
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole) -> Any:
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            row = self.row_at(index.row())
+            if row is None:
+                return LOADING_TEXT  # страница ещё читается
+            if index.column() == 0 and row[0] < 0:
+                return "*"  # новая строка ещё не получила rowid
+            value = row[index.column()]
+            return str(value) if value is not None else ""
+        if role in (Qt.FontRole, Qt.BackgroundRole) and (self._inserted or self._updated or self._deleted):
+            row = self.row_at(index.row())
+            if row is None:
+                return None
+            if role == Qt.FontRole and row[0] in self._deleted:
+                font = QFont()
+                font.setStrikeOut(True)
+                return font
+            if role == Qt.BackgroundRole and row[0] < 0:
+                return QBrush(QColor("#2a4a2a"))
+            if role == Qt.BackgroundRole and row[0] in self._updated:
+                return QBrush(QColor("#4a4a2a"))
+        return None
+
+    def row_at(self, row: int) -> Optional[Any]:
+        """
+        Возвращает кортеж (rowid, ...) для строки представления с учётом несохранённых правок
+        или None, если страница строки вытеснена и читается заново.
+        """
+        if row < 0 or row >= self.rowCount():
+            return None
+        if row < len(self._inserted):
+            temp_id, values = self._inserted[row]
+            return (temp_id, *values)
+        row -= len(self._inserted)
+        page_no = bisect.bisect_right(self._starts, row) - 1
+        offset = row - self._starts[page_no]
+        page = self._page(page_no)
+        if page is None or offset >= len(page):
+            return None
+        values = page[offset]
+        updated = self._updated.get(values[0])
+        if updated is not None:
+            return (values[0], *updated)
+        return values
+
+    def is_deleted(self, rowid: int) -> bool:
+        return rowid in self._deleted
+
+    def _page(self, page_no: int) -> Optional[List[Any]]:
+        page = self._pages.get(page_no)
+        if page is not None:
+            self._pages.move_to_end(page_no)
+            return page
+        if page_no not in self._reloads:
+            # Повторное чтение вытесненной страницы – диапазон по ключу, без OFFSET
+            task = PoolTask(
+                self.db_manager, self._reload_page, self._bounds[page_no], self._lengths[page_no],
+                self._where, self._order_by(), self._descending, parent=self
+            )
+            task.succeeded.connect(lambda rows: self._on_reload(task, page_no, rows))
+            task.failed.connect(lambda error: self._on_reload_failed(task, page_no, error))
+            self._reloads[page_no] = task
+            task.start()
+        return None
+
+    def _reload_page(
+        self,
+        conn,
+        after: Optional[Tuple[Any, ...]],
+        count: int,
+        where: List[Tuple[str, List[Any]]],
+        order_by: Optional[str],
+        descending: bool
+    ) -> List[Any]:
+        return self.db_manager.get_rows_page(self.table_name, after, count, conn, where, order_by, descending)
+
+    def _on_reload(self, task: PoolTask, page_no: int, rows: List[Any]) -> None:
+        if self._reloads.get(page_no) is not task:
+            return  # ответ на запрос до сброса модели
+        del self._reloads[page_no]
+        task.deleteLater()
+        self._store_page(page_no, rows)
+        first = len(self._inserted) + self._starts[page_no]
+        last = first + self._lengths[page_no] - 1
+        if last >= first:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(self.headers) - 1))
+
+    def _on_reload_failed(self, task: PoolTask, page_no: int, error: str) -> None:
+        if self._reloads.get(page_no) is not task:
+            return
+        # Задача остаётся в _reloads: страница не перечитывается снова до сброса модели
+        self.load_failed.emit(error)
+
+    def _store_page(self, page_no: int, rows: List[Any]) -> None:
+        self._pages[page_no] = rows
+        self._pages.move_to_end(page_no)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+    def apply_saved(self, refreshed: List[Any], deleted: Set[int], inserted: bool) -> bool:
+        """
+        Отражает записанные изменения без перечитывания таблицы: строки refreshed
+        (перечитанные по rowid) заменяют прежние, удалённые rowid убираются.
+        Если добавлялись строки, чтение продолжается после последней страницы.
+        Затрагиваются только страницы в памяти; если удалённая строка в них
+        не найдена, возвращает False – тогда модель нужно сбросить.
+        """
+        by_rowid = {row[0]: row for row in refreshed}
+        removals: List[Tuple[int, int]] = []
+        found: Set[int] = set()
+        for page_no, page in self._pages.items():
+            for offset, row in enumerate(page):
+                if row[0] in by_rowid:
+                    page[offset] = by_rowid[row[0]]
+                elif row[0] in deleted:
+                    removals.append((page_no, offset))
+                    found.add(row[0])
+        if found != deleted:
+            return False
+        top = len(self._inserted)
+        # С конца, чтобы номера ещё не удалённых строк не сдвигались
+        for page_no, offset in sorted(removals, reverse=True):
+            row = top + self._starts[page_no] + offset
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._pages[page_no][offset]
+            self._lengths[page_no] -= 1
+            for later in range(page_no + 1, len(self._starts)):
+                self._starts[later] -= 1
+            self._row_count -= 1
+            self.endRemoveRows()
+        if inserted:
+            self._exhausted = False
+        if self.rowCount():
+            self.dataChanged.emit(
+                self.index(0, 0), self.index(self.rowCount() - 1, len(self.headers) - 1)
+            )
+        return True
+
+    def apply_changes(self, rowids: Optional[Iterable[int]], deleted: Set[int], inserted: bool) -> None:
+        """
+        Отражает изменения, сделанные вне модели: строки rowids перечитываются
+        с текущими фильтрами (не прошедшие фильтр убираются), удалённые убираются.
+        rowids=None – какие строки изменились, неизвестно: перечитываются все строки в памяти.
+        Строки читаются в фоновом пуле; результат приходит сигналом changes_applied:
+        False – изменения нельзя отразить точечно, модель нужно сбросить.
+        Изменения, пришедшие во время чтения, объединяются и применяются следом.
+        """
+        rowids = set(rowids) if rowids is not None else None
+        if self._patch_task is not None:
+            if self._patch_pending is not None:
+                pending_rowids, pending_deleted, pending_inserted = self._patch_pending
+                rowids = None if rowids is None or pending_rowids is None else rowids | pending_rowids
+                deleted = deleted | pending_deleted
+                inserted = inserted or pending_inserted
+            self._patch_pending = (rowids, set(deleted), inserted)
+            return
+        loaded = {row[0] for page in self._pages.values() for row in page}
+        evicted = len(self._pages) < len(self._bounds)
+        if rowids is None:
+            if evicted:
+                self.changes_applied.emit(False, inserted)  # удалённые строки вытесненных страниц не найти
+                return
+            rowids = loaded
+        if evicted and any(rowid not in loaded for rowid in deleted):
+            self.changes_applied.emit(False, inserted)
+            return
+        # Строки, которых нет в памяти, ещё не прочитаны: они придут со своей страницей
+        targets = [rowid for rowid in rowids if rowid in loaded]
+        task = PoolTask(self.db_manager, self._read_rows, targets, list(self._where), parent=self)
+        task.succeeded.connect(lambda rows: self._on_patch(task, targets, set(deleted), inserted, rows))
+        task.failed.connect(lambda error: self._on_patch_failed(task, error))
+        self._patch_task = task
+        task.start()
+
+    def _read_rows(self, conn, rowids: List[int], where: List[Tuple[str, List[Any]]]) -> List[Any]:
+        if not rowids:
+            return []
+        return self.db_manager.get_rows_by_rowid(self.table_name, rowids, conn, where)
+
+    def _on_patch(self, task: PoolTask, targets: List[int], deleted: Set[int], inserted: bool, rows: List[Any]) -> None:
+        if task is not self._patch_task:
+            return  # ответ на запрос до сброса модели
+        self._patch_task = None
+        task.deleteLater()
+        loaded = {row[0] for page in self._pages.values() for row in page}
+        found = {row[0] for row in rows}
+        gone = {rowid for rowid in targets if rowid not in found} | (deleted & loaded)
+        self.changes_applied.emit(self.apply_saved(rows, gone, inserted), inserted)
+        self._next_patch()
+
+    def _on_patch_failed(self, task: PoolTask, error: str) -> None:
+        if task is not self._patch_task:
+            return
+        self._patch_task = None
+        task.deleteLater()
+        self.load_failed.emit(error)
+        self._next_patch()
+
+    def _next_patch(self) -> None:
+        if self._patch_pending is not None and self._patch_task is None:
+            pending, self._patch_pending = self._patch_pending, None
+            self.apply_changes(*pending)
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if parent.isValid() or self._exhausted or self._task is not None:
+            return
+        task = PoolTask(
+            self.db_manager, self._read_page, self._last_key, self._where,
+            self._order_by(), self._descending, parent=self
+        )
+        task.succeeded.connect(lambda rows: self._on_page(task, rows))
+        task.failed.connect(lambda error: self._on_page_failed(task, error))
+        self._task = task
+        task.start()
+
+    def _read_page(
+        self,
+        conn,
+        after: Optional[Tuple[Any, ...]],
+        where: List[Tuple[str, List[Any]]],
+        order_by: Optional[str],
+        descending: bool
+    ) -> List[Any]:
+        return self.db_manager.get_rows_page(
+            self.table_name, after, self.page_size, conn, where, order_by, descending
+        )
+
+    def _on_page(self, task: PoolTask, rows: List[Any]) -> None:
+        if task is not self._task:
+            return  # ответ на запрос до сброса модели
+        self._task = None
+        task.deleteLater()
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        if rows:
+            page_no = len(self._bounds)
+            self._bounds.append(self._last_key)
+            self._starts.append(self._row_count)
+            self._lengths.append(len(rows))
+            self._store_page(page_no, rows)
+            first = len(self._inserted) + self._row_count
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._row_count += len(rows)
+            self._last_key = self._key(rows[-1])
+            self.endInsertRows()
+        self.page_loaded.emit()
+
+    def _on_page_failed(self, task: PoolTask, error: str) -> None:
+        if task is not self._task:
+            return
+        self._task = None
+        task.deleteLater()
+        self._exhausted = True
+        self.load_failed.emit(error)
+
+
+def apply_sampled_column_widths(
+    view: QTableView, sample_rows: int = 50, max_width: int = 300, max_chars: int = 100
+) -> None:
+    """
+    Подбирает ширину колонок по заголовку и первым sample_rows строкам
+    вместо resizeColumnsToContents(), который измеряет каждую ячейку.
+    """
+    model = view.model()
+    if model is None:
+        return
+    metrics = view.fontMetrics()
+    padding = 16
+    rows = min(model.rowCount(), sample_rows)
+    for col in range(model.columnCount()):
+        header = str(model.headerData(col, Qt.Horizontal) or "")
+        width = metrics.horizontalAdvance(header)
+        for row in range(rows):
+            text = model.data(model.index(row, col)) or ""
+            width = max(width, metrics.horizontalAdvance(text[:max_chars]))
+        view.setColumnWidth(col, min(width + padding, max_width))
+
+
+class ResultTableModel(QAbstractTableModel):
+    """
+    Модель результата произвольного запроса.
+    Строки хранятся в ResultStore, который заполняется в фоновом потоке;
+    rows_added сообщает модели, сколько строк уже прочитано. В памяти модели
+    строк нет, поэтому прокрутка большого результата не требует ни повторного
+    выполнения запроса, ни памяти на все строки.
+    """
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.headers: List[str] = []
+        self.store: Optional[ResultStore] = None
+        self._row_count = 0
+
+    def set_store(self, store: Optional[ResultStore]) -> None:
+        """Начинает новый набор результатов; прежнее хранилище закрывается."""
+        self.beginResetModel()
+        previous = self.store
+        self.store = store
+        self.headers = list(store.columns) if store is not None else []
+        self._row_count = 0
+        self.endResetModel()
+        if previous is not None:
+            previous.close()
+
+    def rows_added(self, count: int) -> None:
+        if self.store is None or count <= self._row_count:
+            return
+        self.beginInsertRows(QModelIndex(), self._row_count, count - 1)
+        self._row_count = count
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        self.set_store(None)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole) -> Any:
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        value = describe_value(self.store.row(index.row())[index.column()])  # type: ignore[union-attr]
+        return str(value) if value is not None else ""
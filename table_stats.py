@@ -0,0 +1,114 @@
+# table_stats.py
+import sqlite3
+from typing import List, Any, Dict
+from db_manager import TableName, quote_identifier, split_table_name, table_pragma
+
+SAMPLE_THRESHOLD = 100000   # с какого числа строк статистика столбцов считается по выборке
+SAMPLE_CHUNKS = 20          # участков таблицы в выборке
+SAMPLE_CHUNK_ROWS = 500     # строк подряд в одном участке
+
+
+def table_stats(conn: sqlite3.Connection, table: str, sample_threshold: int = SAMPLE_THRESHOLD) -> Dict[str, Any]:
+    """
+    Статистика таблицы: rows, pages, size (страницы и байты таблицы и её индексов
+    по dbstat, None – если dbstat недоступен), indexes и columns.
+    Столбец – словарь: name, type, nulls, distinct, min, max. Для таблиц больше
+    sample_threshold строк столбцы считаются по выборке из SAMPLE_CHUNKS участков
+    по всей таблице (sample – число строк выборки, иначе None).
+    Запросы можно прервать через conn.interrupt().
+    """
+    name = quote_identifier(table)
+    rows = conn.execute(f"SELECT count(*) FROM {name}").fetchone()[0]
+    indexes = _indexes(conn, table)
+    schema, bare_name = split_table_name(table)
+    sizes = _dbstat_sizes(conn, schema, [bare_name] + [index["name"] for index in indexes])
+    for index in indexes:
+        index["pages"], index["size"] = sizes.get(index["name"], (None, None))
+    pages, size = sizes.get(bare_name, (None, None))
+
+    info = conn.execute(table_pragma("table_info", table)).fetchall()
+    sampled = rows > sample_threshold
+    source = _sample_source(conn, name) if sampled else name
+    columns: List[Dict[str, Any]] = [
+        {"name": col[1], "type": col[2], "nulls": None, "distinct": None, "min": None, "max": None}
+        for col in info
+    ]
+    sample = None
+    if columns:
+        # Все столбцы – за один проход по таблице (или выборке)
+        parts = []
+        for col in columns:
+            c = quote_identifier(col["name"])
+            parts.append(f"count({c}), count(DISTINCT {c}), min({c}), max({c})")
+        values = conn.execute(f"SELECT count(*), {', '.join(parts)} FROM {source}").fetchone()
+        total = values[0]
+        for i, col in enumerate(columns):
+            not_null, col["distinct"], col["min"], col["max"] = values[1 + 4 * i:5 + 4 * i]
+            col["nulls"] = total - not_null
+        if sampled:
+            sample = total
+    return {
+        "table": table,
+        "rows": rows,
+        "pages": pages,
+        "size": size,
+        "indexes": indexes,
+        "columns": columns,
+        "sample": sample,
+    }
+
+
+def _indexes(conn: sqlite3.Connection, table: str) -> List[Dict[str, Any]]:
+    result = []
+    schema, _ = split_table_name(table)
+    for _, index_name, unique, origin, partial in conn.execute(table_pragma("index_list", table)).fetchall():
+        columns = [
+            col[2] if col[2] is not None else "<выражение>"
+            for col in conn.execute(table_pragma("index_info", TableName(schema, index_name))).fetchall()
+        ]
+        result.append({
+            "name": index_name, "columns": columns, "unique": bool(unique),
+            "origin": origin, "partial": bool(partial),
+        })
+    return result
+
+
+def _dbstat_sizes(conn: sqlite3.Connection, schema: str, names: List[str]) -> Dict[str, Any]:
+    """(страниц, байт) для каждого b-дерева базы schema по виртуальной таблице dbstat."""
+    try:
+        # Второй аргумент 1 – по строке на b-дерево, без обхода отдельных страниц в Python
+        placeholders = ", ".join("?" * len(names))
+        rows = conn.execute(
+            f"SELECT name, pageno, pgsize FROM dbstat(?, 1) WHERE name IN ({placeholders})", [schema] + names
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        if "interrupt" in str(e):
+            raise
+        return {}  # SQLite собран без SQLITE_ENABLE_DBSTAT_VTAB
+    return {name: (pages, size) for name, pages, size in rows}
+
+
+def _sample_source(conn: sqlite3.Connection, name: str) -> str:
+    """
+    Подзапрос-выборка из SAMPLE_CHUNKS участков по SAMPLE_CHUNK_ROWS строк,
+    равномерно расставленных по диапазону rowid; для таблиц WITHOUT ROWID –
+    первые строки таблицы.
+    """
+    try:
+        low, high = conn.execute(f"SELECT min(rowid), max(rowid) FROM {name}").fetchone()
+    except sqlite3.OperationalError as e:
+        if "interrupt" in str(e):
+            raise
+        low = high = None
+    limit = SAMPLE_CHUNKS * SAMPLE_CHUNK_ROWS
+    if low is None or high is None:
+        return f"(SELECT * FROM {name} LIMIT {limit})"
+    step = max((high - low + 1) // SAMPLE_CHUNKS, 1)
+    chunks = [
+        f"SELECT * FROM (SELECT rowid AS _sample_rowid, * FROM {name} "
+        f"WHERE rowid >= {low + i * step} ORDER BY rowid LIMIT {SAMPLE_CHUNK_ROWS})"
+        for i in range(SAMPLE_CHUNKS)
+    ]
+    # UNION убирает повторы: участки перекрываются, если rowid распределены неравномерно
+    return f"({' UNION '.join(chunks)})"
+
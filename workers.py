@@ -0,0 +1,449 @@
+# workers.py
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional, List, Any, Dict, Callable
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from db_manager import DBManager, OperationCancelled, split_statements, CHANGES_TABLE
+from profiling import format_stat, short_sql
+from script_runner import ScriptRunner
+from importer import import_file
+from exporter import export_query
+from sql_file import run_sql_file
+from result_store import ResultStore
+
+PROGRESS_INTERVAL = 0.2   # секунд между сигналами progress
+
+
+class PoolTask(QObject):
+    """
+    Задача для фонового пула DBManager: fn(conn, *args) выполняется на подключении
+    только для чтения, результат доставляется в поток GUI сигналом succeeded.
+    Сигналы нужно подключить до вызова start().
+    """
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_manager: DBManager, fn: Callable[..., Any], *args: Any, parent=None) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+        self.future: Optional[Future] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self.future = self.db_manager.submit(self._run)
+        self.future.add_done_callback(self._on_done)
+
+    def _run(self, conn: sqlite3.Connection) -> Any:
+        with self._lock:
+            if self.cancelled:
+                raise OperationCancelled()
+            self._conn = conn
+        try:
+            return self.fn(conn, *self.args)
+        finally:
+            with self._lock:
+                self._conn = None
+
+    def cancel(self) -> None:
+        """Снимает задачу из очереди или прерывает уже выполняющийся запрос."""
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None:
+                self._conn.interrupt()
+        if self.future is not None:
+            self.future.cancel()
+
+    def _on_done(self, future: Future) -> None:
+        # Вызывается в потоке пула; сигналы доставляются в поток GUI через очередь
+        if future.cancelled() or self.cancelled:
+            return
+        try:
+            error = future.exception()
+            if error is None:
+                self.succeeded.emit(future.result())
+            else:
+                self.failed.emit(str(error))
+        except RuntimeError:
+            # Объект уже удалён вместе с окном-владельцем
+            pass
+
+
+class QueryWorker(QThread):
+    """
+    Выполняет SQL-скрипт в фоновом потоке на постоянном подключении для скриптов
+    (DBManager.script_connection), поэтому повторный запуск того же скрипта
+    использует уже скомпилированные команды.
+    Команды выполняются по одной (ScriptRunner); строки SELECT читаются пачками
+    через fetchmany и складываются в ResultStore прямо в этом потоке: поток GUI
+    получает хранилище сигналом result_ready и число строк сигналом rows_ready,
+    а сами строки читает из хранилища по мере прокрутки. Время, число строк и шаги VM каждой команды пишутся
+    в журнал замеров DBManager и выводятся сообщением.
+    stop_on_error – остановиться на первой ошибке или продолжить со следующей команды.
+    Отмена прерывает текущую команду через Connection.interrupt().
+    """
+    result_ready = pyqtSignal(object)   # ResultStore нового результата
+    rows_ready = pyqtSignal(int)        # строк в текущем результате
+    message = pyqtSignal(str)
+    failed = pyqtSignal(str)
+    progress = pyqtSignal(int)
+
+    def __init__(self, db_manager: DBManager, script: str, stop_on_error: bool = True, parent=None) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.script = script
+        self.stop_on_error = stop_on_error
+        self.cancelled = False
+        self.result_sql: Optional[str] = None  # последняя команда, вернувшая строки
+        self._runner: Optional[ScriptRunner] = None
+        self._lock = threading.Lock()
+        self._last_progress = 0.0
+        self._store: Optional[ResultStore] = None
+        self._last_rows = 0.0
+
+    def cancel(self) -> None:
+        """Запрашивает отмену; безопасно вызывать из потока GUI."""
+        self.cancelled = True
+        with self._lock:
+            if self._runner is not None:
+                self._runner.cancel()
+
+    def _on_progress(self, steps: int) -> None:
+        now = time.monotonic()
+        if now - self._last_progress >= PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.progress.emit(steps)
+
+    def _on_columns(self, columns: List[str]) -> None:
+        self._store = ResultStore(columns)
+        self.result_ready.emit(self._store)
+
+    def _on_rows(self, rows: List[Any]) -> None:
+        if self._store is None:
+            return
+        self._store.append(rows)
+        now = time.monotonic()
+        if now - self._last_rows >= PROGRESS_INTERVAL:
+            self._last_rows = now
+            self.rows_ready.emit(self._store.row_count)
+
+    def _on_result(self, result: Dict[str, Any]) -> None:
+        sql = result["sql"]
+        if self._store is not None:
+            self.rows_ready.emit(self._store.row_count)
+            self._store = None
+        if result["error"] is not None:
+            if not self.cancelled:
+                self.message.emit(f"Команда {result['index']} ({short_sql(sql)}): ошибка: {result['error']}")
+            return
+        if result["columns"] is not None:
+            self.result_sql = sql
+            label = f"Получено строк: {result['rows']}"
+        elif result["rows"] >= 0:
+            label = f"Затронуто строк: {result['rows']}"
+        else:
+            label = "Выполнено"
+        source = ", из кэша" if result["cached"] else ""
+        self.message.emit(f"{short_sql(sql)}: {label} ({format_stat(result)}{source})")
+
+    def run(self) -> None:
+        try:
+            # Автокоммит, как у executescript: каждая команда фиксируется сразу,
+            # явные BEGIN/COMMIT в скрипте работают как обычно
+            conn = self.db_manager.script_connection()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        runner = ScriptRunner(
+            conn, self.db_manager.query_log, "console", self.stop_on_error,
+            result_cache=self.db_manager.result_cache, ignore_temp=(CHANGES_TABLE,)
+        )
+        with self._lock:
+            if self.cancelled:
+                return
+            self._runner = runner
+        try:
+            results = runner.run(
+                split_statements(self.script), self._on_columns, self._on_rows,
+                self._on_result, self._on_progress
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        finally:
+            with self._lock:
+                self._runner = None
+            if self._store is not None:
+                self.rows_ready.emit(self._store.row_count)
+        errors = [result for result in results if result["error"] is not None]
+        seconds = sum(result["seconds"] for result in results)
+        if self.cancelled:
+            self.message.emit("Выполнение отменено.")
+        elif errors and self.stop_on_error:
+            self.failed.emit(f"Команда {errors[0]['index']}: {errors[0]['error']}")
+        elif errors:
+            self.message.emit(
+                f"Выполнено команд: {len(results)}, с ошибками: {len(errors)}, время: {seconds * 1000:.1f} мс"
+            )
+        else:
+            self.message.emit(f"SQL выполнен успешно. Команд: {len(results)}, время: {seconds * 1000:.1f} мс")
+
+
+class DumpWorker(QThread):
+    """
+    Записывает SQL-дамп в файл в фоновом потоке.
+    progress передаёт (символов записано, команд записано).
+    """
+    progress = pyqtSignal(int, int)
+    failed = pyqtSignal(str)
+    completed = pyqtSignal(int)
+
+    def __init__(
+        self,
+        db_manager: DBManager,
+        filename: str,
+        tables: Optional[List[str]] = None,
+        compress: bool = False,
+        parent=None
+    ) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.filename = filename
+        self.tables = tables
+        self.compress = compress
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def _on_progress(self, written: int, statements: int) -> None:
+        if self.cancelled:
+            raise OperationCancelled()
+        self.progress.emit(written, statements)
+
+    def run(self) -> None:
+        try:
+            statements = self.db_manager.dump_to_file(
+                self.filename, self.tables, self.compress, self._on_progress
+            )
+            self.completed.emit(statements)
+        except OperationCancelled:
+            pass
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class BackupWorker(QThread):
+    """
+    Резервное копирование базы (Connection.backup) в фоновом потоке.
+    progress передаёт (скопировано страниц, всего страниц).
+    """
+    progress = pyqtSignal(int, int)
+    failed = pyqtSignal(str)
+    completed = pyqtSignal(int)
+
+    def __init__(self, db_manager: DBManager, filename: str, parent=None) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.filename = filename
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def _on_progress(self, copied: int, total: int) -> None:
+        if self.cancelled:
+            raise OperationCancelled()
+        self.progress.emit(copied, total)
+
+    def run(self) -> None:
+        try:
+            pages = self.db_manager.backup_to_file(self.filename, progress_callback=self._on_progress)
+            self.completed.emit(pages)
+        except OperationCancelled:
+            pass
+        except Exception as e:
+            if not self.cancelled:
+                self.failed.emit(str(e))
+
+
+class ImportWorker(QThread):
+    """
+    Импортирует файл CSV/TSV/JSONL в таблицу в фоновом потоке.
+    progress передаёт (строк загружено, байт прочитано, размер файла).
+    """
+    progress = pyqtSignal(int, int, int)
+    failed = pyqtSignal(str)
+    completed = pyqtSignal(int)
+
+    def __init__(
+        self,
+        db_manager: DBManager,
+        filename: str,
+        table_name: str,
+        fmt: Optional[str] = None,
+        has_header: bool = True,
+        fast: bool = False,
+        defer_indexes: bool = False,
+        parent=None
+    ) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.filename = filename
+        self.table_name = table_name
+        self.fmt = fmt
+        self.has_header = has_header
+        self.fast = fast
+        self.defer_indexes = defer_indexes
+        # Описание столбцов читается в потоке GUI: основное подключение привязано к нему
+        self.columns_info = db_manager.get_table_info(table_name)
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def _on_progress(self, rows: int, position: int, size: int) -> None:
+        if self.cancelled:
+            raise OperationCancelled()
+        self.progress.emit(rows, position, size)
+
+    def run(self) -> None:
+        try:
+            rows = import_file(
+                self.db_manager, self.filename, self.table_name, self.fmt,
+                self.has_header, self.fast, self.defer_indexes, self._on_progress,
+                self.columns_info
+            )
+            self.completed.emit(rows)
+        except OperationCancelled:
+            pass
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class SqlFileWorker(QThread):
+    """
+    Выполняет SQL-файл в фоновом потоке (sql_file.run_sql_file).
+    progress передаёт (байт прочитано, размер файла, команд выполнено).
+    """
+    progress = pyqtSignal(int, int, int)
+    failed = pyqtSignal(str)
+    completed = pyqtSignal(object)
+
+    def __init__(
+        self, db_manager: DBManager, filename: str, batch_size: int, resume: bool = True, parent=None
+    ) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.filename = filename
+        self.batch_size = batch_size
+        self.resume = resume
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def _on_progress(self, position: int, size: int, statements: int) -> None:
+        if self.cancelled:
+            raise OperationCancelled()
+        self.progress.emit(position, size, statements)
+
+    def run(self) -> None:
+        try:
+            result = run_sql_file(
+                self.db_manager, self.filename, self.batch_size, self.resume, self._on_progress
+            )
+            self.completed.emit(result)
+        except OperationCancelled:
+            pass
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class ExportDataWorker(QThread):
+    """
+    Выгружает результат запроса в CSV/TSV/JSONL в фоновом потоке.
+    progress передаёт число записанных строк.
+    """
+    progress = pyqtSignal(int)
+    failed = pyqtSignal(str)
+    completed = pyqtSignal(int)
+
+    def __init__(self, db_manager: DBManager, sql: str, filename: str, parent=None) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.sql = sql
+        self.filename = filename
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def _on_progress(self, rows: int) -> None:
+        if self.cancelled:
+            raise OperationCancelled()
+        self.progress.emit(rows)
+
+    def run(self) -> None:
+        try:
+            rows = export_query(
+                self.db_manager, self.sql, self.filename, progress_callback=self._on_progress
+            )
+            self.completed.emit(rows)
+        except OperationCancelled:
+            pass
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class WriteWorker(QThread):
+    """
+    Выполняет fn(conn, *args) в фоновом потоке на отдельном подключении с правом записи
+    (ANALYZE, CREATE INDEX и т. п.). Отмена прерывает текущую команду.
+    """
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_manager: DBManager, fn: Callable[..., Any], *args: Any, parent=None) -> None:
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None:
+                self._conn.interrupt()
+
+    def run(self) -> None:
+        try:
+            conn = self.db_manager.new_connection()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        with self._lock:
+            self._conn = conn
+        try:
+            result = self.fn(conn, *self.args)
+            if conn.in_transaction:
+                conn.commit()
+            if not self.cancelled:
+                self.succeeded.emit(result)
+        except Exception as e:
+            if not self.cancelled:
+                self.failed.emit(str(e))
+        finally:
+            with self._lock:
+                self._conn = None
+            if conn.in_transaction:
+                conn.rollback()
+            conn.close()